@@ -16,9 +16,6 @@ sys.stderr = open(os.devnull, 'w')
 import threading
 import time
 import warnings
-import math
-import random
-import subprocess
 import signal
 warnings.filterwarnings('ignore')
 
@@ -27,6 +24,25 @@ from tkinter import scrolledtext
 import google.generativeai as genai
 import speech_recognition as sr
 
+from bible_ai_audio import MicrophoneCapture, CaptureStopped
+from bible_ai_audiocache import AudioCache
+from bible_ai_bargein import BargeInMonitor
+from bible_ai_chat import ChatSession
+from bible_ai_corpus import CORPUS_PATH, BibleCorpus
+from bible_ai_context import CachedPersonaModel, create_context_cache
+from bible_ai_flac import to_upload_audio
+from bible_ai_listener import (ListenerStateMachine, IDLE, WAKE_LISTEN, COMMAND_LISTEN,
+                               THINKING, SPEAKING)
+from bible_ai_log import LogBuffer, LogView
+from bible_ai_orb import FrameScheduler, OrbRenderer, SpriteOrbRenderer
+from bible_ai_responsecache import ResponseCache
+from bible_ai_semanticcache import SemanticCache, create_embedder
+from bible_ai_streaming import speak_stream
+from bible_ai_tts import Speaker, create_backend
+from bible_ai_ui import UIUpdateQueue
+from bible_ai_vad import VoiceActivityDetector
+from bible_ai_wakeword import WakeWordDetector
+
 # Restore stderr after all imports are complete
 sys.stderr.close()
 sys.stderr = _original_stderr
@@ -36,15 +52,62 @@ sys.stderr = _original_stderr
 # 🚨 DO NOT SHARE THIS KEY WITH ANYONE
 YOUR_API_KEY = "" 
 
+# Speak responses sentence by sentence while Gemini is still generating them
+STREAM_RESPONSES = True
+
+# Conversation history sent with each prompt, in (estimated) tokens; older turns get summarized
+CHAT_TOKEN_BUDGET = 4000
+
+# Answers to conversation-opening prompts reused for repeat requests; RESPONSE_CACHE_FILE keeps them across runs
+RESPONSE_CACHE_ENTRIES = 256
+RESPONSE_CACHE_TTL_HOURS = 168
+RESPONSE_CACHE_FILE = None  # e.g. "bible_ai_responses.json"
+# ... and answers to questions worded differently but meaning the same: "hashing" or a
+# sentence-transformers model such as "all-MiniLM-L6-v2"; None turns it off
+SEMANTIC_CACHE_MODEL = "hashing"
+SEMANTIC_CACHE_THRESHOLD = 0.9
+SEMANTIC_CACHE_ENTRIES = 10000
+
+# Bible text for reading verses locally, built with `python bible_ai_corpus.py build`; None to ask Gemini
+BIBLE_CORPUS = CORPUS_PATH
+
+# Log entries kept in memory; older ones go to LOG_SPILL_FILE (rotated) if set
+LOG_CAPACITY = 2000
+LOG_SPILL_FILE = None  # e.g. "bible_ai.log"
+
+# Text-to-speech: "auto" (say on macOS, else espeak-ng/espeak), "say", "espeak" or "pcm"
+TTS_BACKEND = "auto"
+TTS_VOICE = None  # backend-specific voice name
+TTS_RATE = None  # words per minute
+# Reuse synthesized audio for repeated phrases (stored in tts_cache/, least recently used dropped first)
+TTS_CACHE = True
+TTS_CACHE_MB = 64
+# Stop speaking when the wake word is heard over the speech (needs enrolled wake-word templates)
+BARGE_IN = True
+
+# Toggle button colors: (background, active background, foreground)
+BUTTON_COLORS = {
+    "red": ("#ff4757", "#ee3344", "#ffffff"),
+    "blue": ("#6366f1", "#5b5ff1", "#f0f0f0"),
+}
+
+# Play the idle breathing back from pre-rendered frames instead of drawing it live
+ORB_SPRITES = False
+ORB_SPRITE_FRAMES = 32
+ORB_SPRITE_MEMORY_MB = 48
+
 # Configure the Gemini API client
 try:
     genai.configure(api_key=YOUR_API_KEY)
 except Exception as e:
     print(f"API Key configuration failed: {e}")
 
+# Upload the persona once as cached content: "gemini", "local" (offline stand-in) or None
+CONTEXT_CACHE = "gemini"
+
 # Set up the Gemini model with a specific persona (system instruction)
 # Using gemini-2.5-flash - the latest stable Gemini model
-model = genai.GenerativeModel(
+model = CachedPersonaModel(
     model_name='gemini-2.5-flash',
     system_instruction="""You are the Bible AI, a wise and eloquent storyteller. Your purpose is to narrate stories and concepts from the Bible. 
     When asked for a story, you must tell it in a cinematic, descriptive, and immersive way. 
@@ -53,163 +116,342 @@ model = genai.GenerativeModel(
     Keep your responses focused on the user's request.
     If the user asks a question that is not about a story (e.g., 'who was Moses?'), answer it clearly and concisely from a biblical perspective.
     Begin your stories directly without introductory phrases like 'Of course, here is a story...'
-    """
+    """,
+    cache=create_context_cache(CONTEXT_CACHE)
 )
 
-# --- Core Functions ---
+# Follow-up questions are answered with the conversation so far
+chat = ChatSession(model, CHAT_TOKEN_BUDGET)
 
-say_process = None  # Store the current say process
+# Whole answers for prompts that keep coming back ("David and Goliath", ...)
+response_cache = ResponseCache(RESPONSE_CACHE_ENTRIES, RESPONSE_CACHE_TTL_HOURS * 3600, RESPONSE_CACHE_FILE)
+# ... and the same stories asked for in other words ("Jonah and the whale" / "Jonah in the big fish")
+similar_answers = (SemanticCache(create_embedder(SEMANTIC_CACHE_MODEL), SEMANTIC_CACHE_THRESHOLD,
+                                 SEMANTIC_CACHE_ENTRIES, RESPONSE_CACHE_TTL_HOURS * 3600)
+                   if SEMANTIC_CACHE_MODEL else None)
 
-def speak(text):
-    """Uses macOS's built-in 'say' command to speak text aloud with animation."""
+# "Read John 3:16", "what does Psalm 23 say": answered from the local Bible text when it's there
+bible = BibleCorpus.open(BIBLE_CORPUS) if BIBLE_CORPUS else None
+
+# Offline wake-word spotting, used once templates have been recorded with
+# `python bible_ai_wakeword.py enroll`; otherwise every phrase goes to Google
+wake_detector = WakeWordDetector.from_directory()
+
+# Trims silence from each utterance and drops ones with no speech before upload
+vad = VoiceActivityDetector()
+
+# What the listening loop is doing; threads wait on it instead of polling
+listener = ListenerStateMachine()
+
+# Speaks through the TTS backend, synthesizing the next sentence during playback
+speaker = Speaker(create_backend(TTS_BACKEND, TTS_VOICE, TTS_RATE),
+                  AudioCache(max_bytes=TTS_CACHE_MB * 1024 * 1024) if TTS_CACHE else None)
+
+# Spoken often enough to synthesize once, at startup
+ACKNOWLEDGEMENT = "Yes, how can I help?"
+NO_COMMAND = "I'm sorry, I didn't hear a command."
+RECOGNITION_ERROR = "There seems to be an issue with the speech recognition service."
+speaker.warm([ACKNOWLEDGEMENT, NO_COMMAND, RECOGNITION_ERROR])
+
+# Listens for the wake word over our own speech and cuts the speech short
+barge_in = BargeInMonitor(wake_detector if BARGE_IN else None, speaker,
+                          lambda detection: barge_in_detected(detection))
+
+# --- Core Functions ---
+
+def begin_speaking():
+    """Switch the UI into the speaking state"""
     update_status("Speaking...")
     app.is_speaking = True
-    app.start_speaking_animation()
+    listener.transition(SPEAKING)
+    app.ui.call(app.start_speaking_animation)
     
     # Update button to show 'Stop Speaking'
-    app.toggle_button.config(text="Stop Speaking", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
+    set_button("Stop Speaking", "red")
     
-    # Write text to a temporary file to avoid shell escaping issues with long text
-    import tempfile
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-        f.write(text)
-        temp_file = f.name
+    # Keep listening for the wake word while we talk
+    if mic_capture:
+        barge_in.start(mic_capture)
+
+def say_text(text):
+    """Speak text through the configured TTS backend and block until it finishes"""
+    speaker.say(text)
+
+def finish_speaking():
+    """Return the UI to the listening state after speech ends"""
+    app.is_speaking = False
+    barge_in.stop()
+    app.ui.call(app.stop_speaking_animation)
     
-    try:
-        # Use -f flag to read from file instead of passing text directly
-        os.system(f"say -f {temp_file}")
-    finally:
-        # Clean up temp file
-        try:
-            os.remove(temp_file)
-        except:
-            pass
+    # Don't let the microphone pick up our own voice as the next phrase
+    if mic_capture:
+        mic_capture.discard()
     
-    app.is_speaking = False
-    app.stop_speaking_animation()
+    # Wakes the listening loop right away
+    listener.transition(WAKE_LISTEN if is_listening else IDLE)
     
     # Only update if still listening (not manually stopped)
     if is_listening:
-        app.toggle_button.config(text="Stop", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
+        set_button("Stop", "red")
         update_status("Listening for 'Hey Bible'...")
 
+def interrupt_speaking(reason, discard=True):
+    """Cut speech off mid-sentence and go back to listening"""
+    app.is_speaking = False
+    # Cut off playback and drop any sentences synthesized ahead
+    speaker.stop()
+    barge_in.stop()
+    listener.transition(WAKE_LISTEN, reason)
+    app.ui.call(app.stop_speaking_animation)
+    if discard and mic_capture:
+        mic_capture.discard()
+    set_button("Stop", "red")
+
+def barge_in_detected(detection):
+    """The wake word was heard over our own speech; stop talking and take the command"""
+    log_message(f"Heard: hey bible while speaking (local match, score {detection.score:.2f})")
+    # Keep the audio after the wake word: the command follows right away
+    interrupt_speaking("barge-in", discard=False)
+
+def speak(text):
+    """Speak text aloud through the TTS backend with animation."""
+    begin_speaking()
+    say_text(text)
+    # An interruption already reset the UI
+    if app.is_speaking:
+        finish_speaking()
+
+def speak_response(prompt):
+    """Generate a response and speak it, sentence by sentence when streaming is enabled"""
+    fresh = chat.fresh
+    if fresh:
+        chat.reset()  # an idle conversation's history must not carry over
+    
+    # Verse references and searches are read word for word from the local text
+    passage = bible.answer(prompt) if bible is not None else None
+    if passage:
+        chat.record(prompt, passage)
+        log_message(f"Bible: {passage}\n")
+        log_message(f"Corpus: {bible.summary()}")
+        speak(passage)
+        return
+    
+    # A new conversation may reuse an earlier answer; follow-ups depend on what came before,
+    # so they are neither looked up nor stored
+    cached, tier = cached_answer(prompt) if fresh else (None, None)
+    started = time.perf_counter()
+    
+    if not STREAM_RESPONSES:
+        response = cached or chat.ask(prompt)
+        response_text = response.text
+        chat.record(prompt, response_text, response)
+        if fresh and cached is None:
+            remember_answer(prompt, response_text, time.perf_counter() - started)
+        log_message(f"AI Response{' (cached)' if cached else ''}: {response_text}\n")
+        log_message(f"Chat: {chat.report()}")
+        if fresh:
+            report_answer_caches(tier)
+        speak(response_text)
+        return
+    
+    response = cached or chat.ask(prompt, stream=True)
+    response_text, stats = speak_stream(
+        response,
+        say_text,
+        on_start=begin_speaking,
+        prepare=speaker.preparer(),
+        is_interrupted=lambda: not app.is_speaking
+    )
+    # Interrupted replies are kept as far as they got
+    chat.record(prompt, response_text, response)
+    # Only complete answers are worth replaying
+    if fresh and cached is None and not stats.interrupted:
+        remember_answer(prompt, response_text, stats.time_to_first_audio or 0.0)
+    # The stop button already reset the UI if speech was interrupted
+    if app.is_speaking:
+        finish_speaking()
+    log_message(f"AI Response{' (cached)' if cached else ''}: {response_text}\n")
+    log_message(f"Streaming: {stats.summary()}")
+    log_message(f"Chat: {chat.report()}")
+    if fresh:
+        report_answer_caches(tier)
+
+def cached_answer(prompt):
+    """(answer, tier) for an earlier answer to the same question ("exact") or to one close
+    enough in meaning ("similar"); (None, None) if there's none"""
+    cached = response_cache.get(prompt, model.model_name, model.version)
+    if cached is not None:
+        return cached, "exact"
+    if similar_answers is not None:
+        cached = similar_answers.get(prompt, model.model_name, model.version)
+        if cached is not None:
+            return cached, "similar"
+    return None, None
+
+def remember_answer(prompt, text, seconds):
+    """Keep a complete answer for the next time the question comes up"""
+    response_cache.put(prompt, model.model_name, model.version, text, seconds)
+    if similar_answers is not None:
+        similar_answers.put(prompt, model.model_name, model.version, text, seconds)
+
+def report_answer_caches(tier):
+    """Log the answer caches' stats"""
+    # Only exact misses reach the similar tier, so each tier's counts are its own
+    log_message(f"Answer cache: {f'hit, {tier} match' if tier else 'miss'}")
+    log_message(f"Exact answers: {response_cache.summary()}")
+    if similar_answers is not None:
+        log_message(f"Similar answers: {similar_answers.summary()}")
+
+def transcribe(recognizer, audio):
+    """Trim silence with the VAD, then transcribe what's left with Google"""
+    def recognize(speech):
+        # Resample and FLAC-encode in-process instead of spawning the flac binary
+        return recognizer.recognize_google(to_upload_audio(speech))
+    
+    text, result = vad.recognize(recognize, audio)
+    log_message(f"VAD: {result.summary()}")
+    return text
+
 def listen_and_process():
     """The main loop for listening for the wake word and commands."""
-    global is_listening
+    global is_listening, mic_capture
     recognizer = sr.Recognizer()
+    
+    # One microphone stream for the whole session, cut into phrases as needed
+    capture = MicrophoneCapture(recognizer)
+    mic_capture = capture
 
-    while is_listening:
-        try:
-            # Don't listen while speaking
-            if app.is_speaking:
-                time.sleep(0.1)
-                continue
-                
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                update_status("Listening for 'Hey Bible'...")
-                app.set_listening_state()
+    try:
+        while is_listening:
+            try:
+                # Don't listen while speaking; resumes as soon as speech ends
+                listener.wait_while(SPEAKING)
+                if not is_listening:
+                    break
                 
-                audio_wake_word = recognizer.listen(source, phrase_time_limit=10)
-            
-            text = recognizer.recognize_google(audio_wake_word).lower()
-            log_message(f"Heard: {text}")
-
-            if "hey bible" in text:
-                update_status("Wake word detected. Listening for your command...")
-                app.set_processing_state()
-                speak("Yes, how can I help?")
+                if not capture.running:
+                    capture.start()
                 
-                # Wait for the prompt after wake word
-                with sr.Microphone() as source:
-                    recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                resume_at = barge_in.take()
+                if resume_at is not None:
+                    # The wake word was spoken over our own speech; its command follows right away
+                    capture.seek(resume_at)
+                    heard_wake_word = True
+                else:
+                    listener.transition(WAKE_LISTEN)
+                    
+                    update_status("Listening for 'Hey Bible'...")
+                    app.ui.call(app.set_listening_state)
+                    
+                    if wake_detector:
+                        # Spot the wake word locally; nothing is sent to Google until it fires
+                        detection = wake_detector.wait(capture)
+                        log_message(f"Heard: hey bible (local match, score {detection.score:.2f})")
+                        heard_wake_word = True
+                    else:
+                        audio_wake_word = capture.listen(phrase_time_limit=10)
+                        
+                        text = transcribe(recognizer, audio_wake_word).lower()
+                        log_message(f"Heard: {text}")
+                        heard_wake_word = "hey bible" in text
+
+                if heard_wake_word:
+                    update_status("Wake word detected. Listening for your command...")
+                    app.ui.call(app.set_processing_state)
+                    if resume_at is None:
+                        speak(ACKNOWLEDGEMENT)
+                        # Saying the wake word over the acknowledgement starts the command there
+                        resume_at = barge_in.take()
+                        if resume_at is not None:
+                            capture.seek(resume_at)
+                    
+                    # Wait for the prompt after wake word
+                    listener.transition(COMMAND_LISTEN)
                     update_status("Listening for command...")
-                    audio_command = recognizer.listen(source, timeout=5, phrase_time_limit=15)
-                
-                prompt = recognizer.recognize_google(audio_command)
-                log_message(f"User Prompt: {prompt}")
-
-                update_status("Thinking...")
-                app.set_thinking_state()
-
-                response = model.generate_content(prompt)
-                response_text = response.text
-                log_message(f"AI Response: {response_text}\n")
-                speak(response_text)
-
-        except sr.WaitTimeoutError:
-            if "wake word detected" in app.status_label.cget("text").lower():
-                log_message("No command heard after wake word.")
-                speak("I'm sorry, I didn't hear a command.")
-            continue
-        except sr.UnknownValueError:
-            continue
-        except sr.RequestError as e:
-            log_message(f"Could not request results; {e}")
-            speak("There seems to be an issue with the speech recognition service.")
-            time.sleep(2)
-        except Exception as e:
-            log_message(f"An unexpected error occurred: {e}")
-            time.sleep(2)
+                    audio_command = capture.listen(timeout=5, phrase_time_limit=15)
+                    
+                    prompt = transcribe(recognizer, audio_command)
+                    log_message(f"User Prompt: {prompt}")
+                    listener.transition(THINKING)
+
+                    update_status("Thinking...")
+                    app.ui.call(app.set_thinking_state)
+
+                    speak_response(prompt)
+
+            except sr.WaitTimeoutError:
+                if listener.state == COMMAND_LISTEN:
+                    log_message("No command heard after wake word.")
+                    speak(NO_COMMAND)
+                continue
+            except sr.UnknownValueError:
+                continue
+            except CaptureStopped:
+                continue
+            except sr.RequestError as e:
+                log_message(f"Could not request results; {e}")
+                speak(RECOGNITION_ERROR)
+                # Back off, but stop waiting as soon as listening is turned off
+                listener.wait_for(IDLE, timeout=2)
+            except Exception as e:
+                log_message(f"An unexpected error occurred: {e}")
+                listener.wait_for(IDLE, timeout=2)
+    finally:
+        capture.stop()
 
 # --- GUI Functions ---
 
-def update_status(message):
-    app.status_label.config(text=message)
+# These only queue the change; the main loop applies it (safe from any thread)
+
+def update_status(message, color=None):
+    app.ui.set("status", lambda: app.status_label.config(text=message))
+    if color:
+        app.ui.set("status_color", lambda: app.status_label.config(fg=color))
 
 def log_message(message):
-    app.log_area.config(state=tk.NORMAL)
-    app.log_area.insert(tk.END, message + "\n")
-    app.log_area.see(tk.END)
-    app.log_area.config(state=tk.DISABLED)
+    app.ui.log(message)
+
+def set_button(text, color):
+    bg, active, fg = BUTTON_COLORS[color]
+    app.ui.set("button", lambda: app.toggle_button.config(text=text, bg=bg, activebackground=active, fg=fg))
 
 def toggle_listening():
-    global is_listening, listening_thread, say_process
+    global is_listening, listening_thread
     
     # If speaking, stop it and resume listening
     if app.is_speaking:
-        # Kill the say process if it exists
-        if say_process and say_process.poll() is None:
-            say_process.terminate()
-            try:
-                say_process.wait(timeout=0.5)
-            except subprocess.TimeoutExpired:
-                say_process.kill()
-        
-        # Also kill any lingering say processes
-        try:
-            subprocess.run(['killall', 'say'], check=False)
-        except:
-            pass
-        
-        app.is_speaking = False
-        app.stop_speaking_animation()
-        log_message("Speech interrupted by user")
-        
         # Resume listening mode (don't stop the listening thread)
-        app.toggle_button.config(text="Stop", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
-        update_status("Listening for 'Hey Bible'...")
-        app.status_label.config(fg="#10b981")
+        interrupt_speaking("interrupted")
+        log_message("Speech interrupted by user")
+        update_status("Listening for 'Hey Bible'...", color="#10b981")
         return
     
     # If listening, stop it
     if is_listening:
         is_listening = False
-        app.toggle_button.config(text="Start Listening", bg="#6366f1", activebackground="#5b5ff1", fg="#f0f0f0")
-        update_status("Ready")
-        app.status_label.config(fg="#9ca3af")
+        listener.transition(IDLE, "stopped")
+        if mic_capture:
+            mic_capture.stop()
+        set_button("Start Listening", "blue")
+        update_status("Ready", color="#9ca3af")
+        log_message(f"Animation: {app.frames.summary()}")
+        log_message(f"Listener: {listener.summary()}")
+        log_message(f"Speech: {speaker.summary()}")
+        log_message(f"Barge-in: {barge_in.summary()}")
+        log_message(f"Persona cache: {model.summary()}")
+        # The next activation starts a new conversation
+        chat.reset()
         log_message("--- AI Deactivated ---\n")
-        app.set_idle_state()
+        app.ui.call(app.set_idle_state)
     else:
         # Start listening
         is_listening = True
         listening_thread = threading.Thread(target=listen_and_process, daemon=True)
         listening_thread.start()
-        app.toggle_button.config(text="Stop", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
+        set_button("Stop", "red")
         log_message("--- AI Activated ---")
-        update_status("Listening...")
-        app.status_label.config(fg="#10b981")
-        app.set_listening_state()
+        update_status("Listening...", color="#10b981")
+        app.ui.call(app.set_listening_state)
 
 # --- Main Application Class ---
 
@@ -224,10 +466,9 @@ class BibleAIApp(tk.Tk):
         self.configure(bg="#0a0118")
         
         self.is_speaking = False
-        self.animation_id = None
         self.wave_offset = 0
         self.glow_offset = 0
-        self.idle_animation_id = None
+        self.idle_breath_offset = 0
         self.button_hover = False
         
         # Main container - centered design
@@ -271,11 +512,23 @@ class BibleAIApp(tk.Tk):
         )
         self.canvas.pack()
         
-        # Draw initial orb
-        self.orb = None
-        self.wave_lines = []
+        # Orb items are created once and moved each frame
+        self.renderer = None
+        if ORB_SPRITES:
+            try:
+                self.renderer = SpriteOrbRenderer(self.canvas, frames=ORB_SPRITE_FRAMES,
+                                                  memory_mb=ORB_SPRITE_MEMORY_MB)
+            except Exception as e:
+                print(f"Orb sprites unavailable, drawing live: {e}")
+                self.canvas.delete("all")
+        if self.renderer is None:
+            self.renderer = OrbRenderer(self.canvas)
+        self.orb = self.renderer.orb
         self.draw_orb()
         
+        # Drives the idle/speaking animations; pauses while the window is hidden
+        self.frames = FrameScheduler(self.canvas)
+        
         # Status text - Minimal, centered with better contrast
         self.status_label = tk.Label(
             main_container, 
@@ -350,187 +603,32 @@ class BibleAIApp(tk.Tk):
             selectforeground="#ffffff"
         )
         self.log_area.pack(fill=tk.BOTH, expand=True, padx=1, pady=1)
-    
-    def draw_orb(self, pulse_offset=0):
-        """Draw ultra-smooth gradient orb as perfect glass sphere with subtle breathing"""
-        self.canvas.delete("all")
-        center_x, center_y = 250, 250
-        
-        # More noticeable breathing effect
-        breath = 8 * math.sin(pulse_offset)  # Increased from 3 to 8
-        
-        # Outer atmospheric glow - deep purple haze
-        for i in range(35, 0, -1):
-            radius = 165 + i * 4 + breath * 0.5  # Increased multiplier
-            ratio = i / 35
-            color = self.blend_color("#1a1540", "#2a2055", ratio)
-            self.canvas.create_oval(
-                center_x - radius, center_y - radius,
-                center_x + radius, center_y + radius,
-                fill=color, outline="", stipple="gray12"
-            )
-        
-        # Mid-layer glow
-        for i in range(20, 0, -1):
-            radius = 150 + i * 2.5 + breath * 0.8  # Increased multiplier
-            ratio = i / 20
-            color = self.blend_color("#2d2560", "#3d3580", ratio)
-            self.canvas.create_oval(
-                center_x - radius, center_y - radius,
-                center_x + radius, center_y + radius,
-                fill=color, outline="", stipple="gray25"
-            )
         
-        # Main sphere - smooth gradient from purple to cyan
-        base_radius = 140
-        for i in range(35, 0, -1):
-            radius = base_radius - i * 3.8 + breath  # More visible pulse
-            ratio = i / 35
-            
-            # Perfect gradient: purple -> indigo -> blue -> cyan
-            if ratio > 0.75:
-                color = self.blend_color("#7dd3fc", "#a5f3fc", (ratio - 0.75) / 0.25)
-            elif ratio > 0.5:
-                color = self.blend_color("#60a5fa", "#7dd3fc", (ratio - 0.5) / 0.25)
-            elif ratio > 0.25:
-                color = self.blend_color("#6366f1", "#60a5fa", (ratio - 0.25) / 0.25)
-            else:
-                color = self.blend_color("#7c3aed", "#6366f1", ratio / 0.25)
-            
-            self.canvas.create_oval(
-                center_x - radius, center_y - radius,
-                center_x + radius, center_y + radius,
-                fill=color, outline=""
-            )
+        # Bounded log; the widget only ever holds a window of it
+        self.log_buffer = LogBuffer(LOG_CAPACITY, spill_path=LOG_SPILL_FILE)
+        self.log_view = LogView(self.log_area, self.log_buffer)
         
-        # Glass highlight - top left for 3D sphere effect
-        highlight_radius = 100
-        self.canvas.create_oval(
-            center_x - highlight_radius, center_y - highlight_radius,
-            center_x - 15, center_y - 15,
-            fill="#e0f2fe", outline="", stipple="gray12"
-        )
-        
-        # Secondary subtle highlight
-        self.canvas.create_oval(
-            center_x - 80, center_y - 80,
-            center_x - 30, center_y - 30,
-            fill="#f0f9ff", outline="", stipple="gray12"
-        )
-        
-        # Sparkle icons with more noticeable floating
-        sparkle_float = 4 * math.sin(pulse_offset * 0.9)  # Increased amplitude and speed
-        sparkle_positions = [
-            (center_x, center_y - 28 + sparkle_float, "✦", 40),
-            (center_x - 33, center_y + 20 - sparkle_float * 0.6, "✦", 23),
-            (center_x + 33, center_y + 15 + sparkle_float * 0.4, "✦", 19)
-        ]
-        
-        for x, y, symbol, size in sparkle_positions:
-            self.canvas.create_text(
-                x, y,
-                text=symbol,
-                font=("Helvetica", size),
-                fill="#ffffff"
-            )
-        
-        # Store orb reference
-        self.orb = self.canvas.create_oval(
-            center_x - 140, center_y - 140,
-            center_x + 140, center_y + 140,
-            fill="", outline=""
-        )
+        # Status, button and log changes from other threads are applied here once per frame
+        self.ui = UIUpdateQueue(self, self.append_log)
+        self.ui.start()
     
-    def blend_color(self, color1, color2, ratio):
-        """Blend two hex colors"""
-        c1 = tuple(int(color1[i:i+2], 16) for i in (1, 3, 5))
-        c2 = tuple(int(color2[i:i+2], 16) for i in (1, 3, 5))
-        blended = tuple(int(c1[i] + (c2[i] - c1[i]) * ratio) for i in range(3))
-        return f"#{blended[0]:02x}{blended[1]:02x}{blended[2]:02x}"
+    def append_log(self, lines):
+        """Add a batch of log lines; the view inserts them in one go if it's following"""
+        self.log_view.append(lines)
+    
+    def draw_orb(self, pulse_offset=0):
+        """Draw ultra-smooth gradient orb as perfect glass sphere with subtle breathing"""
+        self.renderer.draw_idle(pulse_offset)
     
     def animate_waves(self):
-        """Slower, more elegant speaking animation"""
+        """Slower, more elegant speaking animation (one frame)"""
         if not self.is_speaking:
+            self.frames.stop()
             return
         
-        self.canvas.delete("all")
-        center_x, center_y = 250, 250
         self.wave_offset += 0.06  # Slower animation
         self.glow_offset += 0.04
-        
-        # Outer ripple rings - slow elegant waves
-        for i in range(8):
-            phase = self.glow_offset + i * 0.5
-            radius = 180 + 28 * math.sin(phase)
-            
-            color = self.blend_color("#4f46e5", "#818cf8", i / 8)
-            width = int(2 + 1.5 * math.sin(phase))
-            self.canvas.create_oval(
-                center_x - radius, center_y - radius,
-                center_x + radius, center_y + radius,
-                fill="", outline=color, width=width, stipple="gray25"
-            )
-        
-        # Main pulsing sphere - gentle breathing
-        pulse = 140 + 12 * math.sin(self.wave_offset * 1.2)
-        
-        for i in range(35, 0, -1):
-            radius = pulse - i * 3.8
-            ratio = i / 35
-            
-            # Smooth gradient shift
-            if ratio > 0.75:
-                color = self.blend_color("#a5f3fc", "#dbeafe", (ratio - 0.75) / 0.25)
-            elif ratio > 0.5:
-                color = self.blend_color("#7dd3fc", "#a5f3fc", (ratio - 0.5) / 0.25)
-            elif ratio > 0.25:
-                color = self.blend_color("#60a5fa", "#7dd3fc", (ratio - 0.25) / 0.25)
-            else:
-                color = self.blend_color("#818cf8", "#60a5fa", ratio / 0.25)
-            
-            self.canvas.create_oval(
-                center_x - radius, center_y - radius,
-                center_x + radius, center_y + radius,
-                fill=color, outline=""
-            )
-        
-        # Slower rotating particles
-        for j in range(10):
-            angle = self.wave_offset * 0.9 + j * (2 * math.pi / 10)
-            particle_dist = 115 + 15 * math.sin(self.wave_offset + j * 0.4)
-            particle_x = center_x + particle_dist * math.cos(angle)
-            particle_y = center_y + particle_dist * math.sin(angle)
-            particle_size = 2 + 1.5 * math.sin(self.wave_offset * 1.3 + j)
-            
-            # Particle glow
-            self.canvas.create_oval(
-                particle_x - particle_size - 1, particle_y - particle_size - 1,
-                particle_x + particle_size + 1, particle_y + particle_size + 1,
-                fill="#e0f2fe", outline=""
-            )
-            self.canvas.create_oval(
-                particle_x - particle_size, particle_y - particle_size,
-                particle_x + particle_size, particle_y + particle_size,
-                fill="#ffffff", outline=""
-            )
-        
-        # Gentle floating sparkles
-        sparkle_offset = self.wave_offset * 1.1
-        sparkle_positions = [
-            (center_x + 10 * math.sin(sparkle_offset), center_y - 28, "✦", 36),
-            (center_x - 33, center_y + 20 + 5 * math.sin(sparkle_offset + 1.8), "✦", 21),
-            (center_x + 33, center_y + 15 + 5 * math.sin(sparkle_offset + 3.2), "✦", 17)
-        ]
-        
-        for x, y, symbol, size in sparkle_positions:
-            self.canvas.create_text(
-                x, y,
-                text=symbol,
-                font=("Helvetica", size),
-                fill="#ffffff"
-            )
-        
-        self.animation_id = self.after(40, self.animate_waves)  # Slower frame rate
+        self.renderer.draw_speaking(self.wave_offset, self.glow_offset)
     
     def hsv_to_rgb(self, h, s, v):
         """Convert HSV to RGB hex color"""
@@ -538,36 +636,24 @@ class BibleAIApp(tk.Tk):
         r, g, b = colorsys.hsv_to_rgb(h/360, s, v)
         return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
     
+    def idle_frame(self):
+        """Faster, more noticeable breathing animation when idle (one frame)"""
+        self.idle_breath_offset += 0.10  # Faster increment (was 0.03)
+        self.draw_orb(self.idle_breath_offset)
+    
     def start_idle_animation(self):
-        """Faster, more noticeable breathing animation when idle"""
+        """Start the idle breathing at 30 FPS"""
         if self.is_speaking:
             return
-        
-        if not hasattr(self, 'idle_breath_offset'):
-            self.idle_breath_offset = 0
-        
-        self.idle_breath_offset += 0.10  # Faster increment (was 0.03)
-        self.draw_orb(self.idle_breath_offset)
-        
-        # Faster animation rate - 30 FPS instead of 20
-        self.idle_animation_id = self.after(33, self.start_idle_animation)
+        self.frames.start(self.idle_frame, fps=30)
     
     def start_speaking_animation(self):
-        """Start the speaking animation"""
-        if self.idle_animation_id:
-            self.after_cancel(self.idle_animation_id)
-            self.idle_animation_id = None
-        if self.animation_id:
-            self.after_cancel(self.animation_id)
-        self.animate_waves()
+        """Start the speaking animation at 25 FPS (slower frame rate)"""
+        self.frames.start(self.animate_waves, fps=25)
     
     def stop_speaking_animation(self):
         """Stop the animation and return to idle state"""
-        if self.animation_id:
-            self.after_cancel(self.animation_id)
-            self.animation_id = None
-        if not hasattr(self, 'idle_breath_offset'):
-            self.idle_breath_offset = 0
+        self.frames.stop()
         self.draw_orb(self.idle_breath_offset)
         self.start_idle_animation()
     
@@ -587,8 +673,6 @@ class BibleAIApp(tk.Tk):
     
     def set_idle_state(self):
         """Visual state when idle"""
-        if not hasattr(self, 'idle_breath_offset'):
-            self.idle_breath_offset = 0
         self.draw_orb(self.idle_breath_offset)
         self.start_idle_animation()
     
@@ -607,6 +691,8 @@ class BibleAIApp(tk.Tk):
 if __name__ == "__main__":
     is_listening = False
     listening_thread = None
+    mic_capture = None
     
     app = BibleAIApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    app.log_buffer.close()
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Persistent microphone capture for the listening loop.
+
+The listener used to open a fresh ``sr.Microphone()`` and recalibrate for
+ambient noise on every pass, twice per wake word. ``MicrophoneCapture``
+opens the device once, reads it continuously on a background thread into a
+fixed-size ring buffer, and cuts phrases out of that buffer with the same
+energy-threshold logic as ``Recognizer.listen()``.
+"""
+
+import audioop
+import math
+import threading
+
+import speech_recognition as sr
+
+
+class CaptureStopped(Exception):
+    """Raised by MicrophoneCapture.listen() once the capture has been stopped"""
+
+
+class AudioRingBuffer:
+    """Fixed-size ring of equally sized audio chunks addressed by absolute index"""
+
+    def __init__(self, chunk_bytes, capacity):
+        self.chunk_bytes = chunk_bytes
+        self.capacity = capacity
+        self._data = bytearray(chunk_bytes * capacity)
+        self._written = 0  # absolute index of the next chunk to be written
+        self._cond = threading.Condition()
+        self.closed = False
+
+    @property
+    def end(self):
+        """Absolute index one past the newest chunk"""
+        return self._written
+
+    @property
+    def start(self):
+        """Absolute index of the oldest chunk still held"""
+        return max(0, self._written - self.capacity)
+
+    def write(self, chunk):
+        """Append one chunk, overwriting the oldest once the ring is full"""
+        if len(chunk) != self.chunk_bytes:
+            chunk = bytes(chunk[:self.chunk_bytes]).ljust(self.chunk_bytes, b"\0")
+        with self._cond:
+            offset = (self._written % self.capacity) * self.chunk_bytes
+            self._data[offset:offset + self.chunk_bytes] = chunk
+            self._written += 1
+            self._cond.notify_all()
+
+    def read(self, index, timeout=None):
+        """Return chunk ``index``, waiting for it to be written.
+
+        Returns ``None`` if the wait timed out or the buffer was closed.
+        Indexes that have already been overwritten are clamped to the oldest
+        chunk still held, so check ``start`` if that matters.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: index < self._written or self.closed, timeout):
+                return None
+            if index >= self._written:
+                return None
+            index = max(index, self._written - self.capacity)
+            offset = (index % self.capacity) * self.chunk_bytes
+            return bytes(self._data[offset:offset + self.chunk_bytes])
+
+    def close(self):
+        """Wake up every reader; further reads of unwritten chunks return None"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class MicrophoneCapture:
+    """One long-lived microphone stream feeding a ring buffer.
+
+    ``listen()`` behaves like ``Recognizer.listen()`` but reads from the
+    ring, continuing where the previous phrase ended so speech that starts
+    while the caller is busy (e.g. waiting on recognition) is not lost.
+    """
+
+    def __init__(self, recognizer, buffer_seconds=30, max_backlog_seconds=2.0,
+                 device_index=None, ambient_duration=0.5):
+        self.recognizer = recognizer
+        self.buffer_seconds = buffer_seconds
+        self.max_backlog_seconds = max_backlog_seconds
+        self.device_index = device_index
+        self.ambient_duration = ambient_duration
+        self.source = None
+        self.ring = None
+        self.error = None
+        self._cursor = 0
+        self._running = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def seconds_per_chunk(self):
+        return self.source.CHUNK / self.source.SAMPLE_RATE
+
+    def start(self):
+        """Open the microphone, calibrate once and start the capture thread"""
+        if self._running:
+            return
+        self.error = None
+        self.source = sr.Microphone(device_index=self.device_index)
+        self.source.__enter__()
+        try:
+            self.recognizer.adjust_for_ambient_noise(self.source, duration=self.ambient_duration)
+        except Exception:
+            self.source.__exit__(None, None, None)
+            raise
+        chunk_bytes = self.source.CHUNK * self.source.SAMPLE_WIDTH
+        capacity = int(math.ceil(self.buffer_seconds / self.seconds_per_chunk))
+        self.ring = AudioRingBuffer(chunk_bytes, capacity)
+        self._cursor = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and release the device"""
+        self._running = False
+        if self.ring:
+            self.ring.close()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _capture_loop(self):
+        try:
+            while self._running:
+                chunk = self.source.stream.read(self.source.CHUNK)
+                if not chunk:
+                    break
+                self.ring.write(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._running = False
+            self.ring.close()
+            try:
+                self.source.__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def discard(self):
+        """Skip everything captured so far (e.g. our own speech output)"""
+        if self.ring:
+            self._cursor = self.ring.end
+
+    def seek(self, index):
+        """Continue reading at absolute chunk ``index``"""
+        self._cursor = index
+
+    def mark(self):
+        """Absolute chunk index of 'now', usable with cut()"""
+        return self.ring.end if self.ring else 0
+
+    def cut(self, start, end=None):
+        """Return the audio between two chunk indexes as AudioData"""
+        end = self.ring.end if end is None else end
+        start = max(start, self.ring.start)
+        frames = [self.ring.read(i, timeout=0) for i in range(start, end)]
+        return sr.AudioData(b"".join(f for f in frames if f), self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH)
+
+    def next_chunk(self):
+        """Read the next raw chunk at the cursor, raising if the capture has ended"""
+        while True:
+            if self._cursor < self.ring.start:
+                self._cursor = self.ring.start
+            chunk = self.ring.read(self._cursor, timeout=0.5)
+            if chunk is not None:
+                self._cursor += 1
+                return chunk
+            if not self._running:
+                if self.error:
+                    raise self.error
+                raise CaptureStopped()
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        """Record a single phrase from the ring buffer into an AudioData instance.
+
+        Mirrors ``Recognizer.listen()``: waits for energy above the
+        recognizer's threshold (raising ``sr.WaitTimeoutError`` after
+        ``timeout`` seconds of audio) and records until ``pause_threshold``
+        seconds of quiet or ``phrase_time_limit``.
+        """
+        if not self._running and not (self.ring and self._cursor < self.ring.end):
+            if self.error:
+                raise self.error
+            raise CaptureStopped()
+
+        recognizer = self.recognizer
+        width = self.source.SAMPLE_WIDTH
+        seconds_per_buffer = self.seconds_per_chunk
+        pause_buffer_count = int(math.ceil(recognizer.pause_threshold / seconds_per_buffer))
+        phrase_buffer_count = int(math.ceil(recognizer.phrase_threshold / seconds_per_buffer))
+        non_speaking_buffer_count = int(math.ceil(recognizer.non_speaking_duration / seconds_per_buffer))
+
+        # Don't replay more than a short backlog of stale audio
+        backlog = int(math.ceil(self.max_backlog_seconds / seconds_per_buffer))
+        self._cursor = max(self._cursor, self.ring.end - backlog)
+
+        def adjust_threshold(energy):
+            if recognizer.dynamic_energy_threshold:
+                damping = recognizer.dynamic_energy_adjustment_damping ** seconds_per_buffer
+                target_energy = energy * recognizer.dynamic_energy_ratio
+                recognizer.energy_threshold = recognizer.energy_threshold * damping + target_energy * (1 - damping)
+
+        elapsed_time = 0
+        while True:
+            frames = []
+
+            # Wait for the phrase to start
+            while True:
+                elapsed_time += seconds_per_buffer
+                if timeout and elapsed_time > timeout:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+                buffer = self.next_chunk()
+                frames.append(buffer)
+                if len(frames) > non_speaking_buffer_count:
+                    frames.pop(0)
+
+                energy = audioop.rms(buffer, width)
+                if energy > recognizer.energy_threshold:
+                    break
+                adjust_threshold(energy)
+
+            # Record until the phrase ends
+            pause_count, phrase_count = 0, 0
+            phrase_start_time = elapsed_time
+            while True:
+                elapsed_time += seconds_per_buffer
+                if phrase_time_limit and elapsed_time - phrase_start_time > phrase_time_limit:
+                    break
+
+                buffer = self.next_chunk()
+                frames.append(buffer)
+                phrase_count += 1
+
+                energy = audioop.rms(buffer, width)
+                if energy > recognizer.energy_threshold:
+                    pause_count = 0
+                else:
+                    pause_count += 1
+                if pause_count > pause_buffer_count:
+                    break
+                adjust_threshold(energy)
+
+            phrase_count -= pause_count
+            if phrase_count >= phrase_buffer_count:
+                break
+
+        # Drop the trailing silence, keeping non_speaking_duration of it
+        for _ in range(pause_count - non_speaking_buffer_count):
+            frames.pop()
+        return sr.AudioData(b"".join(frames), self.source.SAMPLE_RATE, width)
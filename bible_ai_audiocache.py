@@ -0,0 +1,178 @@
+"""On-disk cache of synthesized speech.
+
+Fixed phrases like "Yes, how can I help?" used to be synthesized from
+scratch every time they were spoken. ``AudioCache`` stores synthesized PCM
+as WAV files named by a hash of the text, voice and backend, evicts the
+least recently used files once the cache grows past its size cap, and
+counts hits and misses. ``Speaker`` (bible_ai_tts) consults it before
+synthesizing and can warm it with the fixed phrases at startup.
+
+Show what is cached:
+
+    python bible_ai_audiocache.py [directory]
+"""
+
+import collections
+import hashlib
+import os
+import sys
+import threading
+import wave
+
+from bible_ai_tts import parse_wav
+
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache")
+
+# Evict least recently used audio beyond this many bytes
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Misses remembered per key, to tell repeated texts from one-offs
+RECENT_MISSES = 512
+
+
+def cache_key(text, backend, voice=None, rate=None):
+    """Content address of ``text`` as spoken by one backend/voice/rate"""
+    normalized = " ".join(text.split())
+    identity = "\0".join(str(part) for part in (backend, voice or "", rate or "", normalized))
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Synthesized PCM on disk, keyed by cache_key(), with LRU eviction.
+
+    Recency survives restarts through file modification times.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.size = 0
+        self._entries = collections.OrderedDict()  # key -> bytes on disk, oldest first
+        self._missed = collections.OrderedDict()  # key -> times missed
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".wav")
+
+    def _load(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # left over from an interrupted put()
+            elif name.endswith(".wav"):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.size += size
+        self._evict()
+
+    def key_for(self, text, backend):
+        """cache_key() of ``text`` for a TTSBackend"""
+        return cache_key(text, backend.name, backend.voice, backend.rate)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """Cached PCMAudio for ``key``, or None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                self._missed[key] = self._missed.pop(key, 0) + 1
+                while len(self._missed) > RECENT_MISSES:
+                    self._missed.popitem(last=False)
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = parse_wav(f.read())
+            os.utime(self._path(key))
+        except (OSError, ValueError) as e:
+            print(f"Audio cache entry unreadable, dropping it: {e}")
+            self._remove(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def times_missed(self, key):
+        """How often ``key`` was looked up and missed recently"""
+        with self._lock:
+            return self._missed.get(key, 0)
+
+    def put(self, key, audio):
+        """Store PCMAudio under ``key``, evicting old entries past the size cap"""
+        path = self._path(key)
+        temp = path + ".tmp"
+        try:
+            with wave.open(temp, "wb") as f:
+                f.setnchannels(audio.channels)
+                f.setsampwidth(audio.sample_width)
+                f.setframerate(audio.sample_rate)
+                f.writeframes(audio.data)
+            os.replace(temp, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Audio cache write failed: {e}")
+            return
+        with self._lock:
+            self.size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._missed.pop(key, None)
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.size -= size
+            self.evicted += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _remove(self, key):
+        with self._lock:
+            self.size -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evicted": self.evicted,
+        }
+
+    def summary(self):
+        """One-line description for the log"""
+        return (f"{len(self._entries)} clips, {self.size / 1024 / 1024:.1f} MB, "
+                f"{self.hits}/{self.hits + self.misses} hits ({self.hit_rate:.0%}), {self.evicted} evicted")
+
+
+if __name__ == "__main__":
+    cache = AudioCache(sys.argv[1] if len(sys.argv) > 1 else CACHE_DIRECTORY)
+    print(f"{cache.directory}: {cache.summary()} (cap {cache.max_bytes / 1024 / 1024:.0f} MB)")
+    sys.exit(0)
@@ -0,0 +1,194 @@
+"""Barge-in: hear the wake word while the assistant is speaking.
+
+The listener used to sleep for as long as ``app.is_speaking`` was true, so
+the only way to cut a long story short was the stop button.
+``BargeInMonitor`` keeps reading the microphone ring while speech plays,
+gates out the assistant's own voice and feeds what is left to the
+wake-word detector; a hit stops the speaker and hands the listener
+straight to command capture.
+
+Gating: the speaker reports the RMS of every PCM block it plays. A mic
+chunk only counts as the user when it is louder than the echo that
+playback level should produce (the mic/playback coupling is learned while
+speaking) by ECHO_MARGIN, and louder than the recognizer's ambient energy
+threshold by GATE_FACTOR. Gated chunks reach the detector as silence.
+"""
+
+import audioop
+import collections
+import threading
+import time
+
+# Blocks played this recently may still be echoing into the microphone
+ECHO_WINDOW = 0.3
+# Mic energy must exceed the expected echo by this factor (2 = 6 dB)
+ECHO_MARGIN = 2.0
+# ... and the ambient energy threshold by this factor
+GATE_FACTOR = 1.5
+# With no playback level to compare against (say speaking directly)
+DIRECT_GATE_FACTOR = 4.0
+# Echo coupling (mic RMS / playback RMS) assumed until it has been measured
+INITIAL_ECHO_GAIN = 1.0
+# Weight of each coupling measurement from a gated (echo) chunk; chunks
+# that pass the gate count a tenth as much, so talking over the speaker
+# doesn't teach the gate to ignore the user
+ECHO_ADAPT = 0.05
+# Interruptions kept for latency stats
+LATENCY_HISTORY = 100
+
+
+class PlaybackLevel:
+    """RMS of recently played PCM blocks; ``played`` is a TTSBackend.on_block hook"""
+
+    def __init__(self, window=ECHO_WINDOW):
+        self.window = window
+        self._blocks = collections.deque()  # (monotonic time, rms)
+        self._lock = threading.Lock()
+
+    def played(self, audio, data):
+        rms = audioop.rms(data, audio.sample_width) if data else 0
+        now = time.monotonic()
+        with self._lock:
+            self._blocks.append((now, rms))
+            while now - self._blocks[0][0] > self.window:
+                self._blocks.popleft()
+
+    def level(self):
+        """Loudest block played within the echo window; None if nothing was"""
+        now = time.monotonic()
+        with self._lock:
+            recent = [rms for at, rms in self._blocks if now - at <= self.window]
+        return max(recent) if recent else None
+
+
+class Interruption:
+    """One barge-in and how long it took to silence the speaker"""
+
+    def __init__(self, score, heard_at, detected_at, silent_at):
+        self.score = score
+        self.detect_seconds = detected_at - heard_at  # end of wake word -> detection
+        self.seconds = silent_at - heard_at  # end of wake word -> playback stopped
+
+
+class BargeInMonitor:
+    """Watches the microphone for the wake word while ``speaker`` is playing.
+
+    ``start(capture)`` when speech begins and ``stop()`` when it ends.
+    ``on_detect(detection)`` runs on the monitor thread and should stop the
+    speaker; afterwards ``take()`` returns the capture chunk index where the
+    user's command starts. Without a detector (no enrolled wake word)
+    the monitor does nothing.
+    """
+
+    def __init__(self, detector, speaker, on_detect):
+        self.detector = detector
+        self.speaker = speaker
+        self.on_detect = on_detect
+        self.playback = PlaybackLevel()
+        if speaker.backend is not None:
+            speaker.backend.on_block = self.playback.played
+        self.echo_gain = INITIAL_ECHO_GAIN
+        self.chunks = 0
+        self.gated = 0
+        self.interruptions = collections.deque(maxlen=LATENCY_HISTORY)
+        self._resume_at = None
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.detector is not None and self.speaker.backend is not None
+
+    def start(self, capture):
+        """Start watching from the newest captured chunk"""
+        if not self.enabled or not capture.running:
+            return
+        self.stop()
+        with self._lock:
+            self._resume_at = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(capture, capture.mark(), self._stop),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=0.5)
+        self._thread = None
+
+    def take(self):
+        """Chunk index to resume capture at after a barge-in, once; None if there was none"""
+        with self._lock:
+            resume_at, self._resume_at = self._resume_at, None
+        return resume_at
+
+    def _passes(self, rms, energy_threshold):
+        level = self.playback.level()
+        if level is None:
+            factor = DIRECT_GATE_FACTOR if self.speaker.backend.direct else GATE_FACTOR
+            return rms > energy_threshold * factor
+        passes = rms > energy_threshold * GATE_FACTOR and rms > level * self.echo_gain * ECHO_MARGIN
+        if level > 0:
+            weight = ECHO_ADAPT / 10 if passes else ECHO_ADAPT
+            self.echo_gain += (rms / level - self.echo_gain) * weight
+        return passes
+
+    def _run(self, capture, index, stop):
+        self.detector.reset()
+        source = capture.source
+        while not stop.is_set():
+            index = max(index, capture.ring.start)
+            chunk = capture.ring.read(index, timeout=0.1)
+            if chunk is None:
+                if capture.ring.closed:
+                    return
+                continue
+            index += 1
+            self.chunks += 1
+            if not self._passes(audioop.rms(chunk, source.SAMPLE_WIDTH), capture.recognizer.energy_threshold):
+                self.gated += 1
+                chunk = bytes(len(chunk))
+            detection = self.detector.feed(chunk, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            if detection and not stop.is_set():
+                # Chunks captured after this one were still waiting to be read
+                heard_at = time.perf_counter() - (capture.ring.end - index) * capture.seconds_per_chunk
+                self._interrupt(detection, index, heard_at)
+                return
+
+    def _interrupt(self, detection, index, heard_at):
+        detected_at = time.perf_counter()
+        with self._lock:
+            self._resume_at = index
+        try:
+            self.on_detect(detection)
+        except Exception as e:
+            print(f"Barge-in handler failed: {e}")
+        self.speaker.wait_idle(timeout=1.0)
+        self.interruptions.append(Interruption(detection.score, heard_at, detected_at, time.perf_counter()))
+
+    def stats(self):
+        latencies = sorted(i.seconds for i in self.interruptions)
+        return {
+            "interruptions": len(latencies),
+            "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+            "detect_ms": (sum(i.detect_seconds for i in self.interruptions) / len(latencies) * 1000
+                          if latencies else 0.0),
+            "gated": self.gated / self.chunks if self.chunks else 0.0,
+            "echo_gain": self.echo_gain,
+        }
+
+    def summary(self):
+        """One-line description for the log"""
+        if not self.enabled:
+            return "off (needs an enrolled wake word)"
+        s = self.stats()
+        if not s["interruptions"]:
+            return f"no interruptions, {s['gated']:.0%} of chunks gated as echo"
+        return (f"{s['interruptions']} interruptions, wake word to silence p50 {s['p50_ms']:.0f} ms, "
+                f"max {s['max_ms']:.0f} ms (detection {s['detect_ms']:.0f} ms), "
+                f"{s['gated']:.0%} of chunks gated as echo, echo gain {s['echo_gain']:.2f}")
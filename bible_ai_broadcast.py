@@ -0,0 +1,434 @@
+"""Thread-safe broadcasting to the web frontend's WebSocket clients.
+
+``broadcast_sync()`` used to build, run and close a fresh event loop for
+every status update and log line, sending on connections that belong to
+the WebSocket server's own loop. ``Broadcaster`` instead queues messages
+from any thread onto the server loop, returns immediately, and merges
+bursts: superseded ``status`` and ``button`` messages are dropped before
+they are ever sent.
+
+Each message is encoded once per encoding in use and the same frame is
+queued for every client. Every client has its own bounded queue and writer
+task, so a stalled browser tab only delays itself: when its queue fills,
+pending status and button updates are dropped first; log and response
+frames are only dropped after that, and are replaced by a
+``{"type": "gap", "dropped": n}`` marker so the client knows (response
+chunks can be resumed). A client that stays stuck is disconnected.
+Clients may negotiate MessagePack instead of JSON
+(``{"action": "hello", "encodings": ["msgpack", "json"]}``) when the
+optional ``msgpack`` package is installed.
+
+``ResponseStreams`` publishes AI responses chunk by chunk as
+``response_chunk`` messages with sequence numbers and keeps the last few
+responses, so a client that missed chunks or reconnected can ask for the
+rest with ``{"action": "resume", "id": ..., "seq": ...}``.
+
+Benchmark the encode cost:
+
+    python bible_ai_broadcast.py
+"""
+
+import asyncio
+import collections
+import json
+import sys
+import threading
+import time
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Message types where only the most recent one matters
+COALESCED_TYPES = ("status", "button")
+
+# Sent in place of log/response frames a slow client had to lose
+GAP = "gap"
+
+# Loop iterations a burst waits for a client's writer that isn't sending anything
+DRAIN_PATIENCE = 4
+
+# How long to wait for more messages before sending a burst
+FLUSH_DELAY = 0.02
+
+# Frames a client may have waiting before we start dropping
+MAX_QUEUE = 256
+
+# Disconnect a client whose send blocks or whose queue stays full this long
+STUCK_SECONDS = 10.0
+
+# Finished responses kept around for clients that resume
+KEEP_RESPONSES = 5
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ("msgpack", "json") if MSGPACK_AVAILABLE else ("json",)
+
+
+def encode(message, encoding="json"):
+    """Encode a message as a WebSocket frame: str for JSON, bytes for MessagePack"""
+    if encoding == "msgpack":
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message)
+
+
+def negotiate(offered):
+    """Pick the first encoding we support from the client's list"""
+    for encoding in offered or ():
+        if encoding in SUPPORTED_ENCODINGS:
+            return encoding
+    return "json"
+
+
+class ClientQueue:
+    """Bounded outbound queue and writer task for one WebSocket client"""
+
+    def __init__(self, client, encoding="json", maxsize=MAX_QUEUE, stuck_seconds=STUCK_SECONDS):
+        self.client = client
+        self.encoding = encoding
+        self.maxsize = maxsize
+        self.stuck_seconds = stuck_seconds
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.full_since = None
+        self.closed = False
+        self._queue = collections.deque()  # (message type, frame, coalescible)
+        self._ready = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    @property
+    def address(self):
+        return getattr(self.client, "remote_address", None)
+
+    def put(self, kind, frame, coalesce=False):
+        """Queue one encoded frame; only call on the server loop"""
+        if self.closed:
+            return
+        if coalesce:
+            # Only the latest status/button matters
+            for i, (queued_kind, _, queued_coalesce) in enumerate(self._queue):
+                if queued_coalesce and queued_kind == kind:
+                    del self._queue[i]
+                    self.coalesced += 1
+                    break
+
+        if len(self._queue) >= self.maxsize:
+            if self.full_since is None:
+                self.full_since = time.monotonic()
+            elif time.monotonic() - self.full_since > self.stuck_seconds:
+                self._disconnect("queue full for too long")
+                return
+            self._make_room()
+        else:
+            self.full_since = None
+
+        self._queue.append((kind, frame, coalesce))
+        self._ready.set()
+
+    def _make_room(self):
+        """Drop a queued status/button update, or else the oldest frame, leaving a gap marker"""
+        for i, (_, _, coalesce) in enumerate(self._queue):
+            if coalesce:
+                del self._queue[i]
+                self.dropped += 1
+                return
+        # Every gap marker stands in for the frames dropped at its place
+        if self._queue[0][0] == GAP:
+            if len(self._queue) < 2:
+                return
+            del self._queue[1]
+            _, dropped, _ = self._queue.popleft()
+        else:
+            self._queue.popleft()
+            dropped = 0
+        self._queue.appendleft((GAP, dropped + 1, False))
+        self.dropped += 1
+
+    async def _run(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self._queue:
+                    kind, frame, _ = self._queue.popleft()
+                    if kind == GAP:
+                        frame = encode({"type": GAP, "dropped": frame}, self.encoding)
+                    try:
+                        await asyncio.wait_for(self.client.send(frame), self.stuck_seconds)
+                    except asyncio.TimeoutError:
+                        self._disconnect(f"send blocked for {self.stuck_seconds:g}s")
+                        return
+                    self.sent += 1
+                if len(self._queue) < self.maxsize:
+                    self.full_since = None
+                self._ready.clear()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"WebSocket send failed for {self.address}: {e!r}")
+            self.closed = True
+
+    def _disconnect(self, reason):
+        print(f"Disconnecting stuck WebSocket client {self.address}: {reason}")
+        self.closed = True
+        self._queue.clear()
+        asyncio.get_running_loop().create_task(self._close())
+
+    async def _close(self):
+        try:
+            await asyncio.wait_for(self.client.close(), 5)
+        except Exception:
+            pass
+
+    def cancel(self):
+        self.closed = True
+        self._task.cancel()
+
+    def stats(self):
+        return {
+            "address": str(self.address),
+            "encoding": self.encoding,
+            "depth": self.depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+class Broadcaster:
+    """Queues messages from any thread and sends them on the server's loop"""
+
+    def __init__(self, coalesced_types=COALESCED_TYPES, flush_delay=FLUSH_DELAY,
+                 max_queue=MAX_QUEUE, stuck_seconds=STUCK_SECONDS):
+        self.clients = {}  # client -> ClientQueue
+        self.coalesced_types = set(coalesced_types)
+        self.flush_delay = flush_delay
+        self.max_queue = max_queue
+        self.stuck_seconds = stuck_seconds
+        self.loop = None
+        self.coalesced = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        """Attach to the running loop; call from a coroutine on the server loop"""
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self.loop.create_task(self._run())
+        if self._pending:
+            self._wakeup.set()
+
+    def add(self, client, encoding="json"):
+        """Register a client; call on the server loop"""
+        self.clients[client] = ClientQueue(client, encoding, self.max_queue, self.stuck_seconds)
+
+    def remove(self, client):
+        queue = self.clients.pop(client, None)
+        if queue:
+            queue.cancel()
+
+    def set_encoding(self, client, encoding):
+        """Switch a connected client to another encoding after negotiation"""
+        if client in self.clients:
+            self.clients[client].encoding = encoding
+
+    @property
+    def sent(self):
+        return sum(queue.sent for queue in self.clients.values())
+
+    @property
+    def dropped(self):
+        return sum(queue.dropped for queue in self.clients.values())
+
+    def send(self, client, message):
+        """Queue ``message`` for one client only; call on the server loop"""
+        queue = self.clients.get(client)
+        if queue:
+            kind = message.get("type")
+            queue.put(kind, encode(message, queue.encoding), coalesce=kind in self.coalesced_types)
+
+    def client_stats(self):
+        """Queue depth and drop counts for every connected client"""
+        return [queue.stats() for queue in list(self.clients.values())]
+
+    def publish(self, message):
+        """Queue ``message`` for every client; safe to call from any thread"""
+        with self._lock:
+            kind = message.get("type")
+            if kind in self.coalesced_types:
+                for i, queued in enumerate(self._pending):
+                    if queued.get("type") == kind:
+                        del self._pending[i]
+                        self.coalesced += 1
+                        break
+            self._pending.append(message)
+            first = len(self._pending) == 1
+
+        if first and self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed during shutdown
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Give a burst a moment to arrive so it goes out as one batch
+            await asyncio.sleep(self.flush_delay)
+            self._wakeup.clear()
+            messages = self._take_pending()
+            if messages and self.clients:
+                await self._dispatch(messages)
+
+    async def _dispatch(self, messages):
+        # Encode each message once per encoding in use, not once per client
+        queues = list(self.clients.values())
+        frames = {}
+        for queue in queues:
+            if queue.encoding not in frames:
+                frames[queue.encoding] = [encode(message, queue.encoding) for message in messages]
+        # Hand a long burst over in slices, letting the writers drain in between,
+        # so only clients that really fall behind hit their queue limit
+        step = max(1, self.max_queue // 2)
+        for start in range(0, len(messages), step):
+            if start:
+                await self._drain(queues, self.max_queue - step)
+            for queue in queues:
+                burst = frames[queue.encoding][start:start + step]
+                for message, frame in zip(messages[start:start + step], burst):
+                    kind = message.get("type")
+                    queue.put(kind, frame, coalesce=kind in self.coalesced_types)
+
+    async def _drain(self, queues, limit):
+        """Yield to the writers while queues deeper than ``limit`` are still being sent"""
+        idle = 0
+        while idle < DRAIN_PATIENCE:
+            busy = [queue for queue in queues if not queue.closed and queue.depth > limit]
+            if not busy:
+                return
+            sent = sum(queue.sent for queue in busy)
+            await asyncio.sleep(0)
+            idle = 0 if sum(queue.sent for queue in busy) > sent else idle + 1
+
+
+class ResponseStreams:
+    """Numbered response chunks for the web UI, replayable after a reconnect.
+
+    ``publish`` is usually ``Broadcaster.publish``. Every chunk of a
+    response goes out as ``{"type": "response_chunk", "id", "seq", "text"}``
+    with ``seq`` counting from 1, followed by ``{"type": "response_end",
+    "id", "seq"}`` carrying the number of chunks.
+    """
+
+    def __init__(self, publish, keep=KEEP_RESPONSES):
+        self.publish = publish
+        self.keep = keep
+        self._responses = collections.OrderedDict()  # id -> {"chunks": [...], "done": bool}
+        self._next_id = 1
+        self._current = None
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Start a new response and return its id"""
+        with self._lock:
+            response_id = self._next_id
+            self._next_id += 1
+            self._responses[response_id] = {"chunks": [], "done": False}
+            while len(self._responses) > self.keep:
+                self._responses.popitem(last=False)
+            self._current = response_id
+        self.publish({"type": "response_start", "id": response_id})
+        return response_id
+
+    def chunk(self, text):
+        """Publish the next chunk of the current response; safe from any thread"""
+        with self._lock:
+            response = self._responses.get(self._current)
+            if response is None or response["done"]:
+                return
+            response["chunks"].append(text)
+            seq = len(response["chunks"])
+            response_id = self._current
+        self.publish({"type": "response_chunk", "id": response_id, "seq": seq, "text": text})
+
+    def end(self):
+        """Mark the current response as finished"""
+        with self._lock:
+            response = self._responses.get(self._current)
+            if response is None or response["done"]:
+                return
+            response["done"] = True
+            response_id, seq = self._current, len(response["chunks"])
+        self.publish({"type": "response_end", "id": response_id, "seq": seq})
+
+    def replay(self, response_id=None, after_seq=0):
+        """Messages a client needs to catch up, given the last seq it has.
+
+        With no ``response_id`` the current response is replayed from
+        ``after_seq``. Unknown (expired) ids and malformed values replay nothing.
+        """
+        try:
+            response_id = None if response_id is None else int(response_id)
+            after_seq = max(0, int(after_seq or 0))
+        except (TypeError, ValueError):
+            return []
+        with self._lock:
+            if response_id is None:
+                response_id = self._current
+            response = self._responses.get(response_id)
+            if response is None:
+                return []
+            chunks = list(response["chunks"])
+            done = response["done"]
+
+        messages = []
+        if after_seq == 0:
+            messages.append({"type": "response_start", "id": response_id})
+        for seq, text in enumerate(chunks[after_seq:], start=after_seq + 1):
+            messages.append({"type": "response_chunk", "id": response_id, "seq": seq, "text": text})
+        if done:
+            messages.append({"type": "response_end", "id": response_id, "seq": len(chunks)})
+        return messages
+
+
+# --- Benchmark ---
+
+def benchmark(client_counts=(1, 10, 100, 1000), repeat=200):
+    """Encode cost of one log/status burst for different numbers of clients"""
+    messages = [
+        {"type": "status", "message": "Listening for 'Hey Bible'...", "state": "listening"},
+        {"type": "log", "message": "AI Response: " + "And God said, Let there be light: and there was light. " * 20},
+        {"type": "button", "text": "Stop", "color": "red"},
+    ]
+
+    def timed(fn):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) / repeat
+
+    encodings = SUPPORTED_ENCODINGS
+    sizes = {e: sum(len(encode(m, e)) for m in messages) for e in encodings}
+    print("Burst of 3 messages; " + ", ".join(f"{e}: {sizes[e]} bytes" for e in encodings))
+    print(f"{'clients':>8}  {'per client (old)':>17}  " + "  ".join(f"{'once ' + e:>14}" for e in encodings))
+    for count in client_counts:
+        per_client = timed(lambda: [[json.dumps(m) for m in messages] for _ in range(count)])
+        once = [timed(lambda e=e: [encode(m, e) for m in messages]) for e in encodings]
+        print(f"{count:>8}  {per_client * 1e6:>14.1f} us  " + "  ".join(f"{t * 1e6:>11.1f} us" for t in once))
+
+
+if __name__ == "__main__":
+    benchmark()
+    sys.exit(0)
@@ -0,0 +1,178 @@
+"""Multi-turn conversations with Gemini under a token budget.
+
+Every command used to go through a stateless ``model.generate_content()``,
+so a follow-up like "what happened to him next?" had no context.
+``ChatSession`` keeps the conversation and sends each prompt through the
+model's chat interface with that history. Once the history is estimated to
+exceed ``token_budget`` tokens, the oldest turns are folded into a running
+summary on a background thread, so request size stays bounded however long
+the conversation runs.
+
+Turns are kept here rather than in the SDK's own ``ChatSession``: a
+streamed reply that is cut off mid-way (stop button, barge-in) would leave
+the SDK session unusable.
+"""
+
+import math
+import threading
+import time
+
+# Estimated tokens of summary + history allowed before older turns are summarized
+TOKEN_BUDGET = 4000
+# Most recent turns always kept word for word
+KEEP_TURNS = 2
+# Start a fresh conversation after this long without a turn
+IDLE_RESET_SECONDS = 600
+# Rough size of a token for estimates; Gemini averages about 4 characters
+CHARS_PER_TOKEN = 4
+# Length the running summary is asked to stay under
+SUMMARY_WORDS = 150
+
+SUMMARY_PROMPT = """Summarize the conversation below between a listener and the Bible AI storyteller in at most {words} words of plain prose. Keep the people, places, stories and questions that later questions might refer back to. Reply with the summary only.
+
+{summary}{transcript}"""
+
+
+def estimate_tokens(text):
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def usage_counts(response):
+    """(prompt, response, cached) token counts from a response's usage metadata, or Nones"""
+    try:
+        usage = response.usage_metadata
+    except Exception:
+        usage = None  # no response, or a stream that was never read
+    if usage is None:
+        return None, None, None
+    return (getattr(usage, "prompt_token_count", None) or None,
+            getattr(usage, "candidates_token_count", None) or None,
+            getattr(usage, "cached_content_token_count", None) or None)
+
+
+class Turn:
+    """One prompt and the reply it got"""
+
+    def __init__(self, prompt, reply):
+        self.prompt = prompt
+        self.reply = reply
+        self.tokens = estimate_tokens(prompt) + estimate_tokens(reply)
+
+
+class ChatSession:
+    """Conversation history for one listener, sent along with every prompt.
+
+    ``ask(prompt, stream)`` returns the model's response; once its text has
+    been read, pass it to ``record(prompt, text, response)``.
+    """
+
+    def __init__(self, model, token_budget=TOKEN_BUDGET, keep_turns=KEEP_TURNS,
+                 idle_reset_seconds=IDLE_RESET_SECONDS):
+        self.model = model
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.idle_reset_seconds = idle_reset_seconds
+        self.summary = ""
+        self.turns = []
+        self.requests = 0
+        self.summarized_turns = 0
+        self.last_prompt_tokens = None
+        self.last_response_tokens = None
+        self.last_cached_tokens = None
+        self._last_turn_at = None
+        self._lock = threading.Lock()  # held while the history is being summarized
+
+    @property
+    def history_tokens(self):
+        """Estimated tokens of summary and history sent with the next prompt"""
+        return estimate_tokens(self.summary) + sum(turn.tokens for turn in self.turns)
+
+    @property
+    def fresh(self):
+        """Whether the next prompt starts a new conversation"""
+        idle = self._last_turn_at and time.monotonic() - self._last_turn_at > self.idle_reset_seconds
+        return bool(idle) or (not self.turns and not self.summary)
+
+    def reset(self):
+        """Forget the conversation"""
+        with self._lock:
+            self.summary = ""
+            self.turns = []
+            self._last_turn_at = None
+
+    def history(self):
+        """Summary and turns as chat contents"""
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"Summary of our conversation so far: {self.summary}"]})
+            contents.append({"role": "model", "parts": ["Understood."]})
+        for turn in self.turns:
+            contents.append({"role": "user", "parts": [turn.prompt]})
+            contents.append({"role": "model", "parts": [turn.reply]})
+        return contents
+
+    def ask(self, prompt, stream=False):
+        """Send ``prompt`` with the conversation so far"""
+        if self._last_turn_at and time.monotonic() - self._last_turn_at > self.idle_reset_seconds:
+            self.reset()
+        with self._lock:  # wait for a summary still being written
+            chat = self.model.start_chat(history=self.history())
+        self.requests += 1
+        return chat.send_message(prompt, stream=stream)
+
+    def record(self, prompt, text, response=None):
+        """Add a finished (or interrupted) turn; summarizes old turns in the background when over budget"""
+        self.last_prompt_tokens, self.last_response_tokens, self.last_cached_tokens = usage_counts(response)
+        if not text:
+            return
+        with self._lock:
+            self.turns.append(Turn(prompt, text))
+            self._last_turn_at = time.monotonic()
+            over_budget = self.history_tokens > self.token_budget and len(self.turns) > 1
+        if over_budget:
+            threading.Thread(target=self._compact, daemon=True).start()
+
+    def _compact(self):
+        with self._lock:
+            keep = min(self.keep_turns, len(self.turns) - 1)
+            # Keep dropping to fewer verbatim turns while the newest ones alone are over budget
+            while keep > 0 and sum(turn.tokens for turn in self.turns[-keep:]) > self.token_budget // 2:
+                keep -= 1
+            old = self.turns[:len(self.turns) - keep]
+            if not old:
+                return
+            transcript = "".join(f"Listener: {turn.prompt}\nBible AI: {turn.reply}\n\n" for turn in old)
+            earlier = f"Summary of the conversation before this:\n{self.summary}\n\n" if self.summary else ""
+            try:
+                response = self.model.generate_content(
+                    SUMMARY_PROMPT.format(words=SUMMARY_WORDS, summary=earlier, transcript=transcript))
+                self.summary = response.text.strip()
+            except Exception as e:
+                print(f"Conversation summary failed, dropping the oldest turns instead: {e}")
+            self.turns = self.turns[len(old):]
+            self.summarized_turns += len(old)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "turns": len(self.turns),
+            "summarized_turns": self.summarized_turns,
+            "history_tokens": self.history_tokens,
+            "summary_tokens": estimate_tokens(self.summary),
+            "prompt_tokens": self.last_prompt_tokens,
+            "response_tokens": self.last_response_tokens,
+            "cached_tokens": self.last_cached_tokens,
+        }
+
+    def report(self):
+        """One line on the last request for the log"""
+        s = self.stats()
+        parts = [f"{s['turns']} turns in history (~{s['history_tokens']} tokens"
+                 + (f", summary of {s['summarized_turns']} earlier ~{s['summary_tokens']})" if self.summary else ")")]
+        if s["prompt_tokens"] is not None:
+            parts.append(f"prompt {s['prompt_tokens']} tokens")
+        if s["cached_tokens"] is not None:
+            parts.append(f"{s['cached_tokens']} from cache")
+        if s["response_tokens"] is not None:
+            parts.append(f"response {s['response_tokens']} tokens")
+        return ", ".join(parts)
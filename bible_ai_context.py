@@ -0,0 +1,275 @@
+"""Server-side caching of the storyteller persona.
+
+The long ``system_instruction`` given to ``genai.GenerativeModel`` was
+sent and processed again with every request. ``CachedPersonaModel`` is a
+drop-in for the model object: it uploads the persona once as cached content,
+builds the model from that cache, and extends the cache shortly before it
+expires for as long as the model is being used. Uploads and refreshes run
+on a background thread, so requests never wait for them: until the cache
+is ready, and whenever the service won't cache it (older SDK, errors), the
+persona is sent inline as before. A persona estimated to be below the
+model's minimum cacheable size is never uploaded.
+
+Backends: ``GeminiContextCache`` uses ``google.generativeai.caching``;
+``LocalContextCache`` keeps the same lifecycle in memory with an injectable
+clock, so uploads, refreshes and expiry can be exercised offline.
+"""
+
+import datetime
+import hashlib
+import threading
+import time
+
+import google.generativeai as genai
+
+from bible_ai_chat import estimate_tokens
+
+try:
+    from google.generativeai import caching
+    CACHING_AVAILABLE = True
+except ImportError:
+    CACHING_AVAILABLE = False
+
+# How long uploaded content lives without being refreshed
+CACHE_TTL_SECONDS = 3600
+# Extend the cache when it is used this close to expiring
+REFRESH_MARGIN_SECONDS = 120
+# After the service refused to cache, send the persona inline this long before trying again
+RETRY_SECONDS = 1800
+# Gemini 2.5 Flash won't cache content smaller than this (other models need more)
+MIN_CACHE_TOKENS = 1024
+
+
+class CachedContext:
+    """A cached persona and when it expires (backend clock)"""
+
+    def __init__(self, name, expires_at, content=None):
+        self.name = name
+        self.expires_at = expires_at
+        self.content = content  # backend object, e.g. caching.CachedContent
+
+
+class GeminiContextCache:
+    """Cached content stored by the Gemini API"""
+
+    name = "gemini"
+
+    def __init__(self, clock=time.monotonic):
+        if not CACHING_AVAILABLE:
+            raise RuntimeError("google.generativeai has no caching support; upgrade google-generativeai")
+        self.clock = clock
+
+    def create(self, model_name, system_instruction, ttl):
+        content = caching.CachedContent.create(
+            model=model_name, system_instruction=system_instruction,
+            display_name="bible-ai-persona", ttl=datetime.timedelta(seconds=ttl))
+        return CachedContext(content.name, self.clock() + ttl, content)
+
+    def extend(self, context, ttl):
+        context.content.update(ttl=datetime.timedelta(seconds=ttl))
+        context.expires_at = self.clock() + ttl
+
+    def model(self, context):
+        return genai.GenerativeModel.from_cached_content(cached_content=context.content)
+
+    def delete(self, context):
+        context.content.delete()
+
+
+class LocalContextCache:
+    """Offline stand-in for GeminiContextCache.
+
+    Keeps cached personas in memory with the same expiry rules and builds
+    plain models that carry the persona inline.
+    """
+
+    name = "local"
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.entries = {}  # name -> (model name, system instruction, expires_at)
+
+    def _alive(self, context):
+        entry = self.entries.get(context.name)
+        if entry is None or entry[2] <= self.clock():
+            self.entries.pop(context.name, None)
+            raise LookupError(f"Cached content {context.name} has expired")
+        return entry
+
+    def create(self, model_name, system_instruction, ttl):
+        digest = hashlib.sha256(f"{model_name}\0{system_instruction}".encode("utf-8")).hexdigest()
+        context = CachedContext(f"cachedContents/local-{digest[:16]}", self.clock() + ttl)
+        self.entries[context.name] = (model_name, system_instruction, context.expires_at)
+        return context
+
+    def extend(self, context, ttl):
+        model_name, system_instruction, _ = self._alive(context)
+        context.expires_at = self.clock() + ttl
+        self.entries[context.name] = (model_name, system_instruction, context.expires_at)
+
+    def model(self, context):
+        model_name, system_instruction, _ = self._alive(context)
+        return genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+
+    def delete(self, context):
+        self.entries.pop(context.name, None)
+
+
+CONTEXT_CACHES = {
+    "gemini": GeminiContextCache,
+    "local": LocalContextCache,
+}
+
+
+class CachedPersonaModel:
+    """Stands in for ``genai.GenerativeModel(model_name, system_instruction=...)``.
+
+    ``cache`` is a context cache backend, or None to always send the
+    persona inline.
+    """
+
+    def __init__(self, model_name, system_instruction, cache=None, ttl=CACHE_TTL_SECONDS,
+                 refresh_margin=REFRESH_MARGIN_SECONDS, retry_seconds=RETRY_SECONDS,
+                 min_tokens=MIN_CACHE_TOKENS, background=True):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.cache = cache
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_seconds = retry_seconds
+        self.min_tokens = min_tokens
+        self.background = background  # False runs uploads and refreshes in current(), for tests
+        self.uploads = 0
+        self.refreshes = 0
+        self.failures = 0
+        self._context = None
+        self._model = None
+        self._inline = None
+        self._retry_at = None
+        self._busy = False  # an upload or refresh is running
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Short hash of model and persona, for keying anything derived from their output"""
+        digest = hashlib.sha256(f"{self.model_name}\0{self.system_instruction}".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    @property
+    def cached(self):
+        """Whether requests currently use the cached persona"""
+        return self._context is not None
+
+    @property
+    def too_small(self):
+        """Whether the persona is below the size the service will cache"""
+        return estimate_tokens(self.system_instruction) < self.min_tokens
+
+    def _inline_model(self):
+        if self._inline is None:
+            self._inline = genai.GenerativeModel(model_name=self.model_name,
+                                                 system_instruction=self.system_instruction)
+        return self._inline
+
+    def current(self):
+        """The model to send the next request to; starts an upload or refresh when one is due"""
+        if self.cache is None or self.too_small:
+            return self._inline_model()
+        with self._lock:
+            now = self.cache.clock()
+            if self._context is not None and now >= self._context.expires_at:
+                self._context = self._model = None  # expired; upload it again
+            if not self._busy and not self._closed:
+                if self._context is None and (self._retry_at is None or now >= self._retry_at):
+                    self._start(self._upload)
+                elif self._context is not None and now >= self._context.expires_at - self.refresh_margin:
+                    self._start(self._refresh, self._context)
+            model = self._model
+        return model if model is not None else self._inline_model()
+
+    def _start(self, work, *args):
+        self._busy = True
+        if self.background:
+            threading.Thread(target=work, args=args, daemon=True).start()
+        else:
+            self._lock.release()
+            try:
+                work(*args)
+            finally:
+                self._lock.acquire()
+
+    def _upload(self):
+        try:
+            context = self.cache.create(self.model_name, self.system_instruction, self.ttl)
+            model = self.cache.model(context)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                self._retry_at = self.cache.clock() + self.retry_seconds
+                self._busy = False
+            print(f"Persona caching unavailable, sending it with every request: {e}")
+            return
+        with self._lock:
+            self._busy = False
+            if not self._closed:
+                self._context, self._model = context, model
+                self.uploads += 1
+                self._retry_at = None
+                return
+        self._delete(context)  # closed while uploading
+
+    def _refresh(self, context):
+        try:
+            self.cache.extend(context, self.ttl)
+            refreshed = True
+        except Exception:
+            refreshed = False
+        with self._lock:
+            self._busy = False
+            if refreshed:
+                self.refreshes += 1
+            elif self._context is context:
+                self._context = self._model = None  # gone; the next request uploads it again
+
+    def _delete(self, context):
+        try:
+            self.cache.delete(context)
+        except Exception as e:
+            print(f"Could not delete cached persona: {e}")
+
+    def generate_content(self, *args, **kwargs):
+        return self.current().generate_content(*args, **kwargs)
+
+    def start_chat(self, *args, **kwargs):
+        return self.current().start_chat(*args, **kwargs)
+
+    def close(self):
+        """Delete the cached persona instead of waiting for it to expire"""
+        with self._lock:
+            self._closed = True
+            context, self._context, self._model = self._context, None, None
+        if context is not None:
+            self._delete(context)
+
+    def summary(self):
+        """One-line description for the log"""
+        if self.cache is None:
+            return "off"
+        if self.too_small:
+            return (f"off, persona too small to cache (~{estimate_tokens(self.system_instruction)} tokens, "
+                    f"{self.min_tokens} needed)")
+        state = f"cached as {self._context.name}" if self._context else "sent inline"
+        return (f"{self.cache.name}: {state}, {self.uploads} uploads, {self.refreshes} refreshes, "
+                f"{self.failures} failures")
+
+
+def create_context_cache(name):
+    """Context cache backend by name ("gemini", "local"); None for anything else or if unavailable"""
+    if name not in CONTEXT_CACHES:
+        return None
+    try:
+        return CONTEXT_CACHES[name]()
+    except Exception as e:
+        print(f"Context cache '{name}' unavailable: {e}")
+        return None
@@ -0,0 +1,413 @@
+"""Local Bible text for reading verses without a network call.
+
+Requests like "read John 3:16" or "what does Psalm 23 say" used to go to
+Gemini, which is slow and sometimes paraphrases. ``BibleCorpus`` answers
+them from a public-domain translation (KJV, WEB, ...) stored in one compact
+file that is memory-mapped at startup:
+
+    header   magic, section offsets and the book names (JSON)
+    refs     int32 per verse, book * 1000000 + chapter * 1000 + verse, sorted
+    offsets  uint32 per verse + 1, into the text section
+    text     UTF-8 verse text, back to back
+    words    sorted vocabulary, newline-separated, with uint32 offsets
+             into the postings section
+    postings uint32 verse numbers per word, ascending
+
+References are found with a binary search over ``refs``, and keyword
+searches intersect posting lists, so neither reads more than it needs
+from disk.
+
+No Bible text ships with the project. Build the corpus from a plain-text
+translation with one verse per line, either "Book C:V text" (e.g.
+"John 3:16 For God so loved...") or tab-separated "Book<TAB>C<TAB>V<TAB>text":
+
+    python bible_ai_corpus.py build kjv.txt
+    python bible_ai_corpus.py lookup "read John 3:16"
+    python bible_ai_corpus.py bench
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+import numpy as np
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bible_corpus.bin")
+
+MAGIC = b"BIBLEAI1"
+# magic, header length, then (offset, length) of refs, offsets, text, words, word offsets, postings
+HEADER = struct.Struct("<8sI12Q")
+
+# Verses read out for one request; longer passages are cut short
+MAX_VERSES = 50
+# Verses read out for a keyword search
+SEARCH_RESULTS = 3
+
+# Canonical book names, each followed by other names it goes by
+BOOKS = [
+    ("Genesis", "gen"), ("Exodus", "exod", "ex"), ("Leviticus", "lev"), ("Numbers", "num"),
+    ("Deuteronomy", "deut"), ("Joshua", "josh"), ("Judges", "judg"), ("Ruth",),
+    ("1 Samuel", "1 sam"), ("2 Samuel", "2 sam"), ("1 Kings", "1 kgs"), ("2 Kings", "2 kgs"),
+    ("1 Chronicles", "1 chron"), ("2 Chronicles", "2 chron"), ("Ezra",), ("Nehemiah", "neh"),
+    ("Esther", "esth"), ("Job",), ("Psalms", "psalm", "ps", "psa"), ("Proverbs", "prov"),
+    ("Ecclesiastes", "eccles", "eccl", "qoheleth"), ("Song of Solomon", "song of songs", "song", "canticles"),
+    ("Isaiah", "isa"), ("Jeremiah", "jer"), ("Lamentations", "lam"), ("Ezekiel", "ezek"),
+    ("Daniel", "dan"), ("Hosea", "hos"), ("Joel",), ("Amos",), ("Obadiah", "obad"), ("Jonah",),
+    ("Micah", "mic"), ("Nahum", "nah"), ("Habakkuk", "hab"), ("Zephaniah", "zeph"), ("Haggai", "hag"),
+    ("Zechariah", "zech"), ("Malachi", "mal"),
+    ("Matthew", "matt"), ("Mark",), ("Luke",), ("John",), ("Acts", "acts of the apostles"),
+    ("Romans", "rom"), ("1 Corinthians", "1 cor"), ("2 Corinthians", "2 cor"), ("Galatians", "gal"),
+    ("Ephesians", "eph"), ("Philippians", "phil"), ("Colossians", "col"),
+    ("1 Thessalonians", "1 thess"), ("2 Thessalonians", "2 thess"), ("1 Timothy", "1 tim"),
+    ("2 Timothy", "2 tim"), ("Titus",), ("Philemon", "philem"), ("Hebrews", "heb"), ("James", "jas"),
+    ("1 Peter", "1 pet"), ("2 Peter", "2 pet"), ("1 John",), ("2 John",), ("3 John",), ("Jude",),
+    ("Revelation", "revelations", "rev", "revelation of john"),
+]
+
+# Spoken forms of the numbers in book names and references
+ORDINALS = {"first": "1", "second": "2", "third": "3", "1st": "1", "2nd": "2", "3rd": "3",
+            "i": "1", "ii": "2", "iii": "3"}
+NUMBER_WORDS = {word: value for value, word in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen "
+    "sixteen seventeen eighteen nineteen".split())}
+NUMBER_WORDS.update({word: value * 10 for value, word in enumerate(
+    "twenty thirty forty fifty sixty seventy eighty ninety".split(), start=2)})
+
+# Phrasings that ask for a keyword search rather than a reference
+SEARCH_PATTERN = re.compile(
+    r"^(?:please )?(?:find|search(?: for)?|look up|which|what|where)\s+(?:is |are )?"
+    r"(?:the |a |some |bible )?(?:verses?|scriptures?|passages?)\s+"
+    r"(?:about|with|that (?:says?|mentions?)|says?|saying|mentions?|mentioning|containing|on)\s+(.+)$")
+# Words not worth requiring in a search
+SEARCH_STOP_WORDS = frozenset("a an and the of to in on is are be that this it for with word words".split())
+
+
+def _key(name):
+    return " ".join(name.lower().replace(".", " ").split())
+
+
+BOOK_INDEX = {}
+for _number, _names in enumerate(BOOKS, start=1):
+    for _name in _names:
+        BOOK_INDEX[_key(_name)] = _number
+        if _name[0].isdigit():
+            BOOK_INDEX[_key(_name.replace(" ", "", 1))] = _number  # "1john"
+
+
+def book_number(name):
+    """1-based number of the book called ``name`` (any alias), or None"""
+    key = _key(name)
+    parts = key.split(" ", 1)
+    if len(parts) == 2 and parts[0] in ORDINALS:
+        key = f"{ORDINALS[parts[0]]} {parts[1]}"
+    return BOOK_INDEX.get(key)
+
+
+def words_of(text):
+    """Lowercase words for the inverted index"""
+    return re.findall(r"[a-z0-9]+", text.lower().replace("'", "").replace("’", ""))
+
+
+def _spoken_numbers(text):
+    """Replace "twenty three" with "23" and ordinals before book names with digits"""
+    tokens = text.split()
+    out = []
+    hundreds = False  # the last number so far ended in "hundred"
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ORDINALS and token != "i" and i + 1 < len(tokens):
+            out.append(ORDINALS[token])
+            hundreds = False
+        elif token in NUMBER_WORDS:
+            value = NUMBER_WORDS[token]
+            if value >= 20 and i + 1 < len(tokens) and 0 < NUMBER_WORDS.get(tokens[i + 1], 0) < 10:
+                value += NUMBER_WORDS[tokens[i + 1]]
+                i += 1
+            if hundreds:
+                out[-1] = str(int(out[-1]) + value)
+            else:
+                out.append(str(value))
+            hundreds = False
+        elif token == "hundred" and out and out[-1].isdigit():
+            out[-1] = str(int(out[-1]) * 100)
+            hundreds = True
+        elif not (token == "and" and hundreds):
+            out.append(token)
+            hundreds = False
+        i += 1
+    return " ".join(out)
+
+
+_BOOK_ALTERNATIVES = "|".join(sorted((re.escape(name) for name in BOOK_INDEX), key=len, reverse=True))
+# A whole prompt that asks for a passage: the bare reference, "read/quote/recite ..."
+# or "what does ... say". Questions that only mention a reference ("what does John 3:16
+# mean", "who wrote Psalm 23") are for the model.
+REFERENCE_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:(?P<read>(?:(?:can|could|would|will)\s+you\s+)?(?:read|quote|recite)"
+    r"(?:\s+(?:me|us|out))?(?:\s+from)?)\s+|(?P<what>what\s+(?:does|do|did))\s+)?"
+    rf"(?:the\s+)?(?:book\s+of\s+)?(?P<book>{_BOOK_ALTERNATIVES})\s+(?:chapter\s+)?(?P<chapter>\d+)"
+    r"(?:\s*(?::|\.|\s(?:verses?\s+)?)\s*(?P<verse>\d+)"
+    r"(?:\s*(?:-|to|through)\s*(?:verses?\s+)?(?P<end>\d+))?)?"
+    r"(?:\s+(?P<say>says?))?(?:\s+(?:for\s+me|to\s+me|please))?$")
+
+
+def parse_reference(prompt):
+    """(book number, chapter, first verse, last verse) that ``prompt`` asks to hear, or None.
+
+    Verses are None for a whole chapter; the last verse is None for a single verse.
+    """
+    text = prompt.lower().replace("’", "'").replace("–", "-")
+    text = re.sub(r"[^a-z0-9:\-' ]+", " ", text).replace("'s ", " ")
+    match = REFERENCE_PATTERN.match(" ".join(_spoken_numbers(text).split()))
+    # "what does ... say" needs both halves
+    if not match or bool(match["what"]) != bool(match["say"]):
+        return None
+    verse = int(match["verse"]) if match["verse"] else None
+    end = int(match["end"]) if match["end"] else None
+    return book_number(match["book"]), int(match["chapter"]), verse, end
+
+
+def _ref(book, chapter, verse):
+    return book * 1000000 + chapter * 1000 + verse
+
+
+LINE_PATTERN = re.compile(
+    r"^\s*(?P<book>(?:[123]\s*)?[A-Za-z][A-Za-z .]*?)\s+(?P<chapter>\d+):(?P<verse>\d+)\s+(?P<text>.+)$")
+
+
+def read_source(path):
+    """(book number, chapter, verse, text) for each verse line of a plain-text translation"""
+    verses = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            fields = line.split("\t")
+            if len(fields) >= 4 and fields[1].strip().isdigit() and fields[2].strip().isdigit():
+                name, chapter, verse, text = fields[0], fields[1], fields[2], "\t".join(fields[3:])
+            else:
+                match = LINE_PATTERN.match(line)
+                if not match:
+                    skipped += bool(line.strip())
+                    continue
+                name, chapter, verse, text = match["book"], match["chapter"], match["verse"], match["text"]
+            book = book_number(name)
+            if book is None:
+                skipped += 1
+                continue
+            verses.append((book, int(chapter), int(verse), " ".join(text.split())))
+    if skipped:
+        print(f"Skipped {skipped} lines that don't look like verses")
+    return verses
+
+
+def build(verses, path=CORPUS_PATH, translation=""):
+    """Write ``verses`` (book, chapter, verse, text) as a corpus file"""
+    verses = sorted({_ref(b, c, v): text for b, c, v, text in verses}.items())
+    refs = np.array([ref for ref, _ in verses], dtype=np.int32)
+    texts = [text.encode("utf-8") for _, text in verses]
+    offsets = np.zeros(len(texts) + 1, dtype=np.uint32)
+    np.cumsum([len(text) for text in texts], out=offsets[1:])
+
+    postings = {}
+    for number, (_, text) in enumerate(verses):
+        for word in set(words_of(text)):
+            postings.setdefault(word, []).append(number)
+    vocabulary = sorted(postings)
+    word_offsets = np.zeros(len(vocabulary) + 1, dtype=np.uint32)
+    np.cumsum([len(postings[word]) for word in vocabulary], out=word_offsets[1:])
+    posting_array = np.fromiter((n for word in vocabulary for n in postings[word]), dtype=np.uint32)
+
+    books = sorted({ref // 1000000 for ref, _ in verses})
+    header = json.dumps({"translation": translation,
+                         "books": {n: BOOKS[n - 1][0] for n in books}}).encode("utf-8")
+    sections = [refs.tobytes(), offsets.tobytes(), b"".join(texts), "\n".join(vocabulary).encode("utf-8"),
+                word_offsets.tobytes(), posting_array.tobytes()]
+    position = HEADER.size + len(header)
+    table = []
+    for section in sections:
+        position += -position % 8  # keep arrays aligned
+        table += [position, len(section)]
+        position += len(section)
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(header), *table))
+        f.write(header)
+        for offset, section in zip(table[::2], sections):
+            f.write(bytes(offset - f.tell()))
+            f.write(section)
+    os.replace(temp, path)
+    return len(verses), len(vocabulary)
+
+
+class BibleCorpus:
+    """A memory-mapped corpus file; see the module docstring for the layout"""
+
+    def __init__(self, path=CORPUS_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length, *table = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Bible corpus file")
+        header = json.loads(self._map[HEADER.size:HEADER.size + header_length])
+        self.translation = header["translation"]
+        self.books = {int(number): name for number, name in header["books"].items()}
+        sections = list(zip(table[::2], table[1::2]))
+        self._refs = np.frombuffer(self._map, np.int32, sections[0][1] // 4, sections[0][0])
+        self._offsets = np.frombuffer(self._map, np.uint32, sections[1][1] // 4, sections[1][0])
+        self._text_start = sections[2][0]
+        vocabulary = self._map[sections[3][0]:sections[3][0] + sections[3][1]].decode("utf-8")
+        self._words = {word: i for i, word in enumerate(vocabulary.split("\n"))} if vocabulary else {}
+        self._word_offsets = np.frombuffer(self._map, np.uint32, sections[4][1] // 4, sections[4][0])
+        self._postings = np.frombuffer(self._map, np.uint32, sections[5][1] // 4, sections[5][0])
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+
+    @classmethod
+    def open(cls, path=CORPUS_PATH):
+        """The corpus at ``path``; None if it hasn't been built"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Bible corpus {path} unreadable: {e}")
+            return None
+
+    def __len__(self):
+        return len(self._refs)
+
+    def text(self, number):
+        """Text of the ``number``-th verse in the file"""
+        start = self._text_start + int(self._offsets[number])
+        return self._map[start:self._text_start + int(self._offsets[number + 1])].decode("utf-8")
+
+    def reference(self, number):
+        """"John 3:16" for the ``number``-th verse in the file"""
+        ref = int(self._refs[number])
+        return f"{self.books[ref // 1000000]} {ref // 1000 % 1000}:{ref % 1000}"
+
+    def verses(self, book, chapter, first=None, last=None):
+        """Verse numbers (positions in the file) of a chapter, or of verses ``first``..``last`` in it"""
+        low = _ref(book, chapter, first or 0)
+        high = _ref(book, chapter, (last or first) if first else 999)
+        return range(int(np.searchsorted(self._refs, low, side="left")),
+                     int(np.searchsorted(self._refs, high, side="right")))
+
+    def search(self, words):
+        """Verse numbers (uint32 array) containing every one of ``words``, in Bible order"""
+        found = np.zeros(0, dtype=np.uint32)
+        for i, word in enumerate(words):
+            index = self._words.get(word)
+            if index is None and word.endswith("s"):
+                index = self._words.get(word[:-1])  # "shepherds" finds "shepherd"
+            if index is None:
+                return np.zeros(0, dtype=np.uint32)
+            posting = self._postings[self._word_offsets[index]:self._word_offsets[index + 1]]
+            found = posting if i == 0 else np.intersect1d(found, posting, assume_unique=True)
+            if not len(found):
+                break
+        return found
+
+    def answer(self, prompt):
+        """Text to read out when ``prompt`` asks for a passage or a verse search; None to ask the model"""
+        started = time.perf_counter()
+        try:
+            return self._answer(prompt.strip())
+        finally:
+            self.lookups += 1
+            self.lookup_seconds += time.perf_counter() - started
+
+    def _answer(self, prompt):
+        reference = parse_reference(prompt)
+        if reference is not None:
+            book, chapter, first, last = reference
+            if book not in self.books:
+                return None
+            numbers = self.verses(book, chapter, first, last)
+            if not numbers:
+                return None
+            name = "Psalm" if book == 19 else self.books[book]
+            if first is None:
+                title = f"{name} chapter {chapter}"
+            else:
+                title = f"{name} {chapter}:{first}" + (f"-{last}" if last else "")
+            lines = [self.text(n) for n in numbers[:MAX_VERSES]]
+            if len(numbers) > MAX_VERSES:
+                lines.append(f"That's the first {MAX_VERSES} of {len(numbers)} verses.")
+            return f"{title}. " + " ".join(lines)
+
+        match = SEARCH_PATTERN.match(" ".join(words_of(prompt)))
+        if match:
+            words = [word for word in match.group(1).split() if word not in SEARCH_STOP_WORDS]
+            found = self.search(words)
+            if not len(found):
+                return None
+            more = f" That's {SEARCH_RESULTS} of {len(found)}." if len(found) > SEARCH_RESULTS else ""
+            verses = [f"{self.reference(int(n))}: {self.text(int(n))}" for n in found[:SEARCH_RESULTS]]
+            return " ".join(verses) + more
+        return None
+
+    def summary(self):
+        """One-line description for the log"""
+        mean = self.lookup_seconds / self.lookups * 1e6 if self.lookups else 0.0
+        return (f"{self.translation or os.path.basename(self.path)}, {len(self)} verses, "
+                f"{len(self._words)} words indexed, {self.lookups} lookups averaging {mean:.0f} us")
+
+    def close(self):
+        self._refs = self._offsets = self._word_offsets = self._postings = None
+        self._map.close()
+        self._file.close()
+
+
+def bench(corpus, rounds=2000):
+    """Time reference lookups and keyword searches"""
+    prompts = ["read John 3:16", "what does Psalm 23 say", "Genesis 1:1-5",
+               "find verses about shepherd", "read Romans chapter 8 verse 28"]
+    for prompt in prompts:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            answer = corpus.answer(prompt)
+        seconds = (time.perf_counter() - started) / rounds
+        print(f"{prompt!r:40} {seconds * 1e6:8.1f} us  {(answer or 'no answer')[:60]!r}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Bible corpus tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the corpus from a plain-text translation")
+    build_parser.add_argument("source")
+    build_parser.add_argument("--translation", default="", help="name to show, e.g. KJV")
+    lookup_parser = commands.add_parser("lookup", help="answer a request from the corpus")
+    lookup_parser.add_argument("prompt")
+    bench_parser = commands.add_parser("bench", help="time lookups")
+    for sub in (build_parser, lookup_parser, bench_parser):
+        sub.add_argument("--corpus", default=CORPUS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        verses, words = build(read_source(args.source), args.corpus,
+                              args.translation or os.path.splitext(os.path.basename(args.source))[0].upper())
+        print(f"{args.corpus}: {verses} verses, {words} words indexed "
+              f"({os.path.getsize(args.corpus) / 1024 / 1024:.1f} MB)")
+        return 0
+    corpus = BibleCorpus.open(args.corpus)
+    if corpus is None:
+        print("No corpus; build one first with: python bible_ai_corpus.py build SOURCE")
+        return 1
+    if args.command == "lookup":
+        print(corpus.answer(args.prompt) or "Not found; this would go to the model")
+        return 0
+    return bench(corpus)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""In-process FLAC encoding for speech uploads.
+
+``AudioData.get_flac_data()`` pipes every utterance through an external
+``flac`` executable, so steady listening means a subprocess per phrase.
+This module resamples to 16 kHz mono and encodes FLAC directly with NumPy:
+fixed linear predictors (orders 0-4) with partitioned Rice coding, which
+is what ``flac`` itself picks for most speech blocks at low settings.
+
+``FlacAudioData`` is a drop-in ``sr.AudioData`` whose ``get_flac_data()``
+uses this encoder, so ``recognize_google()`` needs no changes.
+
+Micro-benchmark against the subprocess path:
+
+    python bible_ai_flac.py [input.wav]
+"""
+
+import hashlib
+import struct
+import sys
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+TARGET_RATE = 16000
+BLOCK_SIZE = 4096
+MAX_FIXED_ORDER = 4
+MAX_PARTITION_ORDER = 4
+MAX_RICE_PARAMETER = 14  # 4-bit parameter, 15 is the escape code
+
+_SAMPLE_RATE_CODES = {
+    8000: 0b0100, 16000: 0b0101, 22050: 0b0110, 24000: 0b0111,
+    32000: 0b1000, 44100: 0b1001, 48000: 0b1010, 96000: 0b1011,
+}
+
+
+# --- Resampling ---
+
+def resample(samples, rate, target_rate=TARGET_RATE):
+    """Resample int16 mono samples, low-pass filtering first when downsampling"""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    x = samples.astype(np.float64)
+    if target_rate < rate:
+        # Windowed-sinc low-pass at the new Nyquist frequency
+        cutoff = target_rate / rate / 2
+        taps = np.arange(-32, 33)
+        kernel = np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        x = np.convolve(x, kernel / kernel.sum(), mode="same")
+    count = int(len(x) * target_rate / rate)
+    positions = np.arange(count) * (rate / target_rate)
+    y = np.interp(positions, np.arange(len(x)), x)
+    return np.clip(np.round(y), -32768, 32767).astype(np.int16)
+
+
+# --- Checksums ---
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) if crc & 0x80 else (crc << 1)
+        table.append(crc & 0xFF)
+    return table
+
+
+_CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+# CRC-16 is linear over GF(2): the bit j places from the end of the message
+# contributes x^(j+16) mod P. Keeping those contributions as a bit matrix
+# turns the checksum of a whole frame into one matrix product (mod 2)
+# instead of a Python loop over every byte.
+_CRC16_BITS = np.zeros((0, 16), dtype=np.float32)
+
+
+def _crc16_contributions(bit_count):
+    global _CRC16_BITS
+    if len(_CRC16_BITS) < bit_count:
+        count = max(bit_count, 2 * len(_CRC16_BITS), 1 << 16)
+        values = np.empty(count, dtype=np.uint16)
+        crc = 0x8005  # x^16 mod P
+        for j in range(count):
+            values[j] = crc
+            crc = ((crc << 1) ^ 0x8005) & 0xFFFF if crc & 0x8000 else (crc << 1)
+        _CRC16_BITS = _bits_matrix(values).astype(np.float32)
+    return _CRC16_BITS[:bit_count]
+
+
+def _bits_matrix(values):
+    return np.unpackbits(values.astype(">u2").view(np.uint8).reshape(-1, 2), axis=1)
+
+
+def crc16(data):
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    if len(bits) == 0:
+        return 0
+    # Row j of the table belongs to the bit j places from the end, hence
+    # the reversal. Exact in float32 for messages under 2**24 bits.
+    counts = bits[::-1].astype(np.float32) @ _crc16_contributions(len(bits))
+    crc_bits = (counts.astype(np.int64) & 1).astype(np.uint8)
+    return int(np.packbits(crc_bits).view(">u2")[0])
+
+
+# --- Bit packing ---
+
+def _pack(values, lengths):
+    """Pack right-aligned fields into bytes, most significant bit first.
+
+    Field i is ``lengths[i]`` bits wide with ``values[i]`` in its low bits;
+    the value itself must fit in 25 bits (Rice codes are mostly leading
+    zeros). Fields never share bits, so each one can be shifted into the
+    bytes it ends in and summed into place with bincount. The result is
+    zero-padded to a byte boundary.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    ends = np.cumsum(lengths)
+    total = int(ends[-1]) if len(ends) else 0
+    size = (total + 7) // 8
+    last = (ends - 1) // 8
+    shifted = values << (7 - (ends - 1) % 8)
+    out = np.zeros(size, dtype=np.float64)
+    for i in range(4):
+        part = (shifted >> (8 * i)) & 0xFF
+        out += np.bincount(np.maximum(last - i, 0), weights=part, minlength=size)
+    return out.astype(np.uint8).tobytes()
+
+
+def _rice_fields(folded, parameter):
+    """(values, lengths) of Rice-coded folded residuals: q zeros, a one, then the remainder"""
+    lengths = (folded >> parameter) + 1 + parameter
+    values = (folded & ((1 << parameter) - 1)) | (1 << parameter)
+    return values, lengths
+
+
+def _utf8_number(n):
+    """FLAC's UTF-8-like variable length encoding of the frame number"""
+    if n < 0x80:
+        return bytes([n])
+    for length in range(2, 7):
+        if n < (1 << (5 * length + 1)):
+            break
+    out = []
+    for _ in range(length - 1):
+        out.append(0x80 | (n & 0x3F))
+        n >>= 6
+    first = ((0xFF00 >> length) & 0xFF) | n
+    return bytes([first] + out[::-1])
+
+
+# --- Encoding ---
+
+def _fold(residuals):
+    """Map signed residuals to unsigned: 0, -1, 1, -2, ... -> 0, 1, 2, 3, ..."""
+    return np.where(residuals >= 0, residuals * 2, -residuals * 2 - 1)
+
+
+def _partitions(folded, block_size, order):
+    """(partition order, Rice parameters, bits, bounds) for one subframe's folded residuals.
+
+    Rice costs are computed once for the finest partitioning and summed
+    pairwise for each coarser one.
+    """
+    finest = 0
+    while (finest < MAX_PARTITION_ORDER and block_size % (2 << finest) == 0
+           and (block_size >> (finest + 1)) > order):
+        finest += 1
+
+    folded = np.concatenate((np.zeros(order, dtype=np.int64), folded))
+    parts = 1 << finest
+    # Only try parameters around log2 of the mean folded residual
+    mean = max(float(folded.mean()), 1.0)
+    center = int(np.log2(mean))
+    params = np.arange(max(0, center - 3), min(MAX_RICE_PARAMETER, center + 2) + 1)
+    # Padding zeros cost nothing in the quotient sums; counts exclude them
+    sums = (folded.reshape(parts, -1)[:, :, None] >> params).sum(axis=1)
+    counts = np.full(parts, block_size >> finest)
+    counts[0] -= order
+
+    best = None
+    for partition_order in range(finest, -1, -1):
+        costs = sums + counts[:, None] * (params + 1)
+        chosen = np.argmin(costs, axis=1)
+        bits = 4 + int(costs[np.arange(len(chosen)), chosen].sum()) + 4 * len(chosen)
+        if best is None or bits < best[2]:
+            size = block_size >> partition_order
+            bounds = [0] + [size * i - order for i in range(1, len(chosen) + 1)]
+            best = (partition_order, [int(params[k]) for k in chosen], bits, bounds)
+        if partition_order:
+            sums = sums.reshape(-1, 2, len(params)).sum(axis=1)
+            counts = counts.reshape(-1, 2).sum(axis=1)
+    return best
+
+
+def _subframe(block):
+    """Packed bytes of the cheapest subframe (constant, fixed or verbatim) for ``block``"""
+    if np.all(block == block[0]):
+        return _pack([0b00000000, int(block[0]) & 0xFFFF], [8, 16])
+
+    # Pick the fixed predictor order with the smallest residual magnitude,
+    # the same estimate the reference encoder uses
+    x = block.astype(np.int64)
+    best_order, best_residuals, best_sum = 0, x, None
+    residuals = x
+    for order in range(min(MAX_FIXED_ORDER, len(x) - 1) + 1):
+        if order:
+            residuals = np.diff(residuals)
+        total = int(np.abs(residuals).sum())
+        if best_sum is None or total < best_sum:
+            best_order, best_residuals, best_sum = order, residuals, total
+
+    folded = _fold(best_residuals)
+    partition_order, params, bits, bounds = _partitions(folded, len(x), best_order)
+
+    if bits + 16 * best_order >= 16 * len(x):
+        # Verbatim
+        values = np.concatenate(([0b00000010], x & 0xFFFF))
+        return _pack(values, np.concatenate(([8], np.full(len(x), 16))))
+
+    values = [np.array([0b00010000 | (best_order << 1)]), x[:best_order] & 0xFFFF,
+              np.array([0b00, partition_order])]
+    lengths = [np.array([8]), np.full(best_order, 16), np.array([2, 4])]
+    for parameter, start, end in zip(params, bounds[:-1], bounds[1:]):
+        rice_values, rice_lengths = _rice_fields(folded[start:end], parameter)
+        values += [np.array([parameter]), rice_values]
+        lengths += [np.array([4]), rice_lengths]
+    return _pack(np.concatenate(values), np.concatenate(lengths))
+
+
+def _frame(block, number, sample_rate):
+    header = bytearray(b"\xff\xf8")
+    if len(block) == BLOCK_SIZE:
+        size_code, size_extra = 0b1100, b""
+    else:
+        size_code, size_extra = 0b0111, struct.pack(">H", len(block) - 1)
+    rate_code = _SAMPLE_RATE_CODES.get(sample_rate, 0b0000)
+    header.append((size_code << 4) | rate_code)
+    header.append((0b0000 << 4) | (0b100 << 1))  # mono, 16 bits per sample
+    header += _utf8_number(number)
+    header += size_extra
+    header.append(crc8(header))
+
+    frame = bytes(header) + _subframe(block)
+    return frame + struct.pack(">H", crc16(frame))
+
+
+def encode_flac(samples, sample_rate):
+    """Encode int16 mono samples as a complete FLAC file"""
+    samples = np.asarray(samples, dtype=np.int16)
+    frames = [_frame(samples[start:start + BLOCK_SIZE], i, sample_rate)
+              for i, start in enumerate(range(0, len(samples), BLOCK_SIZE))]
+
+    last_block = len(samples) % BLOCK_SIZE or BLOCK_SIZE
+    min_block = BLOCK_SIZE if len(frames) > 1 else last_block
+    frame_sizes = [len(f) for f in frames] or [0]
+    info = struct.pack(">HH", min(min_block, BLOCK_SIZE), BLOCK_SIZE)
+    info += min(frame_sizes).to_bytes(3, "big") + max(frame_sizes).to_bytes(3, "big")
+    packed = (sample_rate << 44) | (0 << 41) | (15 << 36) | len(samples)
+    info += packed.to_bytes(8, "big")
+    info += hashlib.md5(samples.astype("<i2").tobytes()).digest()
+
+    metadata = bytes([0x80]) + len(info).to_bytes(3, "big") + info  # last block, STREAMINFO
+    return b"fLaC" + metadata + b"".join(frames)
+
+
+class FlacAudioData(sr.AudioData):
+    """AudioData whose FLAC conversion runs in-process instead of via the flac binary"""
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        if convert_width not in (None, 2):
+            return super().get_flac_data(convert_rate, convert_width)
+        raw = self.get_raw_data(convert_width=2)
+        samples = np.frombuffer(raw, dtype="<i2")
+        rate = self.sample_rate
+        if convert_rate and convert_rate != rate:
+            samples = resample(samples, rate, convert_rate)
+            rate = convert_rate
+        return encode_flac(samples, rate)
+
+
+def to_upload_audio(audio, target_rate=TARGET_RATE):
+    """Resample an AudioData to 16 kHz 16-bit mono FlacAudioData for upload"""
+    samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype="<i2")
+    if audio.sample_rate > target_rate:
+        samples = resample(samples, audio.sample_rate, target_rate)
+        rate = target_rate
+    else:
+        rate = audio.sample_rate
+    return FlacAudioData(samples.astype("<i2").tobytes(), rate, 2)
+
+
+# --- Benchmark ---
+
+def benchmark(audio, runs=20):
+    """Compare in-process encoding with AudioData.get_flac_data()'s subprocess"""
+    def timed(fn):
+        fn()  # warm up
+        started = time.perf_counter()
+        for _ in range(runs):
+            result = fn()
+        return (time.perf_counter() - started) / runs, len(result)
+
+    raw_size = len(audio.frame_data)
+    print(f"Input: {len(audio.frame_data) / audio.sample_width / audio.sample_rate:.2f}s "
+          f"at {audio.sample_rate} Hz, {raw_size / 1024:.0f} KB PCM")
+
+    seconds, size = timed(lambda: to_upload_audio(audio).get_flac_data(convert_width=2))
+    print(f"In-process : {seconds * 1000:7.2f} ms/utterance, {size / 1024:6.1f} KB")
+
+    try:
+        seconds, size = timed(lambda: audio.get_flac_data(
+            convert_rate=TARGET_RATE if audio.sample_rate > TARGET_RATE else None, convert_width=2))
+        print(f"flac binary: {seconds * 1000:7.2f} ms/utterance, {size / 1024:6.1f} KB")
+    except (OSError, AssertionError) as e:
+        print(f"flac binary: unavailable ({e})")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        with sr.AudioFile(argv[0]) as source:
+            audio = sr.Recognizer().record(source)
+    else:
+        # Five seconds of a synthetic voiced sound at a typical microphone rate
+        rate = 44100
+        t = np.arange(5 * rate) / rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+        signal = envelope * (4000 * np.sin(2 * np.pi * 180 * t) + 1500 * np.sin(2 * np.pi * 720 * t))
+        signal += np.random.default_rng(0).normal(0, 60, len(t))
+        audio = sr.AudioData(signal.astype("<i2").tobytes(), rate, 2)
+    benchmark(audio)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
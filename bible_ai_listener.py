@@ -0,0 +1,119 @@
+"""Explicit state machine for the listening loop.
+
+``listen_and_process()`` used to spin on ``time.sleep(0.1)`` while the app
+was speaking and decided what a listen timeout meant by reading the status
+label's text. ``ListenerStateMachine`` holds the listener's state (idle,
+wake-listen, command-listen, thinking, speaking) behind a condition
+variable: threads wait for a state change instead of polling, every
+transition is timestamped, and time spent in each state is accumulated.
+"""
+
+import collections
+import threading
+import time
+
+IDLE = "idle"
+WAKE_LISTEN = "wake-listen"
+COMMAND_LISTEN = "command-listen"
+THINKING = "thinking"
+SPEAKING = "speaking"
+
+STATES = (IDLE, WAKE_LISTEN, COMMAND_LISTEN, THINKING, SPEAKING)
+
+# Recent transitions kept for inspection
+TRANSITION_HISTORY = 200
+
+
+class Transition:
+    """One state change: when it happened and how long the old state lasted"""
+
+    def __init__(self, at, old, new, seconds, reason=""):
+        self.at = at  # wall-clock time.time()
+        self.old = old
+        self.new = new
+        self.seconds = seconds  # time spent in ``old``
+        self.reason = reason
+
+    def __repr__(self):
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.at))
+        return f"{stamp} {self.old} -> {self.new} after {self.seconds:.2f}s"
+
+
+class ListenerStateMachine:
+    """Current listener state; safe to change and wait on from any thread.
+
+    ``on_change(transition)`` is called after every transition, outside
+    the lock.
+    """
+
+    def __init__(self, on_change=None, history=TRANSITION_HISTORY):
+        self.on_change = on_change
+        self.transitions = collections.deque(maxlen=history)
+        self.totals = dict.fromkeys(STATES, 0.0)  # seconds spent per state
+        self.counts = dict.fromkeys(STATES, 0)
+        self._state = IDLE
+        self._since = time.monotonic()
+        self._cond = threading.Condition()
+
+    @property
+    def state(self):
+        return self._state
+
+    def elapsed(self):
+        """Seconds spent in the current state so far"""
+        return time.monotonic() - self._since
+
+    def transition(self, new, reason=""):
+        """Enter state ``new`` and wake everyone waiting for a change"""
+        if new not in STATES:
+            raise ValueError(f"Unknown listener state: {new}")
+        with self._cond:
+            old = self._state
+            if new == old:
+                return None
+            now = time.monotonic()
+            seconds = now - self._since
+            self.totals[old] += seconds
+            self.counts[old] += 1
+            self._state, self._since = new, now
+            change = Transition(time.time(), old, new, seconds, reason)
+            self.transitions.append(change)
+            self._cond.notify_all()
+
+        if self.on_change:
+            self.on_change(change)
+        return change
+
+    def wait_while(self, *states, timeout=None):
+        """Block while the state is one of ``states``; False if ``timeout`` ran out"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._state not in states, timeout)
+
+    def wait_for(self, *states, timeout=None):
+        """Block until the state is one of ``states``; False if ``timeout`` ran out"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._state in states, timeout)
+
+    def stats(self):
+        """Total seconds, visits and mean seconds per state, counting the current one"""
+        with self._cond:
+            totals = dict(self.totals)
+            counts = dict(self.counts)
+            totals[self._state] += time.monotonic() - self._since
+            counts[self._state] += 1
+        return {
+            state: {
+                "seconds": totals[state],
+                "visits": counts[state],
+                "mean": totals[state] / counts[state] if counts[state] else 0.0,
+            }
+            for state in STATES
+        }
+
+    def summary(self):
+        """One-line description for the log"""
+        parts = []
+        for state, s in self.stats().items():
+            if s["visits"]:
+                parts.append(f"{state} {s['seconds']:.1f}s/{s['visits']} (mean {s['mean']:.2f}s)")
+        return ", ".join(parts)
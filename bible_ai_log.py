@@ -0,0 +1,210 @@
+"""Bounded log storage and a virtualized Tk view over it.
+
+``log_message()`` used to append every heard phrase and full AI story to a
+Text widget forever. ``LogBuffer`` keeps a fixed number of entries in a
+ring and can spill the ones it evicts to a rotating file; ``LogView`` keeps
+only a window of the buffer in the widget and pages older or newer entries
+in as the user scrolls to either end. Memory stays flat however long the
+app runs.
+"""
+
+import collections
+import logging
+import logging.handlers
+import threading
+import time
+
+# Entries kept in memory
+LOG_CAPACITY = 2000
+# Entries shown in the widget at once, and how many to page in at a time
+LOG_WINDOW = 300
+LOG_PAGE = 100
+# Rotating spill file: size per file and number of old files kept
+SPILL_BYTES = 1024 * 1024
+SPILL_BACKUPS = 3
+
+
+class LogBuffer:
+    """Fixed-capacity ring of log entries addressed by absolute index.
+
+    With ``spill_path`` set, entries pushed out of the ring are written to
+    a size-rotated file with the time they were logged.
+    """
+
+    def __init__(self, capacity=LOG_CAPACITY, spill_path=None,
+                 spill_bytes=SPILL_BYTES, spill_backups=SPILL_BACKUPS):
+        self.entries = collections.deque(maxlen=capacity)  # (time, message)
+        self.end = 0  # absolute index one past the newest entry
+        self.spilled = 0
+        self._lock = threading.Lock()
+        self._spill = None
+        if spill_path:
+            self._spill = logging.handlers.RotatingFileHandler(
+                spill_path, maxBytes=spill_bytes, backupCount=spill_backups, encoding="utf-8")
+
+    @property
+    def capacity(self):
+        return self.entries.maxlen
+
+    @property
+    def start(self):
+        """Absolute index of the oldest entry still held"""
+        return self.end - len(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, message):
+        self.extend([message])
+
+    def extend(self, messages):
+        now = time.time()
+        with self._lock:
+            for message in messages:
+                if self._spill and len(self.entries) == self.entries.maxlen:
+                    self._write_spill(*self.entries[0])
+                self.entries.append((now, message))
+                self.end += 1
+
+    def _write_spill(self, logged_at, message):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(logged_at))
+        record = logging.makeLogRecord({"msg": f"{stamp} {message}"})
+        try:
+            self._spill.emit(record)
+            self.spilled += 1
+        except Exception as e:
+            print(f"Log spill failed: {e}")
+
+    def slice(self, start, end):
+        """Messages with absolute indexes in [start, end), clamped to what is held"""
+        with self._lock:
+            offset = self.start
+            start, end = max(start, offset), min(end, self.end)
+            return [self.entries[i - offset][1] for i in range(start, end)]
+
+    def close(self):
+        """Spill everything still held and close the file"""
+        if self._spill:
+            with self._lock:
+                for entry in self.entries:
+                    self._write_spill(*entry)
+            self._spill.close()
+            self._spill = None
+
+
+class LogView:
+    """Shows at most ``window`` entries of a LogBuffer in a (Scrolled)Text widget.
+
+    While the view is scrolled to the bottom it follows new entries; when
+    the user scrolls to the top or back to the bottom, the next page of
+    older or newer entries is swapped in.
+    """
+
+    def __init__(self, text, buffer, window=LOG_WINDOW, page=LOG_PAGE):
+        self.text = text
+        self.buffer = buffer
+        self.window = window
+        self.page = page
+        self.first = self.last = buffer.start  # absolute range shown: [first, last)
+        self.following = True
+        self._lines = collections.deque()  # text lines per shown entry
+
+        # Watch the scroll position, still driving the scrollbar if there is one
+        scrollbar = getattr(text, "vbar", None)
+        self._scrollbar_set = scrollbar.set if scrollbar else None
+        text.configure(yscrollcommand=self._on_scroll)
+        self.refresh()
+
+    def append(self, messages):
+        """Add messages to the buffer and show them if the view is following"""
+        self.buffer.extend(messages)
+        self.refresh()
+
+    def refresh(self):
+        """Show entries added to the buffer since the last refresh, if following"""
+        if not self.following or self.last >= self.buffer.end:
+            return
+        if self.buffer.end - self.last > self.window:
+            # Too far behind to be worth inserting everything; jump to the newest window
+            self._clear(self.buffer.end - self.window)
+        self._insert_newer(self.buffer.end - self.last)
+        self._trim_top()
+        self.text.see("end")
+
+    def _edit(self, edit):
+        self.text.config(state="normal")
+        try:
+            edit()
+        finally:
+            self.text.config(state="disabled")
+
+    def _insert_newer(self, count):
+        start = max(self.last, self.buffer.start)
+        messages = self.buffer.slice(start, start + count)
+        if not messages:
+            return
+        if start > self.last:
+            # Entries between what is shown and what is still held are gone
+            self._clear(start)
+        self._edit(lambda: self.text.insert("end", "".join(m + "\n" for m in messages)))
+        self._lines.extend(m.count("\n") + 1 for m in messages)
+        self.last = start + len(messages)
+
+    def _insert_older(self, count):
+        start = max(self.first - count, self.buffer.start)
+        messages = self.buffer.slice(start, self.first)
+        if not messages:
+            return 0
+        self._edit(lambda: self.text.insert("1.0", "".join(m + "\n" for m in messages)))
+        lines = [m.count("\n") + 1 for m in messages]
+        self._lines.extendleft(reversed(lines))
+        self.first = start
+        return sum(lines)
+
+    def _clear(self, index):
+        self._edit(lambda: self.text.delete("1.0", "end"))
+        self._lines.clear()
+        self.first = self.last = index
+
+    def _trim_top(self):
+        excess = len(self._lines) - self.window
+        if excess <= 0:
+            return
+        lines = sum(self._lines.popleft() for _ in range(excess))
+        self._edit(lambda: self.text.delete("1.0", f"{lines + 1}.0"))
+        self.first += excess
+
+    def _trim_bottom(self):
+        excess = len(self._lines) - self.window
+        if excess <= 0:
+            return
+        total = sum(self._lines)
+        lines = sum(self._lines.pop() for _ in range(excess))
+        self._edit(lambda: self.text.delete(f"{total - lines + 1}.0", f"{total + 1}.0"))
+        self.last -= excess
+
+    def _on_scroll(self, first, last):
+        if self._scrollbar_set:
+            self._scrollbar_set(first, last)
+        first, last = float(first), float(last)
+        if last >= 1.0:
+            if self.last < self.buffer.end:
+                self.text.after_idle(self._page_newer)
+            else:
+                self.following = True
+        else:
+            self.following = False
+            if first <= 0.0 and self.first > self.buffer.start:
+                self.text.after_idle(self._page_older)
+
+    def _page_older(self):
+        lines = self._insert_older(self.page)
+        if lines:
+            self._trim_bottom()
+            # Keep the line that was at the top in place
+            self.text.yview(f"{lines + 1}.0")
+
+    def _page_newer(self):
+        self._insert_newer(self.page)
+        self._trim_top()
+        self.following = self.last >= self.buffer.end
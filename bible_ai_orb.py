@@ -0,0 +1,690 @@
+"""Retained-mode renderer for the animated orb in bible_ai_app.py.
+
+``draw_orb()`` and ``animate_waves()`` used to ``delete("all")`` and
+recreate ~95 stippled ovals and text items on every frame. ``OrbRenderer``
+creates the idle and speaking items once and animates them with
+``coords()``; the only ``itemconfigure()`` calls per frame are ripple
+widths that actually changed. Ring colors come from gradient lookup
+tables built once per palette (``palette()``) instead of parsing and
+formatting hex strings for every ring.
+
+The idle breathing is periodic, so ``SpriteOrbRenderer`` can instead
+rasterize one breath cycle into images at startup (NumPy, within a memory
+cap) and play it back by swapping a single image item; only the three
+sparkle glyphs stay live text items.
+
+``FrameScheduler`` drives whichever animation is running: it pauses while
+the window is unmapped or fully obscured, lowers the frame rate when
+frames keep overrunning their budget (and recovers it later), and keeps
+per-frame render times for ``stats()``.
+
+Compare color and frame costs against the old immediate-mode path, and
+the CPU per second of live vs sprite idle animation (needs a display):
+
+    python bible_ai_orb.py --frames 300 --sprites 32
+"""
+
+import argparse
+import collections
+import functools
+import math
+import sys
+import time
+
+import numpy as np
+
+CENTER = (250, 250)
+BACKGROUND = "#0a0118"
+
+# Gradient stops of the main sphere, outermost ring last
+IDLE_SPHERE = ("#7c3aed", "#6366f1", "#60a5fa", "#7dd3fc", "#a5f3fc")
+SPEAKING_SPHERE = ("#818cf8", "#60a5fa", "#7dd3fc", "#a5f3fc", "#dbeafe")
+
+SPARKLE = "✦"
+
+# Sprite mode: frames per breath cycle, and the most memory they may use
+SPRITE_FRAMES = 32
+SPRITE_MEMORY_MB = 48
+
+# Frame scheduler: slow down by SLOWDOWN after OVERRUN_FRAMES late frames in
+# a row, never below MIN_FPS; speed back up after RECOVER_FRAMES easy ones
+MIN_FPS = 10
+OVERRUN_FRAMES = 5
+RECOVER_FRAMES = 60
+SLOWDOWN = 0.75
+FRAME_HISTORY = 120
+
+# Tk's built-in stipple bitmaps as 4x4 tiles anchored at the canvas origin
+STIPPLES = {
+    "gray12": ((0, 0, 0, 0), (0, 1, 0, 0), (0, 0, 0, 0), (0, 0, 0, 1)),
+    "gray25": ((0, 0, 0, 1), (0, 1, 0, 0), (0, 0, 0, 1), (0, 1, 0, 0)),
+}
+
+# name -> (first color, last color, steps) for two-color gradients, or
+# (sphere stops, steps) for the four-segment sphere gradients
+PALETTES = {
+    "outer_glow": ("#1a1540", "#2a2055", 35),
+    "mid_glow": ("#2d2560", "#3d3580", 20),
+    "ripple": ("#4f46e5", "#818cf8", 8),
+    "idle_sphere": (IDLE_SPHERE, 35),
+    "speaking_sphere": (SPEAKING_SPHERE, 35),
+}
+
+
+def blend_color(color1, color2, ratio):
+    """Blend two hex colors"""
+    c1 = tuple(int(color1[i:i+2], 16) for i in (1, 3, 5))
+    c2 = tuple(int(color2[i:i+2], 16) for i in (1, 3, 5))
+    blended = tuple(int(c1[i] + (c2[i] - c1[i]) * ratio) for i in range(3))
+    return f"#{blended[0]:02x}{blended[1]:02x}{blended[2]:02x}"
+
+
+def sphere_color(stops, ratio):
+    """Color of the sphere ring at ``ratio`` (0 = center, 1 = edge) across four segments"""
+    segment = min(3, int(ratio * 4))
+    if segment > 0 and ratio * 4 == segment:
+        segment -= 1  # boundaries belong to the lower segment, as before
+    return blend_color(stops[segment], stops[segment + 1], ratio * 4 - segment)
+
+
+@functools.lru_cache(maxsize=None)
+def gradient(color1, color2, steps):
+    """Lookup table of blend_color(color1, color2, i / steps) for i in 0..steps"""
+    return tuple(blend_color(color1, color2, i / steps) for i in range(steps + 1))
+
+
+@functools.lru_cache(maxsize=None)
+def sphere_gradient(stops, steps):
+    """Lookup table of sphere_color(stops, i / steps) for i in 0..steps"""
+    return tuple(sphere_color(stops, i / steps) for i in range(steps + 1))
+
+
+@functools.lru_cache(maxsize=None)
+def palette(name):
+    """Color table for one of PALETTES, built on first use; index with the ring number"""
+    spec = PALETTES[name]
+    if len(spec) == 2:
+        return sphere_gradient(*spec)
+    return gradient(*spec)
+
+
+class OrbRenderer:
+    """Creates the orb's canvas items once and moves them each frame"""
+
+    def __init__(self, canvas, center=CENTER):
+        self.canvas = canvas
+        self.cx, self.cy = center
+        self.mode = None
+        self._ripple_widths = [None] * 8
+        self._create_idle()
+        self._create_speaking()
+        self._show("idle")
+
+    def _oval(self, tag, **options):
+        return self.canvas.create_oval(0, 0, 0, 0, tags=(tag,), **options)
+
+    def _create_idle(self):
+        self._create_idle_body()
+        cx, cy = self.cx, self.cy
+        self.idle_sparkles = [
+            self.canvas.create_text(0, 0, text=SPARKLE, font=("Helvetica", size), fill="#ffffff", tags=("idle",))
+            for size in (40, 23, 19)
+        ]
+
+        # Invisible reference oval around the sphere
+        self.orb = self.canvas.create_oval(cx - 140, cy - 140, cx + 140, cy + 140, fill="", outline="", tags=("idle",))
+
+    def _create_idle_body(self):
+        outer, mid, sphere = palette("outer_glow"), palette("mid_glow"), palette("idle_sphere")
+        self.outer_glow = [
+            self._oval("idle", fill=outer[i], outline="", stipple="gray12")
+            for i in range(35, 0, -1)
+        ]
+        self.mid_glow = [
+            self._oval("idle", fill=mid[i], outline="", stipple="gray25")
+            for i in range(20, 0, -1)
+        ]
+        self.idle_sphere = [
+            self._oval("idle", fill=sphere[i], outline="")
+            for i in range(35, 0, -1)
+        ]
+
+        # Glass highlights don't move
+        cx, cy = self.cx, self.cy
+        self.canvas.create_oval(cx - 100, cy - 100, cx - 15, cy - 15,
+                                fill="#e0f2fe", outline="", stipple="gray12", tags=("idle",))
+        self.canvas.create_oval(cx - 80, cy - 80, cx - 30, cy - 30,
+                                fill="#f0f9ff", outline="", stipple="gray12", tags=("idle",))
+
+    def _create_speaking(self):
+        ripple, sphere = palette("ripple"), palette("speaking_sphere")
+        self.ripples = [
+            self._oval("speaking", fill="", outline=ripple[i], stipple="gray25")
+            for i in range(8)
+        ]
+        self.speaking_sphere = [
+            self._oval("speaking", fill=sphere[i], outline="")
+            for i in range(35, 0, -1)
+        ]
+        self.particles = []
+        for _ in range(10):
+            glow = self._oval("speaking", fill="#e0f2fe", outline="")
+            core = self._oval("speaking", fill="#ffffff", outline="")
+            self.particles.append((glow, core))
+        self.speaking_sparkles = [
+            self.canvas.create_text(0, 0, text=SPARKLE, font=("Helvetica", size), fill="#ffffff", tags=("speaking",))
+            for size in (36, 21, 17)
+        ]
+
+    def _show(self, mode):
+        if mode == self.mode:
+            return
+        hidden = "speaking" if mode == "idle" else "idle"
+        self.canvas.itemconfigure(hidden, state="hidden")
+        self.canvas.itemconfigure(mode, state="normal")
+        self.mode = mode
+
+    def _circle(self, item, radius):
+        cx, cy = self.cx, self.cy
+        self.canvas.coords(item, cx - radius, cy - radius, cx + radius, cy + radius)
+
+    def draw_idle(self, pulse_offset=0):
+        """Glass sphere with subtle breathing"""
+        self._show("idle")
+        self._draw_idle_body(pulse_offset)
+
+        sparkle_float = 4 * math.sin(pulse_offset * 0.9)
+        cx, cy = self.cx, self.cy
+        positions = (
+            (cx, cy - 28 + sparkle_float),
+            (cx - 33, cy + 20 - sparkle_float * 0.6),
+            (cx + 33, cy + 15 + sparkle_float * 0.4),
+        )
+        for item, (x, y) in zip(self.idle_sparkles, positions):
+            self.canvas.coords(item, x, y)
+
+    def _draw_idle_body(self, pulse_offset):
+        breath = 8 * math.sin(pulse_offset)
+        for item, i in zip(self.outer_glow, range(35, 0, -1)):
+            self._circle(item, 165 + i * 4 + breath * 0.5)
+        for item, i in zip(self.mid_glow, range(20, 0, -1)):
+            self._circle(item, 150 + i * 2.5 + breath * 0.8)
+        for item, i in zip(self.idle_sphere, range(35, 0, -1)):
+            self._circle(item, 140 - i * 3.8 + breath)
+
+    def draw_speaking(self, wave_offset, glow_offset):
+        """Ripples, pulsing sphere and orbiting particles while speaking"""
+        self._show("speaking")
+        cx, cy = self.cx, self.cy
+
+        for i, item in enumerate(self.ripples):
+            phase = glow_offset + i * 0.5
+            self._circle(item, 180 + 28 * math.sin(phase))
+            width = int(2 + 1.5 * math.sin(phase))
+            if width != self._ripple_widths[i]:
+                self.canvas.itemconfigure(item, width=width)
+                self._ripple_widths[i] = width
+
+        pulse = 140 + 12 * math.sin(wave_offset * 1.2)
+        for item, i in zip(self.speaking_sphere, range(35, 0, -1)):
+            self._circle(item, pulse - i * 3.8)
+
+        for j, (glow, core) in enumerate(self.particles):
+            angle = wave_offset * 0.9 + j * (2 * math.pi / 10)
+            distance = 115 + 15 * math.sin(wave_offset + j * 0.4)
+            x = cx + distance * math.cos(angle)
+            y = cy + distance * math.sin(angle)
+            size = 2 + 1.5 * math.sin(wave_offset * 1.3 + j)
+            self.canvas.coords(glow, x - size - 1, y - size - 1, x + size + 1, y + size + 1)
+            self.canvas.coords(core, x - size, y - size, x + size, y + size)
+
+        sparkle_offset = wave_offset * 1.1
+        positions = (
+            (cx + 10 * math.sin(sparkle_offset), cy - 28),
+            (cx - 33, cy + 20 + 5 * math.sin(sparkle_offset + 1.8)),
+            (cx + 33, cy + 15 + 5 * math.sin(sparkle_offset + 3.2)),
+        )
+        for item, (x, y) in zip(self.speaking_sparkles, positions):
+            self.canvas.coords(item, x, y)
+
+
+# --- Frame Scheduling ---
+
+class FrameScheduler:
+    """Runs one animation callback at a time on a widget's after() loop.
+
+    A frame overruns when its render time plus how late it started (which
+    includes Tk's redraw of the previous frame) exceeds the frame budget.
+    """
+
+    def __init__(self, widget, min_fps=MIN_FPS, overrun_frames=OVERRUN_FRAMES,
+                 recover_frames=RECOVER_FRAMES, history=FRAME_HISTORY):
+        self.widget = widget
+        self.min_fps = min_fps
+        self.overrun_frames = overrun_frames
+        self.recover_frames = recover_frames
+        self.callback = None
+        self.target_fps = 0
+        self.fps = 0
+        self.frame_times = collections.deque(maxlen=history)  # render ms of recent frames
+        self.frames = 0
+        self.overruns = 0
+        self.slowdowns = 0
+        self.hidden = set()  # "unmapped" and/or "obscured"
+        self._after_id = None
+        self._due = 0.0
+        self._late_streak = 0
+        self._easy_streak = 0
+
+        self._top = widget.winfo_toplevel()
+        self._top.bind("<Unmap>", self._on_unmap, add="+")
+        self._top.bind("<Map>", self._on_map, add="+")
+        widget.bind("<Visibility>", self._on_visibility, add="+")
+
+    @property
+    def paused(self):
+        return bool(self.hidden)
+
+    def start(self, callback, fps):
+        """Replace the running animation; the first frame is drawn right away"""
+        self.stop()
+        self.callback = callback
+        self.target_fps = self.fps = fps
+        self._late_streak = self._easy_streak = 0
+        self._schedule(0)
+
+    def stop(self):
+        if self._after_id:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.callback = None
+
+    def _schedule(self, delay_ms=None):
+        if self.callback is None or self.hidden or self._after_id:
+            return
+        if delay_ms is None:
+            delay_ms = int(round(1000 / self.fps))
+        self._due = time.perf_counter() + delay_ms / 1000
+        self._after_id = self.widget.after(delay_ms, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        callback = self.callback
+        if callback is None or self.hidden:
+            return
+        started = time.perf_counter()
+        late = max(0.0, started - self._due)
+        callback()
+        self._record(time.perf_counter() - started, late)
+        # The callback may have stopped or replaced the animation
+        if self.callback is callback:
+            self._schedule()
+
+    def _record(self, render, late):
+        self.frames += 1
+        self.frame_times.append(render * 1000)
+        budget = 1 / self.fps
+        if render + late > budget:
+            self.overruns += 1
+            self._late_streak += 1
+            self._easy_streak = 0
+            if self._late_streak >= self.overrun_frames and self.fps > self.min_fps:
+                self.fps = max(self.min_fps, self.fps * SLOWDOWN)
+                self.slowdowns += 1
+                self._late_streak = 0
+        else:
+            self._late_streak = 0
+            if render < budget / 2 and self.fps < self.target_fps:
+                self._easy_streak += 1
+                if self._easy_streak >= self.recover_frames:
+                    self.fps = min(self.target_fps, self.fps / SLOWDOWN)
+                    self._easy_streak = 0
+
+    def _hide(self, reason):
+        self.hidden.add(reason)
+        if self._after_id:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _show(self, reason):
+        if reason in self.hidden:
+            self.hidden.discard(reason)
+            self._schedule(0)
+
+    def _on_unmap(self, event):
+        if event.widget is self._top:
+            self._hide("unmapped")
+
+    def _on_map(self, event):
+        if event.widget is self._top:
+            self._show("unmapped")
+
+    def _on_visibility(self, event):
+        if event.state == "VisibilityFullyObscured":
+            self._hide("obscured")
+        else:
+            self._show("obscured")
+
+    def stats(self):
+        """Scheduler state and render times (ms) of the recent frames"""
+        times = sorted(self.frame_times)
+        return {
+            "running": self.callback is not None,
+            "paused": self.paused,
+            "hidden": sorted(self.hidden),
+            "target_fps": self.target_fps,
+            "fps": round(self.fps, 1),
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "slowdowns": self.slowdowns,
+            "mean_ms": sum(times) / len(times) if times else 0.0,
+            "p95_ms": times[int(len(times) * 0.95) - 1] if times else 0.0,
+            "max_ms": times[-1] if times else 0.0,
+        }
+
+    def summary(self):
+        """One-line description for the log"""
+        s = self.stats()
+        state = "paused (" + ", ".join(s["hidden"]) + ")" if s["paused"] else f"{s['fps']:g}/{s['target_fps']} fps"
+        return (f"{state}, {s['frames']} frames, render mean {s['mean_ms']:.1f} ms, "
+                f"p95 {s['p95_ms']:.1f} ms, {s['overruns']} overruns, {s['slowdowns']} slowdowns")
+
+
+# --- Sprite Cache ---
+
+def hex_rgb(color):
+    return tuple(int(color[i:i+2], 16) for i in (1, 3, 5))
+
+
+@functools.lru_cache(maxsize=4)
+def _pixel_geometry(width, height, center):
+    """Distance of every pixel center from ``center``, and each pixel's stipple bits"""
+    y, x = np.mgrid[0:height, 0:width]
+    distance = np.hypot(x + 0.5 - center[0], y + 0.5 - center[1]).astype(np.float32)
+    stipples = {
+        name: np.array(tile, dtype=bool)[y % 4, x % 4]
+        for name, tile in STIPPLES.items()
+    }
+    return x, y, distance, stipples
+
+
+def render_idle_frame(pulse_offset, width=500, height=500, center=CENTER):
+    """Rasterize the idle orb (everything but the sparkles) into an RGB array.
+
+    Every ring is a circle around ``center``, so instead of painting ~90
+    layers the last ring covering each pixel is found with one
+    searchsorted per stipple pattern.
+    """
+    x, y, distance, stipples = _pixel_geometry(width, height, center)
+    breath = 8 * math.sin(pulse_offset)
+    outer, mid, sphere = palette("outer_glow"), palette("mid_glow"), palette("idle_sphere")
+
+    # (radius, color, stipple) in drawing order, as in _draw_idle_body()
+    layers = [(165 + i * 4 + breath * 0.5, outer[i], "gray12") for i in range(35, 0, -1)]
+    layers += [(150 + i * 2.5 + breath * 0.8, mid[i], "gray25") for i in range(20, 0, -1)]
+    layers += [(140 - i * 3.8 + breath, sphere[i], None) for i in range(35, 0, -1)]
+    radii = np.array([radius for radius, _, _ in layers], dtype=np.float32)
+    # The background goes last so that index -1 picks it
+    colors = np.array([hex_rgb(color) for _, color, _ in layers] + [hex_rgb(BACKGROUND)], dtype=np.uint8)
+
+    # A pixel can only show stippled rings whose pattern bit is set there
+    g12, g25 = stipples["gray12"], stipples["gray25"]
+    pattern = g12.astype(np.int8) + 2 * g25.astype(np.int8)
+    layer = np.full((height, width), -1, dtype=np.int16)
+    for code in range(4):
+        pixels = pattern == code
+        if not pixels.any():
+            continue
+        allowed = np.array([stipple is None
+                            or (stipple == "gray12" and code & 1)
+                            or (stipple == "gray25" and code & 2)
+                            for _, _, stipple in layers])
+        indexes = np.flatnonzero(allowed)
+        # reach[k]: largest radius among allowed layers k.. (non-increasing),
+        # so the last layer covering distance d is the last k with reach[k] >= d
+        reach = np.maximum.accumulate(radii[indexes][::-1])[::-1]
+        last = np.searchsorted(-reach, -distance[pixels], side="right") - 1
+        layer[pixels] = np.where(last >= 0, indexes[np.maximum(last, 0)], -1)
+    image = colors[layer]
+
+    # Glass highlights on top, stippled like the rings
+    cx, cy = center
+    for (x0, y0, x1, y1), color in (((cx - 100, cy - 100, cx - 15, cy - 15), "#e0f2fe"),
+                                    ((cx - 80, cy - 80, cx - 30, cy - 30), "#f0f9ff")):
+        hx, hy, r = (x0 + x1) / 2, (y0 + y1) / 2, (x1 - x0) / 2
+        inside = np.hypot(x + 0.5 - hx, y + 0.5 - hy) <= r
+        image[inside & g12] = hex_rgb(color)
+    return image
+
+
+def ppm_data(image):
+    """Binary PPM for an RGB array, which tk.PhotoImage reads natively"""
+    height, width, _ = image.shape
+    return f"P6 {width} {height} 255\n".encode() + image.tobytes()
+
+
+class SpriteOrbRenderer(OrbRenderer):
+    """OrbRenderer that plays the idle breathing back from pre-rendered frames.
+
+    One breath cycle (2 pi of ``pulse_offset``) is rendered into ``frames``
+    images, capped by ``memory_mb`` (Tk keeps 4 bytes per pixel); each idle
+    tick swaps the image item's picture and moves the sparkles. The
+    speaking animation is unchanged.
+    """
+
+    def __init__(self, canvas, center=CENTER, frames=SPRITE_FRAMES, memory_mb=SPRITE_MEMORY_MB):
+        self.requested_frames = frames
+        self.memory_mb = memory_mb
+        super().__init__(canvas, center)
+
+    def _create_idle_body(self):
+        import tkinter as tk
+
+        width, height = int(self.canvas.cget("width")), int(self.canvas.cget("height"))
+        frame_bytes = width * height * 4
+        count = min(self.requested_frames, int(self.memory_mb * 1024 * 1024 // frame_bytes))
+        if count < 2:
+            raise ValueError(f"{self.memory_mb} MB holds fewer than 2 frames of {width}x{height}")
+
+        started = time.perf_counter()
+        self.sprites = [
+            tk.PhotoImage(master=self.canvas, format="PPM",
+                          data=ppm_data(render_idle_frame(2 * math.pi * k / count, width, height,
+                                                          (self.cx, self.cy))))
+            for k in range(count)
+        ]
+        self.render_seconds = time.perf_counter() - started
+        self.memory_bytes = count * frame_bytes
+        self._sprite = 0
+        self.sprite_item = self.canvas.create_image(0, 0, anchor="nw", image=self.sprites[0], tags=("idle",))
+
+    def _draw_idle_body(self, pulse_offset):
+        count = len(self.sprites)
+        index = int(round((pulse_offset % (2 * math.pi)) / (2 * math.pi) * count)) % count
+        if index != self._sprite:
+            self.canvas.itemconfigure(self.sprite_item, image=self.sprites[index])
+            self._sprite = index
+
+
+# --- Benchmark ---
+
+def draw_idle_immediate(canvas, pulse_offset=0):
+    """The previous draw_orb(): rebuild every item, kept for comparison"""
+    canvas.delete("all")
+    center_x, center_y = CENTER
+    breath = 8 * math.sin(pulse_offset)
+    for i in range(35, 0, -1):
+        radius = 165 + i * 4 + breath * 0.5
+        canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius,
+                           fill=blend_color("#1a1540", "#2a2055", i / 35), outline="", stipple="gray12")
+    for i in range(20, 0, -1):
+        radius = 150 + i * 2.5 + breath * 0.8
+        canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius,
+                           fill=blend_color("#2d2560", "#3d3580", i / 20), outline="", stipple="gray25")
+    for i in range(35, 0, -1):
+        radius = 140 - i * 3.8 + breath
+        canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius,
+                           fill=sphere_color(IDLE_SPHERE, i / 35), outline="")
+    canvas.create_oval(center_x - 100, center_y - 100, center_x - 15, center_y - 15,
+                       fill="#e0f2fe", outline="", stipple="gray12")
+    canvas.create_oval(center_x - 80, center_y - 80, center_x - 30, center_y - 30,
+                       fill="#f0f9ff", outline="", stipple="gray12")
+    sparkle_float = 4 * math.sin(pulse_offset * 0.9)
+    for x, y, size in ((center_x, center_y - 28 + sparkle_float, 40),
+                       (center_x - 33, center_y + 20 - sparkle_float * 0.6, 23),
+                       (center_x + 33, center_y + 15 + sparkle_float * 0.4, 19)):
+        canvas.create_text(x, y, text=SPARKLE, font=("Helvetica", size), fill="#ffffff")
+    canvas.create_oval(center_x - 140, center_y - 140, center_x + 140, center_y + 140, fill="", outline="")
+
+
+def draw_speaking_immediate(canvas, wave_offset, glow_offset):
+    """The previous animate_waves() frame: rebuild every item, kept for comparison"""
+    canvas.delete("all")
+    center_x, center_y = CENTER
+    for i in range(8):
+        phase = glow_offset + i * 0.5
+        radius = 180 + 28 * math.sin(phase)
+        canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius,
+                           fill="", outline=blend_color("#4f46e5", "#818cf8", i / 8),
+                           width=int(2 + 1.5 * math.sin(phase)), stipple="gray25")
+    pulse = 140 + 12 * math.sin(wave_offset * 1.2)
+    for i in range(35, 0, -1):
+        radius = pulse - i * 3.8
+        canvas.create_oval(center_x - radius, center_y - radius, center_x + radius, center_y + radius,
+                           fill=sphere_color(SPEAKING_SPHERE, i / 35), outline="")
+    for j in range(10):
+        angle = wave_offset * 0.9 + j * (2 * math.pi / 10)
+        distance = 115 + 15 * math.sin(wave_offset + j * 0.4)
+        x = center_x + distance * math.cos(angle)
+        y = center_y + distance * math.sin(angle)
+        size = 2 + 1.5 * math.sin(wave_offset * 1.3 + j)
+        canvas.create_oval(x - size - 1, y - size - 1, x + size + 1, y + size + 1, fill="#e0f2fe", outline="")
+        canvas.create_oval(x - size, y - size, x + size, y + size, fill="#ffffff", outline="")
+    sparkle_offset = wave_offset * 1.1
+    for x, y, size in ((center_x + 10 * math.sin(sparkle_offset), center_y - 28, 36),
+                       (center_x - 33, center_y + 20 + 5 * math.sin(sparkle_offset + 1.8), 21),
+                       (center_x + 33, center_y + 15 + 5 * math.sin(sparkle_offset + 3.2), 17)):
+        canvas.create_text(x, y, text=SPARKLE, font=("Helvetica", size), fill="#ffffff")
+
+
+def time_colors(repeat=2000):
+    """Microseconds per frame spent on ring colors: blend_color() vs palette lookups"""
+    def blended():
+        for i in range(35, 0, -1):
+            blend_color("#1a1540", "#2a2055", i / 35)
+        for i in range(20, 0, -1):
+            blend_color("#2d2560", "#3d3580", i / 20)
+        for i in range(35, 0, -1):
+            sphere_color(IDLE_SPHERE, i / 35)
+
+    def looked_up():
+        outer, mid, sphere = palette("outer_glow"), palette("mid_glow"), palette("idle_sphere")
+        for i in range(35, 0, -1):
+            outer[i]
+        for i in range(20, 0, -1):
+            mid[i]
+        for i in range(35, 0, -1):
+            sphere[i]
+
+    results = []
+    for fn in (blended, looked_up):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        results.append((time.perf_counter() - started) / repeat * 1e6)
+    return results
+
+
+def time_frames(canvas, draw, frames):
+    """Per-frame times in ms, including Tk's redraw of the canvas"""
+    times = []
+    for frame in range(frames):
+        started = time.perf_counter()
+        draw(frame)
+        canvas.update_idletasks()
+        times.append((time.perf_counter() - started) * 1000)
+    return sorted(times)
+
+
+def cpu_per_second(root, tick, seconds=5.0, interval_ms=33):
+    """Process CPU time per wall-clock second while ``tick`` runs every interval_ms"""
+    deadline = time.perf_counter() + seconds
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+
+    def step():
+        tick()
+        if time.perf_counter() < deadline:
+            root.after(interval_ms, step)
+        else:
+            root.quit()
+
+    root.after(interval_ms, step)
+    root.mainloop()
+    return (time.process_time() - started_cpu) / (time.perf_counter() - started_wall)
+
+
+def benchmark(frames=300, sprites=SPRITE_FRAMES, seconds=5.0):
+    blended, looked_up = time_colors()
+    print(f"Idle frame colors: blend_color {blended:.1f} us, lookup tables {looked_up:.1f} us")
+
+    try:
+        import tkinter as tk
+    except ImportError:
+        print("tkinter is not available; skipping frame times")
+        return
+
+    root = tk.Tk()
+    canvas = tk.Canvas(root, width=500, height=500, bg="#0a0118", highlightthickness=0)
+    canvas.pack()
+    root.update()
+
+    def report(name, times):
+        mean = sum(times) / len(times)
+        p95 = times[int(len(times) * 0.95) - 1]
+        print(f"{name:<28} mean {mean:6.2f} ms   p95 {p95:6.2f} ms   max {times[-1]:6.2f} ms")
+
+    print(f"{frames} frames per run")
+    report("idle, delete + recreate", time_frames(canvas, lambda f: draw_idle_immediate(canvas, f * 0.10), frames))
+    report("speaking, delete + recreate",
+           time_frames(canvas, lambda f: draw_speaking_immediate(canvas, f * 0.06, f * 0.04), frames))
+
+    canvas.delete("all")
+    renderer = OrbRenderer(canvas)
+    report("idle, retained", time_frames(canvas, lambda f: renderer.draw_idle(f * 0.10), frames))
+    report("speaking, retained",
+           time_frames(canvas, lambda f: renderer.draw_speaking(f * 0.06, f * 0.04), frames))
+
+    canvas.delete("all")
+    sprite_renderer = SpriteOrbRenderer(canvas, frames=sprites)
+    print(f"Sprites: {len(sprite_renderer.sprites)} frames rendered in "
+          f"{sprite_renderer.render_seconds:.2f}s, {sprite_renderer.memory_bytes / 2**20:.0f} MB")
+    report("idle, sprites", time_frames(canvas, lambda f: sprite_renderer.draw_idle(f * 0.10), frames))
+
+    # Idle animation at its real 30 fps: CPU seconds used per second
+    for name, make in (("retained", OrbRenderer),
+                       ("sprites", lambda c: SpriteOrbRenderer(c, frames=sprites))):
+        canvas.delete("all")
+        active = make(canvas)
+        offset = [0.0]
+
+        def tick(active=active):
+            offset[0] += 0.10
+            active.draw_idle(offset[0])
+            root.update_idletasks()
+
+        print(f"{'idle CPU, ' + name:<28} {cpu_per_second(root, tick, seconds) * 100:5.1f}% of a core")
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orb renderer frame-time benchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--sprites", type=int, default=SPRITE_FRAMES, help="sprite frames per breath cycle")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each CPU measurement")
+    args = parser.parse_args()
+    benchmark(args.frames, args.sprites, args.seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Cache of whole answers for prompts that keep coming back.
+
+The same handful of stories ("David and Goliath", "Noah's ark", "the
+prodigal son") used to cost a full ``generate_content`` call every time.
+``ResponseCache`` sits in front of the model: prompts are normalized (case,
+punctuation and filler words like "please tell me the story of" dropped)
+and keyed together with the model name and persona version, entries expire
+after a TTL, the least recently used go first when the cache is full, and
+the cache can be persisted to a JSON file between runs.
+
+Only prompts that start a conversation are looked up or stored; a
+follow-up's answer depends on what came before it.
+"""
+
+import collections
+import json
+import os
+import re
+import threading
+import time
+
+# Answers kept, and how long they stay valid
+CACHE_ENTRIES = 256
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Words that don't change which story is being asked for
+FILLER_WORDS = frozenset("""
+    a an and the please um uh er hmm hey bible ok okay so well just now
+    can could would will you me us i tell give read say narrate about story stories of
+""".split())
+
+
+def normalize_prompt(prompt):
+    """Lowercase words of ``prompt`` without punctuation or filler words"""
+    words = re.findall(r"[a-z0-9]+", prompt.lower().replace("'", "").replace("’", ""))
+    kept = [word for word in words if word not in FILLER_WORDS]
+    return " ".join(kept or words)
+
+
+class CachedResponse:
+    """A cached answer shaped like a (streamed) generate_content response"""
+
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        yield self
+
+
+class ResponseCache:
+    """LRU cache of answers keyed on normalized prompt, model and persona version.
+
+    With ``path`` set, entries are loaded from and saved to that JSON file.
+    """
+
+    def __init__(self, capacity=CACHE_ENTRIES, ttl=CACHE_TTL_SECONDS, path=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.saved_seconds = 0.0  # waiting for the model that hits avoided
+        self.lookup_seconds = 0.0
+        self._entries = collections.OrderedDict()  # key -> {"text", "created", "seconds"}
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @staticmethod
+    def key(prompt, model_name, persona_version):
+        return f"{model_name}\0{persona_version}\0{normalize_prompt(prompt)}"
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, prompt, model_name, persona_version):
+        """CachedResponse for ``prompt``, or None"""
+        started = time.perf_counter()
+        key = self.key(prompt, model_name, persona_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created"] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry["seconds"]
+            self.lookup_seconds += time.perf_counter() - started
+        return CachedResponse(entry["text"]) if entry else None
+
+    def put(self, prompt, model_name, persona_version, text, seconds=0.0):
+        """Store the answer to ``prompt``; ``seconds`` is how long the listener waited for it"""
+        if not text:
+            return
+        with self._lock:
+            key = self.key(prompt, model_name, persona_version)
+            self._entries.pop(key, None)
+            self._entries[key] = {"text": text, "created": time.time(), "seconds": seconds}
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Response cache {self.path} unreadable, starting empty: {e}")
+            return
+        entries = saved.get("entries") if isinstance(saved, dict) else None
+        if not isinstance(entries, list):
+            print(f"Response cache {self.path} has no entry list, starting empty")
+            return
+        entries = [entry for entry in entries if self._valid(entry)]
+        if len(entries) < len(saved["entries"]):
+            print(f"Response cache {self.path}: skipped {len(saved['entries']) - len(entries)} malformed entries")
+        now = time.time()
+        for entry in entries[-self.capacity:]:  # saved oldest first
+            if now - entry["created"] <= self.ttl:
+                self._entries[entry["key"]] = {k: entry[k] for k in ("text", "created", "seconds")}
+
+    @staticmethod
+    def _valid(entry):
+        number = lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+        return (isinstance(entry, dict) and isinstance(entry.get("key"), str)
+                and isinstance(entry.get("text"), str)
+                and number(entry.get("created")) and number(entry.get("seconds")))
+
+    def _save(self):
+        temp = self.path + ".tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump({"entries": [dict(entry, key=key) for key, entry in self._entries.items()]}, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            print(f"Response cache save failed: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "expired": self.expired,
+            "lookup_us": self.lookup_seconds / lookups * 1e6 if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def summary(self):
+        """One-line description for the log"""
+        s = self.stats()
+        return (f"{s['hits']}/{s['hits'] + s['misses']} hits ({s['hit_rate']:.0%}), "
+                f"{s['entries']} answers, lookup {s['lookup_us']:.0f} us, "
+                f"{s['saved_seconds']:.1f}s of waiting saved")
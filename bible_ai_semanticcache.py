@@ -0,0 +1,376 @@
+"""Answers for prompts that mean the same thing, worded differently.
+
+The answer cache (bible_ai_responsecache) only matches prompts that
+normalize to the same words, but spoken prompts rarely repeat word for
+word: "tell me about Jonah and the whale" and "the story of Jonah in the
+big fish" should share an answer. ``SemanticCache`` embeds each prompt
+into a vector, keeps the vectors of answered prompts as rows of a NumPy
+matrix, and serves the stored answer whose prompt is most similar (cosine)
+when that similarity clears a threshold.
+
+Embedders: ``SentenceTransformerEmbedder`` runs a small local CPU model
+when sentence-transformers is installed; ``HashingEmbedder`` needs nothing
+but NumPy and hashes words, crude stems, word pairs (so "Cain killed Abel"
+differs from "Abel killed Cain") and character trigrams into a fixed
+number of dimensions. However close two prompts look, a cached answer is
+only served when both name the same people.
+
+Benchmark lookup latency:
+
+    python bible_ai_semanticcache.py bench --sizes 10000 100000
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+
+from bible_ai_responsecache import CachedResponse, normalize_prompt
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+# Prompts remembered, and how long their answers stay valid
+CACHE_ENTRIES = 10000
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+# Cosine similarity a stored prompt needs to count as the same question
+SIMILARITY_THRESHOLD = 0.9
+# Dimensions of hashed prompt vectors
+HASHING_DIMENSIONS = 256
+# Weight of character trigrams next to whole words (helps with misheard words)
+TRIGRAM_WEIGHT = 0.3
+# Weight of consecutive word pairs, which carry word order
+BIGRAM_WEIGHT = 1.0
+
+# Words that don't change which story is being asked for, on top of the answer cache's
+EXTRA_FILLER_WORDS = frozenset("""
+    in on at to with from what was is who how did does happened happen big great
+""".split())
+# Different words for the same thing in stories people ask for
+SYNONYMS = {
+    "whale": "fish",
+    "boat": "ark",
+    "flood": "ark",
+    "lions": "lion",
+    "den": "lion",
+    "giant": "goliath",
+    "jesus": "christ",
+    "born": "birth",
+    "nativity": "birth",
+    "crucifixion": "cross",
+    "crucified": "cross",
+    "resurrection": "risen",
+}
+
+
+# People a question can be about; two prompts naming different ones never share an answer
+NAMES = frozenset("""
+    abraham sarah hagar ishmael isaac rebekah jacob esau rachel leah joseph moses aaron miriam pharaoh
+    joshua rahab gideon samson delilah ruth naomi boaz hannah eli samuel saul jonathan david goliath
+    bathsheba absalom nathan solomon elijah elisha jezebel ahab jonah daniel esther mordecai job isaiah
+    jeremiah ezekiel nehemiah noah adam eve cain abel seth lot christ mary martha lazarus peter paul
+    john matthew luke mark thomas judas pilate herod barabbas nicodemus zacchaeus stephen timothy
+""".split())
+
+
+def _stem(word):
+    return word[:-1] if len(word) > 4 and word.endswith("s") else word
+
+
+def prompt_words(prompt):
+    """Words of ``prompt`` that say what is being asked about, with synonyms folded together"""
+    words = [_stem(SYNONYMS.get(word, word)) for word in normalize_prompt(prompt).split()
+             if word not in EXTRA_FILLER_WORDS]
+    return list(dict.fromkeys(words))  # "lions den" folds to "lion" once
+
+
+def key_words(prompt):
+    """People named in ``prompt``: known names, and words capitalized after the first"""
+    words = set(prompt_words(prompt))
+    capitalized = re.findall(r"(?<=\s)[A-Z][A-Za-z'’]*", prompt.strip())
+    named = {_stem(SYNONYMS.get(word, word)) for word in normalize_prompt(" ".join(capitalized)).split()}
+    return frozenset(word for word in words if word in NAMES or word in named)
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words, word pairs and character trigrams, L2-normalized"""
+
+    name = "hashing"
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS, trigram_weight=TRIGRAM_WEIGHT,
+                 bigram_weight=BIGRAM_WEIGHT):
+        self.dimensions = dimensions
+        self.trigram_weight = trigram_weight
+        self.bigram_weight = bigram_weight
+        self._features = {}  # feature -> (index, sign), since prompts reuse few words
+
+    def _feature(self, feature):
+        cached = self._features.get(feature)
+        if cached is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            cached = (value % self.dimensions, 1.0 if value >> 63 else -1.0)
+            if len(self._features) < 100000:
+                self._features[feature] = cached
+        return cached
+
+    def embed(self, prompts):
+        """Matrix with one unit-length row per prompt"""
+        vectors = np.zeros((len(prompts), self.dimensions), dtype=np.float32)
+        for row, prompt in enumerate(prompts):
+            words = prompt_words(prompt)
+            for word in words:
+                index, sign = self._feature(word)
+                vectors[row, index] += sign
+                padded = f"#{word}#"
+                for start in range(len(padded) - 2):
+                    index, sign = self._feature(padded[start:start + 3])
+                    vectors[row, index] += sign * self.trigram_weight
+            for first, second in zip(words, words[1:]):
+                index, sign = self._feature(f"{first} {second}")
+                vectors[row, index] += sign * self.bigram_weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model run locally on the CPU"""
+
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise RuntimeError("sentence-transformers is not installed")
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, prompts):
+        return self.model.encode(list(prompts), normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder(name="hashing"):
+    """Embedder by name: "hashing", or a sentence-transformers model; hashing if that can't load"""
+    if name in (None, "hashing"):
+        return HashingEmbedder()
+    try:
+        return SentenceTransformerEmbedder(name)
+    except Exception as e:
+        print(f"Embedding model '{name}' unavailable, hashing prompts instead: {e}")
+        return HashingEmbedder()
+
+
+class SemanticCache:
+    """Answers looked up by prompt similarity, kept as rows of a vector matrix.
+
+    Rows are only compared with rows stored for the same model and persona
+    version. When full, the least recently used row is overwritten.
+    """
+
+    def __init__(self, embedder=None, threshold=SIMILARITY_THRESHOLD, capacity=CACHE_ENTRIES,
+                 ttl=CACHE_TTL_SECONDS):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.lookup_seconds = 0.0
+        self.last_similarity = None
+        self._vectors = np.zeros((min(capacity, 1024), self.embedder.dimensions), dtype=np.float32)
+        self._versions = np.zeros(len(self._vectors), dtype=np.int32)  # index into _version_ids
+        self._created = np.zeros(len(self._vectors))
+        self._used = np.zeros(len(self._vectors))
+        self._answers = []  # (prompt, text, seconds, key words) per row
+        self._version_ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._answers)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _version(self, model_name, persona_version):
+        return self._version_ids.setdefault((model_name, persona_version), len(self._version_ids) + 1)
+
+    def _scores(self, vectors, version):
+        """Similarity of each query vector to every live row for ``version``"""
+        count = len(self._answers)
+        scores = vectors @ self._vectors[:count].T
+        stale = (self._versions[:count] != version) | (time.time() - self._created[:count] > self.ttl)
+        scores[:, stale] = -1.0
+        return scores
+
+    def _closest(self, vectors, version):
+        """(row, similarity) of the closest row for each query vector; call with _lock held"""
+        if not self._answers:
+            return [(None, -1.0)] * len(vectors)
+        scores = self._scores(vectors, version)
+        best = scores.argmax(axis=1)
+        return [(int(row), float(scores[i, row])) for i, row in enumerate(best)]
+
+    def search(self, prompts, model_name, persona_version):
+        """(row, similarity) of the closest stored prompt for each of ``prompts``; row is None when empty"""
+        vectors = self.embedder.embed(prompts)
+        with self._lock:
+            return self._closest(vectors, self._version(model_name, persona_version))
+
+    def get(self, prompt, model_name, persona_version):
+        """CachedResponse for a prompt similar enough to ``prompt``, or None"""
+        started = time.perf_counter()
+        vectors = self.embedder.embed([prompt])
+        words = key_words(prompt)
+        # The row is read under the same lock as the search, so put_many() can't reuse it in between
+        with self._lock:
+            (row, similarity), = self._closest(vectors, self._version(model_name, persona_version))
+            self.last_similarity = similarity if row is not None else None
+            hit = (row is not None and similarity >= self.threshold
+                   and self._answers[row][3] == words)
+            if hit:
+                _, text, seconds, _ = self._answers[row]
+                self._used[row] = time.monotonic()
+                self.hits += 1
+                self.saved_seconds += seconds
+            else:
+                self.misses += 1
+            self.lookup_seconds += time.perf_counter() - started
+        return CachedResponse(text) if hit else None
+
+    def put(self, prompt, model_name, persona_version, text, seconds=0.0):
+        """Store the answer to ``prompt``; ``seconds`` is how long the listener waited for it"""
+        if text:
+            self.put_many([prompt], model_name, persona_version, [text], [seconds])
+
+    def put_many(self, prompts, model_name, persona_version, texts, seconds=None):
+        vectors = self.embedder.embed(prompts)
+        now = time.time()
+        with self._lock:
+            version = self._version(model_name, persona_version)
+            for i, vector in enumerate(vectors):
+                row = self._free_row()
+                self._vectors[row] = vector
+                self._versions[row] = version
+                self._created[row] = now
+                self._used[row] = time.monotonic()
+                answer = (prompts[i], texts[i], seconds[i] if seconds else 0.0, key_words(prompts[i]))
+                if row == len(self._answers):
+                    self._answers.append(answer)
+                else:
+                    self._answers[row] = answer
+
+    def _free_row(self):
+        count = len(self._answers)
+        if count < self.capacity:
+            if count == len(self._vectors):
+                grown = min(self.capacity, count * 2)
+                self._vectors = np.resize(self._vectors, (grown, self._vectors.shape[1]))
+                self._versions = np.resize(self._versions, grown)
+                self._created = np.resize(self._created, grown)
+                self._used = np.resize(self._used, grown)
+            return count
+        return int(self._used[:count].argmin())
+
+    def clear(self):
+        with self._lock:
+            self._answers = []
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._answers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "lookup_us": self.lookup_seconds / lookups * 1e6 if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "last_similarity": self.last_similarity,
+        }
+
+    def summary(self):
+        """One-line description for the log"""
+        s = self.stats()
+        closest = f", closest {s['last_similarity']:.2f}" if s["last_similarity"] is not None else ""
+        return (f"{s['hits']}/{s['hits'] + s['misses']} hits ({s['hit_rate']:.0%}) at "
+                f"similarity >= {self.threshold:.2f}{closest}, {s['entries']} prompts "
+                f"({self.embedder.name}), lookup {s['lookup_us']:.0f} us")
+
+
+# Vocabulary for synthetic benchmark prompts
+BENCH_OPENERS = ["tell me about", "the story of", "what happened to", "who was", "read me", "explain"]
+BENCH_NAMES = sorted(NAMES)
+BENCH_THINGS = """ark flood fish lion den giant sling coat dream famine plague sea wall trumpet
+    fire chariot whirlwind well tent temple garden tree serpent tower rainbow manger star shepherd
+    parable sower vineyard feast wedding storm boat net bread wine cross tomb stone""".split()
+
+
+def bench_prompts(count, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(BENCH_OPENERS)} {rng.choice(BENCH_NAMES)} and the {rng.choice(BENCH_THINGS)} "
+            f"{rng.choice(BENCH_NAMES)} {rng.randrange(1000)}" for _ in range(count)]
+
+
+def bench(sizes, queries=200, batch=64, embedder_name="hashing"):
+    """Report single and batched lookup latency with caches of each size"""
+    embedder = create_embedder(embedder_name)
+    probes = bench_prompts(queries, seed=1)
+    for size in sizes:
+        cache = SemanticCache(embedder, capacity=size)
+        started = time.perf_counter()
+        prompts = bench_prompts(size)
+        for start in range(0, size, 1000):
+            chunk = prompts[start:start + 1000]
+            cache.put_many(chunk, "bench", "v", chunk)
+        fill_seconds = time.perf_counter() - started
+
+        timings = []
+        for prompt in probes:
+            started = time.perf_counter()
+            cache.get(prompt, "bench", "v")
+            timings.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for start in range(0, queries, batch):
+            cache.search(probes[start:start + batch], "bench", "v")
+        batched = (time.perf_counter() - started) / queries
+
+        timings = np.array(timings) * 1000
+        megabytes = cache._vectors.nbytes / 1024 / 1024
+        print(f"{size:>7} prompts ({embedder.name}, {embedder.dimensions} dims, {megabytes:.0f} MB): "
+              f"lookup p50 {np.percentile(timings, 50):.2f} ms, p99 {np.percentile(timings, 99):.2f} ms, "
+              f"batched {batched * 1000:.3f} ms/prompt; filled in {fill_seconds:.1f}s")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Semantic answer cache tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench", help="benchmark lookup latency")
+    bench_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    bench_parser.add_argument("--queries", type=int, default=200)
+    bench_parser.add_argument("--batch", type=int, default=64)
+    bench_parser.add_argument("--model", default="hashing",
+                              help="'hashing' or a sentence-transformers model name")
+    compare_parser = commands.add_parser("compare", help="similarity of two prompts")
+    compare_parser.add_argument("prompts", nargs=2)
+    compare_parser.add_argument("--model", default="hashing")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        vectors = create_embedder(args.model).embed(args.prompts)
+        print(f"{float(vectors[0] @ vectors[1]):.3f}")
+        return 0
+    return bench(args.sizes, args.queries, args.batch, args.model)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Sentence-by-sentence streaming of Gemini responses into speech.
+
+The listener used to wait for the whole story before speaking. Here the
+response is consumed incrementally, cut at sentence boundaries and handed
+to the speaker while later sentences are still being generated.
+"""
+
+import queue
+import re
+import threading
+import time
+
+# End of a sentence: terminal punctuation, optional closing quotes or
+# brackets, then whitespace. Requiring the whitespace keeps "3:16." style
+# references and half-received chunks from being cut too early.
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\'”’)\]]*\s+|\n\s*\n')
+
+# Very short fragments ("Dr.", "Behold!") are merged with the next sentence
+MIN_SENTENCE_CHARS = 24
+
+_END_OF_STREAM = object()
+
+
+def chunk_text(chunk):
+    """Return the text of a streamed response chunk, or '' if it has none"""
+    try:
+        return chunk.text or ""
+    except (ValueError, AttributeError):
+        # Chunks without text parts (e.g. a final safety chunk) raise here
+        return ""
+
+
+def split_sentences(chunks, min_chars=MIN_SENTENCE_CHARS):
+    """Yield complete sentences from an iterable of text chunks as soon as they end"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        search_from = 0
+        while True:
+            match = SENTENCE_BOUNDARY.search(buffer, search_from)
+            if not match:
+                break
+            if match.end() < min_chars:
+                search_from = match.end()
+                continue
+            sentence = buffer[:match.end()].strip()
+            buffer = buffer[match.end():]
+            search_from = 0
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+class StreamStats:
+    """Timing of one streamed response, all times from time.perf_counter()"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_chunk_at = None
+        self.first_audio_at = None
+        self.finished_at = None
+        self.sentences = 0
+        self.chars = 0
+        self.interrupted = False
+
+    @property
+    def time_to_first_chunk(self):
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.started_at
+
+    @property
+    def time_to_first_audio(self):
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+    @property
+    def total_time(self):
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def summary(self):
+        """One-line description for the log"""
+        def fmt(value):
+            return "n/a" if value is None else f"{value:.2f}s"
+        return (f"first chunk {fmt(self.time_to_first_chunk)}, "
+                f"first audio {fmt(self.time_to_first_audio)}, "
+                f"total {fmt(self.total_time)}, "
+                f"{self.sentences} sentences")
+
+
+def speak_stream(response, say_sentence, on_start=None, is_interrupted=None, on_chunk=None,
+                 prepare=None):
+    """Speak a streamed response sentence by sentence while it is still generating.
+
+    ``response`` is the iterable returned by
+    ``model.generate_content(prompt, stream=True)``. Chunks are read on a
+    producer thread; sentences are spoken on the calling thread through
+    ``say_sentence``. ``on_start`` runs right before the first sentence is
+    spoken, ``is_interrupted`` is polled after each spoken sentence,
+    ``on_chunk`` receives every raw text chunk as it arrives and
+    ``prepare`` is called on the producer thread with each sentence as soon
+    as it is complete, so its synthesis can overlap earlier playback.
+
+    Returns ``(full_text, stats)``. Errors raised by the model stream are
+    re-raised here.
+    """
+    stats = StreamStats()
+    sentences = queue.Queue()
+    stop = threading.Event()
+    received = []
+
+    def produce():
+        def texts():
+            for chunk in response:
+                if stop.is_set():
+                    return
+                text = chunk_text(chunk)
+                if not text:
+                    continue
+                if stats.first_chunk_at is None:
+                    stats.first_chunk_at = time.perf_counter()
+                received.append(text)
+                if on_chunk:
+                    on_chunk(text)
+                yield text
+
+        try:
+            for sentence in split_sentences(texts()):
+                if prepare:
+                    prepare(sentence)
+                sentences.put(sentence)
+        except Exception as e:
+            sentences.put(e)
+        finally:
+            sentences.put(_END_OF_STREAM)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = sentences.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if stats.first_audio_at is None:
+                if on_start:
+                    on_start()
+                stats.first_audio_at = time.perf_counter()
+            stats.sentences += 1
+            say_sentence(item)
+            if is_interrupted and is_interrupted():
+                stats.interrupted = True
+                break
+    finally:
+        stop.set()
+        stats.finished_at = time.perf_counter()
+
+    full_text = "".join(received)
+    stats.chars = len(full_text)
+    return full_text, stats
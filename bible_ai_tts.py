@@ -0,0 +1,559 @@
+"""Pluggable text-to-speech backends.
+
+``say_text()`` used to write every sentence to a temporary file and run
+``say -f`` on it, which only works on macOS. A ``TTSBackend`` turns text
+into speech without touching the filesystem: ``SayBackend`` pipes the text
+to macOS ``say`` on stdin, ``EspeakBackend`` pipes it to espeak-ng/espeak
+and reads the WAV back from stdout, and ``PCMFileSink`` appends raw PCM to
+a file so speech can be checked without a sound card.
+
+Backends that return PCM are played in-process (PyAudio, or ``aplay`` on
+Linux without it). ``Speaker`` synthesizes sentences queued with
+``prepare()`` on a background thread, so the next sentence is ready by the
+time the current one has finished playing.
+
+Try a backend from the command line:
+
+    python bible_ai_tts.py --backend espeak "In the beginning God created the heaven and the earth."
+"""
+
+import argparse
+import array
+import collections
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+
+# Backends tried by create_backend("auto"), in order
+AUTO_BACKENDS = ("say", "espeak")
+
+# PCM written to the output device per write; bounds how long stop() takes
+PLAY_BLOCK_SECONDS = 0.05
+
+# How often a directly speaking process is checked for stop()
+POLL_SECONDS = 0.02
+
+# Direct backends render a text into the audio cache once it was asked for this often
+CACHE_AFTER_MISSES = 2
+
+
+class PCMAudio:
+    """Signed little-endian PCM samples and their format"""
+
+    def __init__(self, data, sample_rate, sample_width=2, channels=1):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+
+    @property
+    def frame_bytes(self):
+        return self.sample_width * self.channels
+
+    @property
+    def duration(self):
+        return len(self.data) / (self.frame_bytes * self.sample_rate)
+
+
+def parse_wav(data):
+    """PCMAudio from WAV bytes.
+
+    Streamed WAV (espeak --stdout) carries placeholder chunk sizes, so the
+    data chunk is taken to run to the end of the input.
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV stream")
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id, size = data[offset:offset + 4], struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", data[body:body + 16])
+            fmt = (sample_rate, bits // 8, channels)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data before format chunk")
+            sample_rate, sample_width, channels = fmt
+            end = min(len(data), body + size)
+            frame = sample_width * channels
+            end -= (end - body) % frame
+            return PCMAudio(data[body:end], sample_rate, sample_width, channels)
+        offset = body + size + (size & 1)
+    raise ValueError("WAV stream has no data chunk")
+
+
+class PCMPlayer:
+    """Plays PCMAudio in short blocks so playback can be cut off quickly.
+
+    Uses PyAudio when it is installed, otherwise pipes the samples into
+    ``aplay``.
+    """
+
+    def __init__(self, block_seconds=PLAY_BLOCK_SECONDS):
+        self.block_seconds = block_seconds
+        self._pyaudio = None
+
+    @staticmethod
+    def available():
+        return PYAUDIO_AVAILABLE or shutil.which("aplay") is not None
+
+    def play(self, audio, stopped, on_block=None):
+        """Play ``audio``; returns False if ``stopped()`` cut it short.
+
+        ``on_block(audio, data)`` is called with each block as it goes out.
+        """
+        block = max(1, int(audio.sample_rate * self.block_seconds)) * audio.frame_bytes
+        if PYAUDIO_AVAILABLE:
+            return self._play_pyaudio(audio, block, stopped, on_block)
+        return self._play_aplay(audio, block, stopped, on_block)
+
+    def _play_pyaudio(self, audio, block, stopped, on_block):
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        stream = self._pyaudio.open(
+            format=self._pyaudio.get_format_from_width(audio.sample_width),
+            channels=audio.channels, rate=audio.sample_rate, output=True)
+        try:
+            for start in range(0, len(audio.data), block):
+                if stopped():
+                    return False
+                if on_block:
+                    on_block(audio, audio.data[start:start + block])
+                stream.write(audio.data[start:start + block])
+            return True
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def _play_aplay(self, audio, block, stopped, on_block):
+        formats = {1: "U8", 2: "S16_LE", 4: "S32_LE"}
+        process = subprocess.Popen(
+            ["aplay", "-q", "-t", "raw", "-f", formats[audio.sample_width],
+             "-r", str(audio.sample_rate), "-c", str(audio.channels), "-"],
+            stdin=subprocess.PIPE)
+        try:
+            for start in range(0, len(audio.data), block):
+                if stopped():
+                    return False
+                if on_block:
+                    on_block(audio, audio.data[start:start + block])
+                process.stdin.write(audio.data[start:start + block])
+            process.stdin.close()
+            return wait_process(process, stopped)
+        except BrokenPipeError:
+            return False
+        finally:
+            stop_process(process)
+
+    def close(self):
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+
+
+def wait_process(process, stopped):
+    """Wait for ``process`` to exit; False if ``stopped()`` turned true first"""
+    while True:
+        try:
+            process.wait(timeout=POLL_SECONDS)
+            return True
+        except subprocess.TimeoutExpired:
+            if stopped():
+                return False
+
+
+def stop_process(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=0.5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class TTSBackend:
+    """Turns text into speech.
+
+    PCM backends implement ``synthesize(text)`` and are played by
+    ``play()``; backends that talk to the speakers themselves set
+    ``direct = True`` and implement ``speak(text, stopped)``, and may still
+    implement ``synthesize()`` so their speech can be cached.
+    """
+
+    name = None
+    direct = False
+
+    def __init__(self, voice=None, rate=None):
+        self.voice = voice
+        self.rate = rate  # words per minute
+        self.player = PCMPlayer()
+        self.on_block = None  # called with every block of PCM played, see PCMPlayer.play()
+
+    @classmethod
+    def available(cls):
+        return True
+
+    @property
+    def can_synthesize(self):
+        return type(self).synthesize is not TTSBackend.synthesize
+
+    def synthesize(self, text):
+        raise NotImplementedError
+
+    def play(self, audio, stopped):
+        return self.player.play(audio, stopped, self.on_block)
+
+    def speak(self, text, stopped):
+        """Speak ``text``; returns False if ``stopped()`` cut it short"""
+        return self.play(self.synthesize(text), stopped)
+
+    def close(self):
+        self.player.close()
+
+
+class SayBackend(TTSBackend):
+    """macOS ``say``, with the text written to its stdin"""
+
+    name = "say"
+    direct = True
+
+    @classmethod
+    def available(cls):
+        return shutil.which("say") is not None
+
+    @property
+    def can_synthesize(self):
+        # Rendered speech is played through PCMPlayer, which stock macOS lacks without PyAudio
+        return PCMPlayer.available()
+
+    def command(self):
+        command = ["say"]
+        if self.voice:
+            command += ["-v", self.voice]
+        if self.rate:
+            command += ["-r", str(self.rate)]
+        return command
+
+    def speak(self, text, stopped):
+        process = subprocess.Popen(self.command(), stdin=subprocess.PIPE)
+        try:
+            process.stdin.write(text.encode("utf-8"))
+            process.stdin.close()
+            return wait_process(process, stopped)
+        except BrokenPipeError:
+            return False
+        finally:
+            stop_process(process)
+
+    def synthesize(self, text):
+        """Render to PCM for the audio cache; say can only write it to a file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "speech.wav")
+            subprocess.run(self.command() + ["-o", path, "--file-format=WAVE", "--data-format=LEI16@22050"],
+                           input=text.encode("utf-8"), check=True)
+            with open(path, "rb") as f:
+                return parse_wav(f.read())
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (or espeak), text on stdin and WAV on stdout"""
+
+    name = "espeak"
+
+    @classmethod
+    def executable(cls):
+        return shutil.which("espeak-ng") or shutil.which("espeak")
+
+    @classmethod
+    def available(cls):
+        return cls.executable() is not None and PCMPlayer.available()
+
+    def synthesize(self, text):
+        command = [self.executable(), "--stdin", "--stdout"]
+        if self.voice:
+            command += ["-v", self.voice]
+        if self.rate:
+            command += ["-s", str(self.rate)]
+        result = subprocess.run(command, input=text.encode("utf-8"),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        return parse_wav(result.stdout)
+
+
+class PCMFileSink(TTSBackend):
+    """Appends raw PCM to a file instead of playing it; for tests.
+
+    Speech comes from ``source`` (another backend) if given, otherwise a
+    short tone per word is generated. With ``realtime`` set, play() takes
+    as long as the audio would.
+    """
+
+    name = "pcm"
+
+    def __init__(self, voice=None, rate=None, path="tts_output.pcm", source=None,
+                 realtime=False, sample_rate=16000):
+        super().__init__(voice, rate)
+        self.path = path
+        self.source = source
+        self.realtime = realtime
+        self.sample_rate = sample_rate
+        self.played = 0
+
+    def synthesize(self, text):
+        if self.source is not None:
+            return self.source.synthesize(text)
+        words = max(1, len(text.split()))
+        count = int(self.sample_rate * 0.06)
+        tone = array.array("h", (int(8000 * math.sin(2 * math.pi * 440 * i / self.sample_rate))
+                                 for i in range(count)))
+        data = (tone.tobytes() + bytes(count)) * words  # tone, then half as long of silence
+        return PCMAudio(data, self.sample_rate)
+
+    def play(self, audio, stopped):
+        block = max(1, int(audio.sample_rate * PLAY_BLOCK_SECONDS)) * audio.frame_bytes
+        with open(self.path, "ab") as f:
+            for start in range(0, len(audio.data), block):
+                if stopped():
+                    return False
+                if self.on_block:
+                    self.on_block(audio, audio.data[start:start + block])
+                f.write(audio.data[start:start + block])
+                if self.realtime:
+                    time.sleep(PLAY_BLOCK_SECONDS)
+        self.played += 1
+        return True
+
+
+BACKENDS = {
+    "say": SayBackend,
+    "espeak": EspeakBackend,
+    "pcm": PCMFileSink,
+}
+
+
+def create_backend(name="auto", voice=None, rate=None, **options):
+    """Backend by name, or the first available one for "auto"; None if there is none"""
+    if name == "auto":
+        for candidate in AUTO_BACKENDS:
+            if BACKENDS[candidate].available():
+                return BACKENDS[candidate](voice, rate, **options)
+        print("No text-to-speech backend found; install espeak-ng to hear responses")
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    backend = BACKENDS[name]
+    if not backend.available():
+        print(f"TTS backend '{name}' is not available on this system")
+        return None
+    return backend(voice, rate, **options)
+
+
+class Speaker:
+    """Speaks text through a backend; safe to stop from any thread.
+
+    ``prepare(text)`` starts synthesizing a sentence in the background, so
+    a later ``say(text)`` only has to play it. With an AudioCache
+    (bible_ai_audiocache), synthesized audio is reused: PCM backends store
+    everything they synthesize, direct backends render a text into the
+    cache once it has been asked for CACHE_AFTER_MISSES times.
+    """
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache if backend is not None and backend.can_synthesize else None
+        self.utterances = 0
+        self.synth_seconds = 0.0  # time spent synthesizing
+        self.wait_seconds = 0.0  # time say() waited for synthesis to finish
+        self.play_seconds = 0.0
+        self._generation = 0  # bumped by stop()
+        self._prepared = collections.deque()  # (text, generation, future)
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+
+    @property
+    def name(self):
+        return self.backend.name if self.backend else "none"
+
+    def _synthesize(self, text):
+        started = time.perf_counter()
+        try:
+            return self.backend.synthesize(text)
+        finally:
+            self.synth_seconds += time.perf_counter() - started
+
+    def _audio(self, text):
+        """PCM for ``text``, cached or freshly synthesized; None when a direct backend should speak it"""
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_for(text, self.backend)
+            audio = self.cache.get(key)
+            if audio is not None:
+                return audio
+        if self.backend.direct:
+            if key is not None and self.cache.times_missed(key) >= CACHE_AFTER_MISSES:
+                self._executor.submit(self._fill, text, key)
+            return None
+        audio = self._synthesize(text)
+        if key is not None:
+            self.cache.put(key, audio)
+        return audio
+
+    def _fill(self, text, key):
+        if key in self.cache:
+            return
+        try:
+            self.cache.put(key, self._synthesize(text))
+        except Exception as e:
+            print(f"Audio cache fill failed ({self.name}): {e}")
+
+    def warm(self, texts):
+        """Synthesize ``texts`` into the cache in the background, skipping cached ones"""
+        if self.cache is None:
+            return
+        for text in texts:
+            self._executor.submit(self._fill, text, self.cache.key_for(text, self.backend))
+
+    def prepare(self, text, generation=None):
+        """Start synthesizing ``text`` ahead of its say(); safe from any thread.
+
+        With ``generation`` (see preparer()), nothing is prepared once stop()
+        has been called since.
+        """
+        if self.backend is None or (self.backend.direct and self.cache is None):
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._prepared.append((text, self._generation, self._executor.submit(self._audio, text)))
+
+    def preparer(self):
+        """prepare() for one reply: it stops preparing when that reply is stopped"""
+        generation = self._generation
+        return lambda text: self.prepare(text, generation)
+
+    def _take_prepared(self, text):
+        with self._lock:
+            # Anything from before the last stop() will never be spoken
+            while self._prepared and self._prepared[0][1] != self._generation:
+                self._prepared.popleft()[2].cancel()
+            for i, (prepared, _, future) in enumerate(self._prepared):
+                if prepared == text:
+                    del self._prepared[i]
+                    return future
+        return None
+
+    def say(self, text):
+        """Speak ``text`` and block until done; False if stop() cut it short"""
+        if self.backend is None or not text.strip():
+            return True
+        generation = self._generation
+        stopped = lambda: self._generation != generation
+        self._idle.clear()
+        try:
+            started = time.perf_counter()
+            future = self._take_prepared(text)
+            audio = future.result() if future else self._audio(text)
+            self.wait_seconds += time.perf_counter() - started
+            if stopped():
+                return False
+            started = time.perf_counter()
+            if audio is None:
+                finished = self.backend.speak(text, stopped)
+            else:
+                finished = self._play(text, audio, stopped)
+            self.play_seconds += time.perf_counter() - started
+            self.utterances += 1
+            return finished
+        except Exception as e:
+            print(f"Speech error ({self.name}): {e}")
+            return False
+        finally:
+            self._idle.set()
+
+    def _play(self, text, audio, stopped):
+        if not self.backend.direct:
+            return self.backend.play(audio, stopped)
+        try:
+            return self.backend.play(audio, stopped)
+        except Exception as e:
+            # A direct backend can still speak the text itself
+            print(f"Cached audio playback failed ({self.name}): {e}")
+            return self.backend.speak(text, stopped)
+
+    def wait_idle(self, timeout=None):
+        """Block until no say() is playing; False if ``timeout`` ran out"""
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        """Cut off current playback and drop everything prepared"""
+        with self._lock:
+            self._generation += 1
+            prepared, self._prepared = self._prepared, collections.deque()
+        for _, _, future in prepared:
+            future.cancel()
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown(wait=False)
+        if self.backend:
+            self.backend.close()
+
+    def summary(self):
+        """One-line description for the log"""
+        summary = (f"{self.name}: {self.utterances} utterances, synthesis {self.synth_seconds:.2f}s, "
+                   f"waited {self.wait_seconds:.2f}s, playback {self.play_seconds:.2f}s")
+        if self.cache is not None:
+            summary += f"; cache {self.cache.summary()}"
+        return summary
+
+
+# --- Command line ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Speak text through a TTS backend")
+    parser.add_argument("text", nargs="*", help="text to speak, sentence by sentence")
+    parser.add_argument("--backend", default="auto", choices=["auto"] + sorted(BACKENDS))
+    parser.add_argument("--voice")
+    parser.add_argument("--rate", type=int, help="words per minute")
+    parser.add_argument("--output", default="tts_output.pcm", help="file for the pcm backend")
+    parser.add_argument("--list", action="store_true", help="show which backends are available")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, backend in BACKENDS.items():
+            print(f"{name:>8}  {'available' if backend.available() else 'not available'}")
+        return 0
+
+    options = {"path": args.output} if args.backend == "pcm" else {}
+    backend = create_backend(args.backend, args.voice, args.rate, **options)
+    if backend is None:
+        return 1
+    from bible_ai_streaming import split_sentences
+    sentences = list(split_sentences([" ".join(args.text) or "Yes, how can I help?"]))
+    speaker = Speaker(backend)
+    for sentence in sentences:
+        speaker.prepare(sentence)
+    for sentence in sentences:
+        speaker.say(sentence)
+    print(speaker.summary())
+    speaker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
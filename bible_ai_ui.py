@@ -0,0 +1,86 @@
+"""Thread-safe UI updates for the Tk front ends.
+
+The listening thread used to call ``status_label.config()``,
+``log_area.insert()`` and ``toggle_button.config()`` directly, breaking
+Tk's single-thread rule and forcing a redraw per call. ``UIUpdateQueue``
+collects those mutations from any thread and applies them on the Tk main
+loop once per frame: keyed updates (status text, button, ...) collapse to
+the latest one, and log lines are inserted as one batch.
+"""
+
+import threading
+
+# Drain the queue at roughly the animation frame rate
+DRAIN_INTERVAL_MS = 33
+
+
+class UIUpdateQueue:
+    """Collects UI mutations from any thread and applies them on the main loop.
+
+    ``write_lines`` receives each tick's log lines as one list.
+    """
+
+    def __init__(self, widget, write_lines, interval_ms=DRAIN_INTERVAL_MS):
+        self.widget = widget
+        self.write_lines = write_lines
+        self.interval_ms = interval_ms
+        self.applied = 0
+        self.coalesced = 0
+        self.batches = 0
+        self._latest = {}  # key -> callable, only the newest is kept
+        self._calls = []  # callables that must all run, in order
+        self._lines = []
+        self._lock = threading.Lock()
+        self._after_id = None
+
+    def set(self, key, update):
+        """Queue ``update``, replacing any pending update with the same key"""
+        with self._lock:
+            if key in self._latest:
+                self.coalesced += 1
+                del self._latest[key]  # re-insert so keys apply in order of last change
+            self._latest[key] = update
+
+    def call(self, update):
+        """Queue ``update`` to run on the main loop (never coalesced)"""
+        with self._lock:
+            self._calls.append(update)
+
+    def log(self, line):
+        """Queue a log line for the next batch insert"""
+        with self._lock:
+            self._lines.append(line)
+
+    def start(self):
+        """Start draining; call from the main thread"""
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        self.drain()
+        self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def drain(self):
+        """Apply everything queued so far; main thread only"""
+        with self._lock:
+            calls, self._calls = self._calls, []
+            latest, self._latest = self._latest, {}
+            lines, self._lines = self._lines, []
+
+        for update in calls + list(latest.values()):
+            try:
+                update()
+            except Exception as e:
+                print(f"UI update failed: {e}")
+            self.applied += 1
+        if lines:
+            try:
+                self.write_lines(lines)
+            except Exception as e:
+                print(f"Log update failed: {e}")
+            self.batches += 1
@@ -0,0 +1,164 @@
+"""Voice-activity detection in front of cloud speech recognition.
+
+``recognizer.listen()`` hands over everything between the energy trigger
+and the end of the pause, including leading noise and trailing silence.
+This module classifies 10 ms frames by short-time energy and zero-crossing
+rate (vectorized in NumPy), drops utterances with no real speech and trims
+silence from the rest before the audio is uploaded to Google.
+"""
+
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+FRAME_MS = 10
+# Speech if energy is this many times the noise floor ...
+ENERGY_RATIO = 6.0
+# ... or at least this many times it with a fricative-like zero-crossing rate
+FRICATIVE_ENERGY_RATIO = 2.5
+FRICATIVE_ZCR = 0.25
+# Frames quieter than this (int16 RMS) are never speech
+MIN_SPEECH_RMS = 120
+# Upper bound on the estimated noise floor, for utterances that are speech
+# from end to end and have no quiet frames to estimate it from
+MAX_NOISE_RMS = 300
+MIN_SPEECH_MS = 120
+PADDING_MS = 150
+
+
+class VADResult:
+    """Outcome of running the VAD over one utterance"""
+
+    def __init__(self, audio, raw_bytes, trimmed_bytes, raw_seconds, speech_seconds, vad_seconds):
+        self.audio = audio  # trimmed AudioData, or None if no speech was found
+        self.raw_bytes = raw_bytes
+        self.trimmed_bytes = trimmed_bytes
+        self.raw_seconds = raw_seconds
+        self.speech_seconds = speech_seconds
+        self.vad_seconds = vad_seconds
+        self.recognize_seconds = None
+        self.untrimmed_recognize_seconds = None
+
+    @property
+    def has_speech(self):
+        return self.audio is not None
+
+    @property
+    def saved_bytes(self):
+        return self.raw_bytes - self.trimmed_bytes
+
+    @property
+    def latency_saved(self):
+        """Measured recognition time saved, when a comparison run was made"""
+        if self.recognize_seconds is None or self.untrimmed_recognize_seconds is None:
+            return None
+        return self.untrimmed_recognize_seconds - self.recognize_seconds
+
+    def summary(self):
+        """One-line description for the log"""
+        if not self.has_speech:
+            return f"dropped {self.raw_seconds:.1f}s with no speech ({self.raw_bytes / 1024:.0f} KB not sent)"
+        percent = 100 * self.saved_bytes / self.raw_bytes if self.raw_bytes else 0
+        text = (f"kept {self.speech_seconds:.1f}s of {self.raw_seconds:.1f}s, "
+                f"saved {self.saved_bytes / 1024:.0f} KB ({percent:.0f}%), "
+                f"VAD {self.vad_seconds * 1000:.1f} ms")
+        if self.recognize_seconds is not None:
+            text += f", recognition {self.recognize_seconds:.2f}s"
+        if self.latency_saved is not None:
+            text += f" ({self.latency_saved:+.2f}s vs untrimmed)"
+        return text
+
+
+class VoiceActivityDetector:
+    """Energy + zero-crossing VAD that trims AudioData before recognition.
+
+    ``compare_every`` > 0 also recognizes every Nth utterance untrimmed so
+    the real latency difference can be measured (costs an extra request).
+    """
+
+    def __init__(self, frame_ms=FRAME_MS, min_speech_ms=MIN_SPEECH_MS,
+                 padding_ms=PADDING_MS, compare_every=0):
+        self.frame_ms = frame_ms
+        self.min_speech_ms = min_speech_ms
+        self.padding_ms = padding_ms
+        self.compare_every = compare_every
+        self.utterances = 0
+        self.dropped = 0
+        self.total_raw_bytes = 0
+        self.total_saved_bytes = 0
+
+    def speech_frames(self, samples, frame):
+        """Boolean speech mask, one entry per ``frame`` samples"""
+        n = len(samples) // frame
+        frames = samples[:n * frame].reshape(n, frame).astype(np.float32)
+        energy = (frames ** 2).mean(axis=1)
+        signs = np.signbit(frames)
+        zcr = (signs[:, 1:] != signs[:, :-1]).mean(axis=1)
+
+        # The quietest tenth of the utterance approximates the noise floor
+        noise = min(max(np.percentile(energy, 10), 1.0), MAX_NOISE_RMS ** 2)
+        loud_enough = energy > MIN_SPEECH_RMS ** 2
+        voiced = energy > noise * ENERGY_RATIO
+        fricative = (energy > noise * FRICATIVE_ENERGY_RATIO) & (zcr > FRICATIVE_ZCR)
+        return loud_enough & (voiced | fricative)
+
+    def process(self, audio):
+        """Trim ``audio`` (an sr.AudioData) to its speech; see VADResult"""
+        started = time.perf_counter()
+        width = audio.sample_width
+        rate = audio.sample_rate
+        raw = audio.frame_data
+        samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype="<i2")
+        raw_seconds = len(samples) / rate
+        frame = max(1, int(rate * self.frame_ms / 1000))
+
+        mask = self.speech_frames(samples, frame) if len(samples) >= frame else np.zeros(0, dtype=bool)
+        speech = np.flatnonzero(mask)
+        self.utterances += 1
+        self.total_raw_bytes += len(raw)
+
+        if len(speech) * self.frame_ms < self.min_speech_ms:
+            self.dropped += 1
+            self.total_saved_bytes += len(raw)
+            return VADResult(None, len(raw), 0, raw_seconds, 0.0, time.perf_counter() - started)
+
+        padding = int(self.padding_ms / self.frame_ms)
+        first = max(0, speech[0] - padding) * frame
+        last = min(len(samples), (speech[-1] + 1 + padding) * frame)
+        trimmed = sr.AudioData(raw[first * width:last * width], rate, width)
+        self.total_saved_bytes += len(raw) - len(trimmed.frame_data)
+        return VADResult(trimmed, len(raw), len(trimmed.frame_data), raw_seconds,
+                         (last - first) / rate, time.perf_counter() - started)
+
+    def recognize(self, recognize, audio, **kwargs):
+        """Run ``recognize`` (e.g. recognizer.recognize_google) on the trimmed audio.
+
+        Raises ``sr.UnknownValueError`` without a network call if the
+        utterance has no speech. Returns ``(text, VADResult)``.
+        """
+        result = self.process(audio)
+        if not result.has_speech:
+            raise sr.UnknownValueError()
+
+        if self.compare_every and self.utterances % self.compare_every == 0:
+            started = time.perf_counter()
+            try:
+                recognize(audio, **kwargs)
+            except sr.UnknownValueError:
+                pass
+            result.untrimmed_recognize_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        text = recognize(result.audio, **kwargs)
+        result.recognize_seconds = time.perf_counter() - started
+        return text, result
+
+    def stats(self):
+        """Totals since startup"""
+        return {
+            "utterances": self.utterances,
+            "dropped": self.dropped,
+            "raw_bytes": self.total_raw_bytes,
+            "saved_bytes": self.total_saved_bytes,
+        }
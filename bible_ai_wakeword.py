@@ -0,0 +1,394 @@
+"""Offline "Hey Bible" wake-word spotting.
+
+Every ambient phrase used to be sent to ``recognize_google()`` just to look
+for "hey bible" in the transcript. This module does the check locally on
+the CPU: NumPy MFCC features are matched against a handful of enrolled
+recordings of the wake word with subsequence DTW, and only when that fires
+does the listener hand off to cloud speech recognition.
+
+Enroll templates and benchmark from the command line:
+
+    python bible_ai_wakeword.py enroll            # record 5 samples
+    python bible_ai_wakeword.py bench FIXTURES    # latency / false accepts
+
+A fixture directory holds ``positive/*.wav`` clips that contain the wake
+word and ``negative/*.wav`` clips that don't. Templates are read from
+``FIXTURES/templates`` if present, otherwise from ``wake_word_templates``.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wake_word_templates")
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 400   # 25 ms
+FRAME_STEP = 160     # 10 ms
+NFFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+# Windows quieter than this (int16 RMS) are never matched
+MIN_WINDOW_RMS = 300
+# Frames with c0 this far below the loudest frame count as silence
+VOICED_C0_RANGE = 30.0
+# Auto threshold = worst distance between two enrolled templates * margin
+THRESHOLD_MARGIN = 1.5
+DEFAULT_THRESHOLD = 9.0
+
+
+# --- Features ---
+
+def to_mono_16k(samples, sample_rate, channels=1):
+    """Convert int16 PCM (interleaved if multi-channel) to mono float32 at 16 kHz"""
+    samples = np.asarray(samples, dtype=np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if sample_rate != SAMPLE_RATE and len(samples):
+        duration = len(samples) / sample_rate
+        target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        samples = np.interp(target, np.arange(len(samples)) / sample_rate, samples).astype(np.float32)
+    return samples
+
+
+_MEL_FILTERS = None
+_DCT_MATRIX = None
+
+
+def _mel_filterbank():
+    global _MEL_FILTERS
+    if _MEL_FILTERS is None:
+        def hz_to_mel(hz):
+            return 2595 * np.log10(1 + hz / 700)
+
+        def mel_to_hz(mel):
+            return 700 * (10 ** (mel / 2595) - 1)
+
+        mel_points = np.linspace(hz_to_mel(0), hz_to_mel(SAMPLE_RATE / 2), N_MELS + 2)
+        bins = np.floor((NFFT + 1) * mel_to_hz(mel_points) / SAMPLE_RATE).astype(int)
+        filters = np.zeros((N_MELS, NFFT // 2 + 1), dtype=np.float32)
+        for m in range(1, N_MELS + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                filters[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                filters[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+        _MEL_FILTERS = filters
+    return _MEL_FILTERS
+
+
+def _dct_matrix():
+    global _DCT_MATRIX
+    if _DCT_MATRIX is None:
+        n = np.arange(N_MELS)
+        k = np.arange(N_MFCC)[:, None]
+        _DCT_MATRIX = (np.cos(np.pi * k * (2 * n + 1) / (2 * N_MELS)) * np.sqrt(2 / N_MELS)).astype(np.float32)
+    return _DCT_MATRIX
+
+
+_WINDOW = np.hamming(FRAME_LENGTH).astype(np.float32)
+
+
+def mfcc(samples):
+    """MFCC features (frames x N_MFCC, c0 first) of mono 16 kHz float samples"""
+    if len(samples) < FRAME_LENGTH:
+        return np.zeros((0, N_MFCC), dtype=np.float32)
+    emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+    frames = np.lib.stride_tricks.sliding_window_view(emphasized, FRAME_LENGTH)[::FRAME_STEP]
+    power = np.abs(np.fft.rfft(frames * _WINDOW, NFFT)) ** 2 / NFFT
+    mel = np.log(power @ _mel_filterbank().T + 1e-6)
+    return mel @ _dct_matrix().T
+
+
+def normalize(features, voiced_range=VOICED_C0_RANGE):
+    """Cepstral mean normalization over the voiced frames, c0 dropped.
+
+    The mean is taken only over frames within ``voiced_range`` of the
+    loudest one so that silence around the keyword in a listening window
+    doesn't shift it away from the (trimmed) templates. c0 itself is
+    overall loudness and is dropped so matching is level independent.
+    """
+    if len(features) == 0:
+        return features[:, 1:]
+    c0 = features[:, 0]
+    voiced = features[c0 >= c0.max() - voiced_range]
+    return features[:, 1:] - voiced[:, 1:].mean(axis=0)
+
+
+def voiced_span(samples, threshold_ratio=0.1, frame=FRAME_STEP):
+    """(start, end) sample indexes of the frames louder than a fraction of the loudest"""
+    n = len(samples) // frame
+    if n == 0:
+        return 0, len(samples)
+    rms = np.sqrt((samples[:n * frame].reshape(n, frame) ** 2).mean(axis=1))
+    voiced = np.nonzero(rms > rms.max() * threshold_ratio)[0]
+    if len(voiced) == 0:
+        return 0, 0
+    return voiced[0] * frame, (voiced[-1] + 1) * frame
+
+
+def trim_silence(samples, threshold_ratio=0.1):
+    """Trim leading/trailing frames quieter than a fraction of the loudest frame"""
+    start, end = voiced_span(samples, threshold_ratio)
+    return samples[start:end]
+
+
+# --- Matching ---
+
+def subsequence_dtw(template, window):
+    """Best match of ``template`` anywhere inside ``window``.
+
+    Uses slope-constrained steps (1,1), (1,2) and (2,1) so each template row
+    only depends on earlier rows and can be computed as one vector op.
+    Returns ``(distance per template frame, end frame in window)``.
+    """
+    n, m = len(template), len(window)
+    if n == 0 or m == 0:
+        return np.inf, 0
+    cost = np.sqrt(((template[:, None, :] - window[None, :, :]) ** 2).sum(axis=2))
+    prev2 = np.full(m, np.inf)
+    prev = cost[0].copy()  # free start anywhere in the window
+    for i in range(1, n):
+        best = np.full(m, np.inf)
+        best[1:] = prev[:-1]
+        best[2:] = np.minimum(best[2:], prev[:-2])
+        best[1:] = np.minimum(best[1:], prev2[:-1])
+        prev2, prev = prev, cost[i] + best
+    end = int(np.argmin(prev))
+    return float(prev[end] / n), end
+
+
+class Detection:
+    """A wake-word hit"""
+
+    def __init__(self, score, template, sample_position):
+        self.score = score
+        self.template = template
+        self.sample_position = sample_position  # 16 kHz samples fed so far
+        self.time = time.perf_counter()
+
+
+class WakeWordDetector:
+    """Streaming template matcher fed with raw PCM chunks"""
+
+    def __init__(self, templates, threshold=None, hop_seconds=0.1, refractory_seconds=1.0):
+        self.template_names = [name for name, _ in templates]
+        self.templates = [normalize(features) for _, features in templates]
+        longest = max(len(t) for t in self.templates)
+        self.window_samples = int((longest * 1.5) * FRAME_STEP + FRAME_LENGTH)
+        self.hop_samples = int(hop_seconds * SAMPLE_RATE)
+        self.refractory_samples = int(refractory_seconds * SAMPLE_RATE)
+        self.threshold = threshold if threshold is not None else self._auto_threshold()
+        self.last_score = None
+        self.best_score = None
+        self.checks = 0
+        self.check_seconds = 0.0
+        self.reset()
+
+    @classmethod
+    def from_directory(cls, directory=TEMPLATE_DIR, threshold=None):
+        """Load every WAV in ``directory`` as a template; None if there are none"""
+        templates = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+            samples = trim_silence(read_wav(path))
+            features = mfcc(samples)
+            if len(features) >= 10:
+                templates.append((os.path.basename(path), features))
+        if not templates:
+            return None
+        return cls(templates, threshold=threshold)
+
+    def _auto_threshold(self):
+        if len(self.templates) < 2:
+            return DEFAULT_THRESHOLD
+        worst = 0.0
+        for i, a in enumerate(self.templates):
+            for j, b in enumerate(self.templates):
+                if i != j:
+                    worst = max(worst, subsequence_dtw(a, b)[0])
+        return worst * THRESHOLD_MARGIN
+
+    def reset(self):
+        """Forget buffered audio (e.g. after a detection or our own speech)"""
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._since_check = 0
+        self._position = 0
+        self._quiet_until = 0
+        self.best_score = None
+
+    def feed(self, pcm, sample_rate, sample_width=2, channels=1):
+        """Feed raw little-endian PCM; returns a Detection or None"""
+        if sample_width != 2:
+            raise ValueError("only 16-bit PCM is supported")
+        samples = to_mono_16k(np.frombuffer(pcm, dtype="<i2"), sample_rate, channels)
+        return self.feed_samples(samples)
+
+    def feed_samples(self, samples):
+        """Feed mono 16 kHz float samples; returns a Detection or None"""
+        self._buffer = np.concatenate((self._buffer, samples))[-self.window_samples:]
+        self._position += len(samples)
+        self._since_check += len(samples)
+        if self._since_check < self.hop_samples or self._position < self._quiet_until:
+            return None
+        self._since_check = 0
+        return self._check()
+
+    def _check(self):
+        window = self._buffer
+        if len(window) < FRAME_LENGTH or np.sqrt(np.mean(window ** 2)) < MIN_WINDOW_RMS:
+            return None
+        started = time.perf_counter()
+        features = normalize(mfcc(window))
+        best, best_template = np.inf, None
+        for name, template in zip(self.template_names, self.templates):
+            score, _ = subsequence_dtw(template, features)
+            if score < best:
+                best, best_template = score, name
+        self.checks += 1
+        self.check_seconds += time.perf_counter() - started
+        self.last_score = best
+        if self.best_score is None or best < self.best_score:
+            self.best_score = best
+        if best > self.threshold:
+            return None
+        detection = Detection(best, best_template, self._position)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._quiet_until = self._position + self.refractory_samples
+        return detection
+
+    def wait(self, capture):
+        """Block on a MicrophoneCapture until the wake word is heard"""
+        self.reset()
+        source = capture.source
+        while True:
+            detection = self.feed(capture.next_chunk(), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            if detection:
+                return detection
+
+
+# --- WAV helpers ---
+
+def read_wav(path):
+    """Read a 16-bit WAV file as mono float32 samples at 16 kHz"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        pcm = wav.readframes(wav.getnframes())
+        return to_mono_16k(np.frombuffer(pcm, dtype="<i2"), wav.getframerate(), wav.getnchannels())
+
+
+def write_wav(path, pcm, sample_rate, sample_width=2):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+
+
+# --- Command line ---
+
+def enroll(count, directory):
+    """Record wake-word samples from the microphone into the template directory"""
+    import speech_recognition as sr
+
+    os.makedirs(directory, exist_ok=True)
+    recognizer = sr.Recognizer()
+    with sr.Microphone() as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for i in range(count):
+            print(f"[{i + 1}/{count}] Say 'Hey Bible'...")
+            audio = recognizer.listen(source, phrase_time_limit=3)
+            path = os.path.join(directory, f"hey_bible_{int(time.time())}_{i}.wav")
+            write_wav(path, audio.get_raw_data(convert_width=2), audio.sample_rate)
+            print(f"  saved {path}")
+
+
+def bench(fixtures, threshold=None, chunk_seconds=1024 / SAMPLE_RATE):
+    """Stream WAV fixtures through the detector and report latency and false accepts"""
+    template_dir = os.path.join(fixtures, "templates")
+    if not os.path.isdir(template_dir):
+        template_dir = TEMPLATE_DIR
+    detector = WakeWordDetector.from_directory(template_dir, threshold=threshold)
+    if detector is None:
+        print(f"No templates found in {template_dir}")
+        return 1
+    print(f"{len(detector.templates)} templates from {template_dir}, threshold {detector.threshold:.2f}")
+
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+
+    def run(path):
+        samples = read_wav(path)
+        detector.reset()
+        hits = []
+        for start in range(0, len(samples), chunk):
+            detection = detector.feed_samples(samples[start:start + chunk])
+            if detection:
+                hits.append(detection)
+        return samples, hits
+
+    latencies, detected, positives = [], 0, sorted(glob.glob(os.path.join(fixtures, "positive", "*.wav")))
+    for path in positives:
+        samples, hits = run(path)
+        if not hits:
+            print(f"  miss  {os.path.basename(path)} (best score {detector.best_score or float('inf'):.2f})")
+            continue
+        detected += 1
+        # Latency: how long after the end of the spoken keyword the detector
+        # fired (negative if it fired before the last syllable ended)
+        _, speech_end = voiced_span(samples)
+        latencies.append((hits[0].sample_position - speech_end) / SAMPLE_RATE)
+
+    false_accepts, negative_seconds, closest_negative = 0, 0.0, np.inf
+    negatives = sorted(glob.glob(os.path.join(fixtures, "negative", "*.wav")))
+    for path in negatives:
+        samples, hits = run(path)
+        negative_seconds += len(samples) / SAMPLE_RATE
+        if hits:
+            print(f"  false accept  {os.path.basename(path)} (score {hits[0].score:.2f})")
+        elif detector.best_score is not None:
+            closest_negative = min(closest_negative, detector.best_score)
+        false_accepts += len(hits)
+
+    print(f"Detection rate:    {detected}/{len(positives)}")
+    if latencies:
+        print(f"Detection latency: mean {np.mean(latencies) * 1000:.0f} ms, "
+              f"p95 {np.percentile(latencies, 95) * 1000:.0f} ms")
+    if negative_seconds:
+        print(f"False accepts:     {false_accepts} in {negative_seconds / 60:.1f} min "
+              f"({false_accepts / (negative_seconds / 3600):.2f}/hour, "
+              f"{false_accepts}/{len(negatives)} clips)")
+    if np.isfinite(closest_negative):
+        print(f"Closest negative:  score {closest_negative:.2f} (threshold {detector.threshold:.2f})")
+    if detector.checks:
+        per_check = detector.check_seconds / detector.checks
+        print(f"CPU per check:     {per_check * 1000:.2f} ms "
+              f"({per_check / (detector.hop_samples / SAMPLE_RATE):.3f}x real time)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline 'Hey Bible' wake-word tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enroll_parser = commands.add_parser("enroll", help="record wake-word templates")
+    enroll_parser.add_argument("--count", type=int, default=5)
+    enroll_parser.add_argument("--dir", default=TEMPLATE_DIR)
+    bench_parser = commands.add_parser("bench", help="benchmark on WAV fixtures")
+    bench_parser.add_argument("fixtures")
+    bench_parser.add_argument("--threshold", type=float, default=None,
+                              help="match threshold (default: derived from the templates)")
+    args = parser.parse_args(argv)
+
+    if args.command == "enroll":
+        enroll(args.count, args.dir)
+        return 0
+    return bench(args.fixtures, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,21 +16,45 @@ sys.stderr = open(os.devnull, 'w')
 import threading
 import time
 import warnings
-import math
-import random
 import webbrowser
 import asyncio
 import json
-import subprocess
 import signal
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 warnings.filterwarnings('ignore')
 
-import tkinter as tk
-from tkinter import scrolledtext
 import google.generativeai as genai
 import speech_recognition as sr
 
+from bible_ai_audio import MicrophoneCapture, CaptureStopped
+from bible_ai_audiocache import AudioCache
+from bible_ai_bargein import BargeInMonitor
+from bible_ai_broadcast import Broadcaster, ResponseStreams, negotiate
+from bible_ai_chat import ChatSession
+from bible_ai_corpus import CORPUS_PATH, BibleCorpus
+from bible_ai_context import CachedPersonaModel, create_context_cache
+from bible_ai_flac import to_upload_audio
+from bible_ai_listener import (ListenerStateMachine, IDLE, WAKE_LISTEN, COMMAND_LISTEN,
+                               THINKING, SPEAKING)
+from bible_ai_log import LogBuffer, LogView
+from bible_ai_responsecache import ResponseCache
+from bible_ai_semanticcache import SemanticCache, create_embedder
+from bible_ai_streaming import speak_stream
+from bible_ai_tts import Speaker, create_backend
+from bible_ai_ui import UIUpdateQueue
+from bible_ai_vad import VoiceActivityDetector
+from bible_ai_wakeword import WakeWordDetector
+
+# Tk is only needed for the optional desktop window (--tk)
+try:
+    import tkinter as tk
+    from tkinter import scrolledtext
+    TK_AVAILABLE = True
+except ImportError:
+    TK_AVAILABLE = False
+
 # WebSocket server for communication with web frontend
 try:
     import websockets
@@ -80,15 +104,66 @@ if config.get("require_api_key_setup") and not config.get("api_key"):
 else:
     YOUR_API_KEY = config.get("api_key", DEFAULT_API_KEY)
 
+# Speak responses sentence by sentence while Gemini is still generating them
+STREAM_RESPONSES = config.get("stream_responses", True)
+
+# Conversation history sent with each prompt, in (estimated) tokens; older turns get summarized
+CHAT_TOKEN_BUDGET = config.get("chat_token_budget", 4000)
+
+# Answers to conversation-opening prompts reused for repeat requests; response_cache_file keeps them across runs
+RESPONSE_CACHE_ENTRIES = config.get("response_cache_entries", 256)
+RESPONSE_CACHE_TTL_HOURS = config.get("response_cache_ttl_hours", 168)
+RESPONSE_CACHE_FILE = config.get("response_cache_file")
+# ... and answers to questions worded differently but meaning the same: "hashing" or a
+# sentence-transformers model such as "all-MiniLM-L6-v2"; null turns it off
+SEMANTIC_CACHE_MODEL = config.get("semantic_cache_model", "hashing")
+SEMANTIC_CACHE_THRESHOLD = config.get("semantic_cache_threshold", 0.9)
+SEMANTIC_CACHE_ENTRIES = config.get("semantic_cache_entries", 10000)
+
+# Bible text for reading verses locally, built with `python bible_ai_corpus.py build`; null to ask Gemini
+BIBLE_CORPUS = config.get("bible_corpus", CORPUS_PATH)
+
+# Log lines the backend keeps in memory; older ones go to log_file (rotated) if set
+LOG_LINES = config.get("log_lines", 500)
+LOG_FILE = config.get("log_file")
+
+# Text-to-speech: "auto" (say on macOS, else espeak-ng/espeak), "say", "espeak" or "pcm"
+TTS_BACKEND = config.get("tts_backend", "auto")
+TTS_VOICE = config.get("tts_voice")
+TTS_RATE = config.get("tts_rate")
+# Reuse synthesized audio for repeated phrases (stored in tts_cache/, least recently used dropped first)
+TTS_CACHE = config.get("tts_cache", True)
+TTS_CACHE_MB = config.get("tts_cache_mb", 64)
+# Stop speaking when the wake word is heard over the speech (needs enrolled wake-word templates)
+BARGE_IN = config.get("barge_in", True)
+
+# Upload the persona once as cached content: "gemini", "local" (offline stand-in) or null
+CONTEXT_CACHE = config.get("context_cache", "gemini")
+
 # Configure the Gemini API client
 model = None
 
+# Follow-up questions are answered with the conversation so far
+chat = ChatSession(None, CHAT_TOKEN_BUDGET)
+
+# Whole answers for prompts that keep coming back ("David and Goliath", ...)
+response_cache = ResponseCache(RESPONSE_CACHE_ENTRIES, RESPONSE_CACHE_TTL_HOURS * 3600, RESPONSE_CACHE_FILE)
+# ... and the same stories asked for in other words ("Jonah and the whale" / "Jonah in the big fish")
+similar_answers = (SemanticCache(create_embedder(SEMANTIC_CACHE_MODEL), SEMANTIC_CACHE_THRESHOLD,
+                                 SEMANTIC_CACHE_ENTRIES, RESPONSE_CACHE_TTL_HOURS * 3600)
+                   if SEMANTIC_CACHE_MODEL else None)
+
+# "Read John 3:16", "what does Psalm 23 say": answered from the local Bible text when it's there
+bible = BibleCorpus.open(BIBLE_CORPUS) if BIBLE_CORPUS else None
+
 def configure_gemini(api_key):
     """Configure Gemini API with the given key"""
     global model
     try:
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(
+        if model is not None:
+            model.close()  # delete its cached persona rather than leave it to expire
+        model = CachedPersonaModel(
             model_name='gemini-2.5-flash',
             system_instruction="""You are the Bible AI, a wise and eloquent storyteller. Your purpose is to narrate stories and concepts from the Bible. 
             When asked for a story, you must tell it in a cinematic, descriptive, and immersive way. 
@@ -97,8 +172,10 @@ def configure_gemini(api_key):
             Keep your responses focused on the user's request.
             If the user asks a question that is not about a story (e.g., 'who was Moses?'), answer it clearly and concisely from a biblical perspective.
             Begin your stories directly without introductory phrases like 'Of course, here is a story...'
-            """
+            """,
+            cache=create_context_cache(CONTEXT_CACHE)
         )
+        chat.model = model
         return True
     except Exception as e:
         print(f"API Key configuration failed: {e}")
@@ -107,201 +184,349 @@ def configure_gemini(api_key):
 # Initial configuration
 configure_gemini(YOUR_API_KEY)
 
-# Global WebSocket clients
-websocket_clients = set()
-say_process = None  # Store the current say process
+# Queues UI updates from any thread onto the WebSocket server's loop
+broadcaster = Broadcaster()
+# AI responses streamed to the web UI chunk by chunk
+response_streams = ResponseStreams(broadcaster.publish)
+# Speaks through the TTS backend, synthesizing the next sentence during playback
+speaker = Speaker(create_backend(TTS_BACKEND, TTS_VOICE, TTS_RATE),
+                  AudioCache(max_bytes=TTS_CACHE_MB * 1024 * 1024) if TTS_CACHE else None)
 
-async def broadcast_to_web(message):
-    """Send message to all connected web clients"""
-    if websocket_clients:
-        await asyncio.gather(
-            *[client.send(json.dumps(message)) for client in websocket_clients],
-            return_exceptions=True
-        )
+# Spoken often enough to synthesize once, at startup
+ACKNOWLEDGEMENT = "Yes, how can I help?"
+NO_COMMAND = "I'm sorry, I didn't hear a command."
+RECOGNITION_ERROR = "There seems to be an issue with the speech recognition service."
+speaker.warm([ACKNOWLEDGEMENT, NO_COMMAND, RECOGNITION_ERROR])
 
 def broadcast_sync(message):
-    """Synchronous wrapper for broadcasting"""
-    try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(broadcast_to_web(message))
-        loop.close()
-    except:
-        pass
+    """Send message to all connected web clients without blocking the caller"""
+    broadcaster.publish(message)
+
+# Offline wake-word spotting, used once templates have been recorded with
+# `python bible_ai_wakeword.py enroll`; otherwise every phrase goes to Google
+wake_detector = WakeWordDetector.from_directory()
+
+# Trims silence from each utterance and drops ones with no speech before upload
+vad = VoiceActivityDetector()
+
+# What the listening loop is doing; threads wait on it instead of polling
+listener = ListenerStateMachine()
+
+# Listens for the wake word over our own speech and cuts the speech short
+barge_in = BargeInMonitor(wake_detector if BARGE_IN else None, speaker,
+                          lambda detection: barge_in_detected(detection))
 
 # --- Core Functions ---
 
-def speak(text):
-    """Uses macOS's built-in 'say' command to speak text aloud with animation."""
-    global say_process
-    
+def begin_speaking():
+    """Switch the UI into the speaking state"""
     update_status("Speaking...", "speaking")
     app.is_speaking = True
+    listener.transition(SPEAKING)
     app.start_speaking_animation()
     
     # Update button to show 'Stop Speaking'
-    app.toggle_button.config(text="Stop Speaking", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
-    broadcast_sync({"type": "button", "text": "Stop Speaking", "color": "red"})
-    
-    # Write text to a temporary file to avoid shell escaping issues with long text
-    import tempfile
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-        f.write(text)
-        temp_file = f.name
-    
-    try:
-        # Use subprocess instead of os.system for better control
-        say_process = subprocess.Popen(['say', '-f', temp_file])
-        say_process.wait()  # Wait for completion
-    except Exception as e:
-        print(f"Speech error: {e}")
-    finally:
-        say_process = None
-        # Clean up temp file
-        try:
-            os.remove(temp_file)
-        except:
-            pass
+    set_button("Stop Speaking", "red")
     
+    # Keep listening for the wake word while we talk
+    if mic_capture:
+        barge_in.start(mic_capture)
+
+def say_text(text):
+    """Speak text through the configured TTS backend and block until it finishes"""
+    speaker.say(text)
+
+def finish_speaking():
+    """Return the UI to the listening state after speech ends"""
     app.is_speaking = False
+    barge_in.stop()
     app.stop_speaking_animation()
     
+    # Don't let the microphone pick up our own voice as the next phrase
+    if mic_capture:
+        mic_capture.discard()
+    
+    # Wakes the listening loop right away
+    listener.transition(WAKE_LISTEN if is_listening else IDLE)
+    
     # Only update if still listening (not manually stopped)
     if is_listening:
-        app.toggle_button.config(text="Stop", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
-        broadcast_sync({"type": "button", "text": "Stop", "color": "red"})
+        set_button("Stop", "red")
         update_status("Listening for 'Hey Bible'...", "listening")
 
+def interrupt_speaking(reason, discard=True):
+    """Cut speech off mid-sentence and go back to listening"""
+    app.is_speaking = False
+    # Cut off playback and drop any sentences synthesized ahead
+    speaker.stop()
+    barge_in.stop()
+    listener.transition(WAKE_LISTEN, reason)
+    app.stop_speaking_animation()
+    if discard and mic_capture:
+        mic_capture.discard()
+    set_button("Stop", "red")
+
+def barge_in_detected(detection):
+    """The wake word was heard over our own speech; stop talking and take the command"""
+    log_message(f"Heard: hey bible while speaking (local match, score {detection.score:.2f})")
+    # Keep the audio after the wake word: the command follows right away
+    interrupt_speaking("barge-in", discard=False)
+
+def speak(text):
+    """Speak text aloud through the TTS backend with animation."""
+    begin_speaking()
+    say_text(text)
+    # An interruption already reset the UI
+    if app.is_speaking:
+        finish_speaking()
+
+def speak_response(prompt):
+    """Generate a response and speak it, sentence by sentence when streaming is enabled"""
+    fresh = chat.fresh
+    if fresh:
+        chat.reset()  # an idle conversation's history must not carry over
+    
+    # Verse references and searches are read word for word from the local text
+    passage = bible.answer(prompt) if bible is not None else None
+    if passage:
+        chat.record(prompt, passage)
+        log_message(f"Bible: {passage}\n")
+        log_message(f"Corpus: {bible.summary()}")
+        speak(passage)
+        return
+    
+    # A new conversation may reuse an earlier answer; follow-ups depend on what came before,
+    # so they are neither looked up nor stored
+    cached, tier = cached_answer(prompt) if fresh else (None, None)
+    started = time.perf_counter()
+    
+    if not STREAM_RESPONSES:
+        response = cached or chat.ask(prompt)
+        response_text = response.text
+        chat.record(prompt, response_text, response)
+        if fresh and cached is None:
+            remember_answer(prompt, response_text, time.perf_counter() - started)
+        log_message(f"AI Response{' (cached)' if cached else ''}: {response_text}\n")
+        log_message(f"Chat: {chat.report()}")
+        if fresh:
+            report_answer_caches(tier)
+        speak(response_text)
+        return
+    
+    response_streams.begin()
+    try:
+        response = cached or chat.ask(prompt, stream=True)
+        response_text, stats = speak_stream(
+            response,
+            say_text,
+            on_start=begin_speaking,
+            prepare=speaker.preparer(),
+            is_interrupted=lambda: not app.is_speaking,
+            on_chunk=response_streams.chunk
+        )
+    finally:
+        response_streams.end()
+    # Interrupted replies are kept as far as they got
+    chat.record(prompt, response_text, response)
+    # Only complete answers are worth replaying
+    if fresh and cached is None and not stats.interrupted:
+        remember_answer(prompt, response_text, stats.time_to_first_audio or 0.0)
+    # The stop button already reset the UI if speech was interrupted
+    if app.is_speaking:
+        finish_speaking()
+    # The web UI already has the text from the response stream
+    log_message(f"AI Response{' (cached)' if cached else ''}: {response_text}\n", web=False)
+    log_message(f"Streaming: {stats.summary()}")
+    log_message(f"Chat: {chat.report()}")
+    if fresh:
+        report_answer_caches(tier)
+
+def cached_answer(prompt):
+    """(answer, tier) for an earlier answer to the same question ("exact") or to one close
+    enough in meaning ("similar"); (None, None) if there's none"""
+    cached = response_cache.get(prompt, model.model_name, model.version)
+    if cached is not None:
+        return cached, "exact"
+    if similar_answers is not None:
+        cached = similar_answers.get(prompt, model.model_name, model.version)
+        if cached is not None:
+            return cached, "similar"
+    return None, None
+
+def remember_answer(prompt, text, seconds):
+    """Keep a complete answer for the next time the question comes up"""
+    response_cache.put(prompt, model.model_name, model.version, text, seconds)
+    if similar_answers is not None:
+        similar_answers.put(prompt, model.model_name, model.version, text, seconds)
+
+def report_answer_caches(tier):
+    """Log the answer caches' stats and send them to the web UI"""
+    # Only exact misses reach the similar tier, so each tier's counts are its own
+    log_message(f"Answer cache: {f'hit, {tier} match' if tier else 'miss'}")
+    log_message(f"Exact answers: {response_cache.summary()}")
+    if similar_answers is not None:
+        log_message(f"Similar answers: {similar_answers.summary()}")
+    broadcast_sync(dict(response_cache.stats(), type="cache_stats",
+                        similar=similar_answers.stats() if similar_answers is not None else None))
+
+def transcribe(recognizer, audio):
+    """Trim silence with the VAD, then transcribe what's left with Google"""
+    def recognize(speech):
+        # Resample and FLAC-encode in-process instead of spawning the flac binary
+        return recognizer.recognize_google(to_upload_audio(speech))
+    
+    text, result = vad.recognize(recognize, audio)
+    log_message(f"VAD: {result.summary()}")
+    return text
+
 def listen_and_process():
     """The main loop for listening for the wake word and commands."""
-    global is_listening
+    global is_listening, mic_capture
     recognizer = sr.Recognizer()
+    
+    # One microphone stream for the whole session, cut into phrases as needed
+    capture = MicrophoneCapture(recognizer)
+    mic_capture = capture
 
-    while is_listening:
-        try:
-            # Don't listen while speaking
-            if app.is_speaking:
-                time.sleep(0.1)
-                continue
+    try:
+        while is_listening:
+            try:
+                # Don't listen while speaking; resumes as soon as speech ends
+                listener.wait_while(SPEAKING)
+                if not is_listening:
+                    break
                 
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                update_status("Listening for 'Hey Bible'...", "listening")
-                app.set_listening_state()
+                if not capture.running:
+                    capture.start()
                 
-                audio_wake_word = recognizer.listen(source, phrase_time_limit=10)
-            
-            text = recognizer.recognize_google(audio_wake_word).lower()
-            log_message(f"Heard: {text}")
-
-            if "hey bible" in text:
-                update_status("Wake word detected. Listening for your command...", "processing")
-                app.set_processing_state()
-                speak("Yes, how can I help?")
-                
-                # Wait for the prompt after wake word
-                with sr.Microphone() as source:
-                    recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                resume_at = barge_in.take()
+                if resume_at is not None:
+                    # The wake word was spoken over our own speech; its command follows right away
+                    capture.seek(resume_at)
+                    heard_wake_word = True
+                else:
+                    listener.transition(WAKE_LISTEN)
+                    
+                    update_status("Listening for 'Hey Bible'...", "listening")
+                    app.set_listening_state()
+                    
+                    if wake_detector:
+                        # Spot the wake word locally; nothing is sent to Google until it fires
+                        detection = wake_detector.wait(capture)
+                        log_message(f"Heard: hey bible (local match, score {detection.score:.2f})")
+                        heard_wake_word = True
+                    else:
+                        audio_wake_word = capture.listen(phrase_time_limit=10)
+                        
+                        text = transcribe(recognizer, audio_wake_word).lower()
+                        log_message(f"Heard: {text}")
+                        heard_wake_word = "hey bible" in text
+
+                if heard_wake_word:
+                    update_status("Wake word detected. Listening for your command...", "processing")
+                    app.set_processing_state()
+                    if resume_at is None:
+                        speak(ACKNOWLEDGEMENT)
+                        # Saying the wake word over the acknowledgement starts the command there
+                        resume_at = barge_in.take()
+                        if resume_at is not None:
+                            capture.seek(resume_at)
+                    
+                    # Wait for the prompt after wake word
+                    listener.transition(COMMAND_LISTEN)
                     update_status("Listening for command...", "listening")
-                    audio_command = recognizer.listen(source, timeout=5, phrase_time_limit=15)
-                
-                prompt = recognizer.recognize_google(audio_command)
-                log_message(f"User Prompt: {prompt}")
-
-                update_status("Thinking...", "thinking")
-                app.set_thinking_state()
-
-                response = model.generate_content(prompt)
-                response_text = response.text
-                log_message(f"AI Response: {response_text}\n")
-                speak(response_text)
-
-        except sr.WaitTimeoutError:
-            if "wake word detected" in app.status_label.cget("text").lower():
-                log_message("No command heard after wake word.")
-                speak("I'm sorry, I didn't hear a command.")
-            continue
-        except sr.UnknownValueError:
-            continue
-        except sr.RequestError as e:
-            log_message(f"Could not request results; {e}")
-            speak("There seems to be an issue with the speech recognition service.")
-            time.sleep(2)
-        except Exception as e:
-            log_message(f"An unexpected error occurred: {e}")
-            time.sleep(2)
+                    audio_command = capture.listen(timeout=5, phrase_time_limit=15)
+                    
+                    prompt = transcribe(recognizer, audio_command)
+                    log_message(f"User Prompt: {prompt}")
+                    listener.transition(THINKING)
+
+                    update_status("Thinking...", "thinking")
+                    app.set_thinking_state()
+
+                    speak_response(prompt)
+
+            except sr.WaitTimeoutError:
+                if listener.state == COMMAND_LISTEN:
+                    log_message("No command heard after wake word.")
+                    speak(NO_COMMAND)
+                continue
+            except sr.UnknownValueError:
+                continue
+            except CaptureStopped:
+                continue
+            except sr.RequestError as e:
+                log_message(f"Could not request results; {e}")
+                speak(RECOGNITION_ERROR)
+                # Back off, but stop waiting as soon as listening is turned off
+                listener.wait_for(IDLE, timeout=2)
+            except Exception as e:
+                log_message(f"An unexpected error occurred: {e}")
+                listener.wait_for(IDLE, timeout=2)
+    finally:
+        capture.stop()
 
 # --- GUI Functions ---
 
 def update_status(message, state="idle"):
-    """Update status in both tkinter and web UI"""
-    app.status_label.config(text=message)
+    """Update status in the backend and web UI"""
+    app.set_status(message, state)
     broadcast_sync({"type": "status", "message": message, "state": state})
 
-def log_message(message):
-    """Log message in both tkinter and web UI"""
-    app.log_area.config(state=tk.NORMAL)
-    app.log_area.insert(tk.END, message + "\n")
-    app.log_area.see(tk.END)
-    app.log_area.config(state=tk.DISABLED)
-    broadcast_sync({"type": "log", "message": message})
+def log_message(message, web=True):
+    """Log message in the backend and web UI"""
+    app.add_log(message)
+    if web:
+        broadcast_sync({"type": "log", "message": message})
+
+def set_button(text, color):
+    """Update the toggle button in the backend and web UI"""
+    app.set_button(text, color)
+    broadcast_sync({"type": "button", "text": text, "color": color})
 
 def toggle_listening():
-    global is_listening, listening_thread, say_process
+    global is_listening, listening_thread
     
     # If speaking, stop it and resume listening
     if app.is_speaking:
-        # Kill the say process if it exists
-        if say_process and say_process.poll() is None:
-            say_process.terminate()
-            try:
-                say_process.wait(timeout=0.5)
-            except subprocess.TimeoutExpired:
-                say_process.kill()
-        
-        # Also kill any lingering say processes
-        try:
-            subprocess.run(['killall', 'say'], check=False)
-        except:
-            pass
-        
-        app.is_speaking = False
-        app.stop_speaking_animation()
-        log_message("Speech interrupted by user")
-        
         # Resume listening mode (don't stop the listening thread)
-        app.toggle_button.config(text="Stop", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
+        interrupt_speaking("interrupted")
+        log_message("Speech interrupted by user")
         update_status("Listening for 'Hey Bible'...", "listening")
-        app.status_label.config(fg="#10b981")
-        broadcast_sync({"type": "button", "text": "Stop", "color": "red"})
         return
     
     # If listening, stop it
     if is_listening:
         is_listening = False
-        app.toggle_button.config(text="Start Listening", bg="#6366f1", activebackground="#5b5ff1", fg="#f0f0f0")
+        listener.transition(IDLE, "stopped")
+        if mic_capture:
+            mic_capture.stop()
+        set_button("Start Listening", "blue")
         update_status("Ready", "idle")
-        app.status_label.config(fg="#9ca3af")
+        log_message(f"Listener: {listener.summary()}")
+        log_message(f"Speech: {speaker.summary()}")
+        log_message(f"Barge-in: {barge_in.summary()}")
+        if model:
+            log_message(f"Persona cache: {model.summary()}")
+        # The next activation starts a new conversation
+        chat.reset()
         log_message("--- AI Deactivated ---\n")
-        broadcast_sync({"type": "button", "text": "Start Listening", "color": "blue"})
         app.set_idle_state()
     else:
         # Start listening
         is_listening = True
         listening_thread = threading.Thread(target=listen_and_process, daemon=True)
         listening_thread.start()
-        app.toggle_button.config(text="Stop", bg="#ff4757", activebackground="#ee3344", fg="#ffffff")
+        set_button("Stop", "red")
         log_message("--- AI Activated ---")
         update_status("Listening...", "listening")
-        app.status_label.config(fg="#10b981")
-        broadcast_sync({"type": "button", "text": "Stop", "color": "red"})
         app.set_listening_state()
 
 # --- WebSocket Server ---
 
 async def handle_websocket(websocket):
     """Handle WebSocket connections from web frontend"""
-    websocket_clients.add(websocket)
+    broadcaster.add(websocket)
     
     # Send initial config state
     await websocket.send(json.dumps({
@@ -309,13 +534,16 @@ async def handle_websocket(websocket):
         "require_setup": config.get("require_api_key_setup", True),
         "has_key": bool(config.get("api_key"))
     }))
+    # Bring a late-joining page up to date with the current state
+    broadcaster.send(websocket, {"type": "status", "message": app.status, "state": app.state})
+    broadcaster.send(websocket, {"type": "button", **app.button})
     
     try:
         async for message in websocket:
             data = json.loads(message)
             
             if data.get('action') == 'toggle':
-                # Run toggle in main thread
+                # Run toggle on the app's control thread, not the server loop
                 app.after(0, toggle_listening)
             
             elif data.get('action') == 'save_api_key':
@@ -351,20 +579,45 @@ async def handle_websocket(websocket):
                         "message": "API key cannot be empty."
                     }))
             
+            elif data.get('action') == 'hello':
+                # Frontend offers the encodings it can decode for broadcasts
+                encoding = negotiate(data.get('encodings'))
+                broadcaster.set_encoding(websocket, encoding)
+                await websocket.send(json.dumps({"type": "hello", "encoding": encoding}))
+            
             elif data.get('action') == 'get_config':
                 await websocket.send(json.dumps({
                     "type": "config",
                     "require_setup": config.get("require_api_key_setup", True),
                     "has_key": bool(config.get("api_key"))
                 }))
+            
+            elif data.get('action') == 'resume':
+                # Resend response chunks the client missed, e.g. after a reconnect
+                for reply in response_streams.replay(data.get('id'), data.get('seq')):
+                    broadcaster.send(websocket, reply)
+            
+            elif data.get('action') == 'get_stats':
+                # Per-client queue depth and drop counts, answer cache hits
+                await websocket.send(json.dumps({
+                    "type": "stats",
+                    "clients": broadcaster.client_stats(),
+                    "answer_cache": response_cache.stats(),
+                    "similar_answers": similar_answers.stats() if similar_answers is not None else None
+                }))
     
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        websocket_clients.remove(websocket)
+        queue = broadcaster.clients.get(websocket)
+        if queue and (queue.dropped or queue.coalesced):
+            print(f"WebSocket client {queue.address} left: {queue.sent} sent, "
+                  f"{queue.dropped} dropped, {queue.coalesced} superseded")
+        broadcaster.remove(websocket)
 
 async def start_websocket_server():
     """Start WebSocket server for web frontend communication"""
+    broadcaster.start()
     async with websockets.serve(handle_websocket, "localhost", 8765):
         await asyncio.Future()  # run forever
 
@@ -374,26 +627,61 @@ def run_websocket_server():
     asyncio.set_event_loop(loop)
     loop.run_until_complete(start_websocket_server())
 
-# --- Main Application Class (Hidden) ---
+# --- Backend State ---
 
-class BibleAIApp(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Bible AI Backend")
-        
-        # Hide the tkinter window
-        self.withdraw()
-        
+class HeadlessApp:
+    """Status, log and button state of the backend as plain Python objects.
+    
+    Runs the WebSocket server's asyncio loop on the main thread; callbacks
+    passed to after() run one at a time on a single control thread, the way
+    they used to run on the Tk main loop. Needs no display.
+    """
+    
+    def __init__(self, log_lines=LOG_LINES):
+        self.status = "Ready"
+        self.state = "idle"
+        self.button = {"text": "Start Listening", "color": "blue"}
+        self.log = LogBuffer(log_lines, spill_path=LOG_FILE)
         self.is_speaking = False
-        self.animation_id = None
-        self.wave_offset = 0
-        self.glow_offset = 0
-        self.idle_animation_id = None
-        
-        # Create minimal hidden UI for logging
-        self.status_label = tk.Label(self, text="Ready")
-        self.log_area = scrolledtext.ScrolledText(self, state=tk.DISABLED)
-        self.toggle_button = tk.Button(self, text="Start Listening")
+        self.loop = None
+        self._control = ThreadPoolExecutor(max_workers=1, thread_name_prefix="control")
+    
+    def set_status(self, message, state="idle"):
+        self.status = message
+        self.state = state
+    
+    def add_log(self, message):
+        self.log.append(message)
+    
+    def set_button(self, text, color):
+        self.button = {"text": text, "color": color}
+    
+    def after(self, ms, callback):
+        """Run callback on the control thread after ms milliseconds"""
+        def submit():
+            self._control.submit(self._run_callback, callback)
+        if self.loop is None:
+            threading.Timer(ms / 1000, submit).start()
+        else:
+            self.loop.call_soon_threadsafe(self.loop.call_later, ms / 1000, submit)
+    
+    def _run_callback(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Callback error: {e}")
+    
+    def mainloop(self):
+        """Serve the web frontend until interrupted"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(start_websocket_server())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._control.shutdown(wait=False)
+            self.log.close()
     
     def start_speaking_animation(self):
         """Placeholder for animation"""
@@ -419,27 +707,90 @@ class BibleAIApp(tk.Tk):
         """Placeholder for state"""
         pass
 
+# --- Optional Tk Window ---
+
+class BibleAIApp(HeadlessApp):
+    """Small desktop window mirroring the backend state (run with --tk)"""
+    
+    BUTTON_COLORS = {
+        "red": ("#ff4757", "#ee3344", "#ffffff"),
+        "blue": ("#6366f1", "#5b5ff1", "#f0f0f0"),
+    }
+    STATUS_COLORS = {"idle": "#9ca3af", "listening": "#10b981"}
+    
+    def __init__(self, log_lines=LOG_LINES):
+        super().__init__(log_lines)
+        self.root = tk.Tk()
+        self.root.title("Bible AI Backend")
+        
+        self.status_label = tk.Label(self.root, text=self.status, fg=self.STATUS_COLORS["idle"])
+        self.status_label.pack(padx=10, pady=(10, 5))
+        self.log_area = scrolledtext.ScrolledText(self.root, state=tk.DISABLED, height=15, width=70)
+        self.log_area.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        self.toggle_button = tk.Button(self.root, text=self.button["text"], command=toggle_listening)
+        self.toggle_button.pack(padx=10, pady=(5, 10))
+        
+        # Shows a window over the same bounded log the backend keeps
+        self.log_view = LogView(self.log_area, self.log)
+        
+        # Widget changes from other threads are applied on the Tk loop once per frame
+        self.ui = UIUpdateQueue(self.root, self.append_log)
+        self.ui.start()
+    
+    def set_status(self, message, state="idle"):
+        super().set_status(message, state)
+        color = self.STATUS_COLORS.get(state)
+        self.ui.set("status", lambda: self.status_label.config(text=message))
+        if color:
+            self.ui.set("status_color", lambda: self.status_label.config(fg=color))
+    
+    def add_log(self, message):
+        super().add_log(message)
+        self.ui.log(message)
+    
+    def append_log(self, lines):
+        """The lines are already in the buffer (add_log); just bring the view up to date"""
+        self.log_view.refresh()
+    
+    def set_button(self, text, color):
+        super().set_button(text, color)
+        bg, active, fg = self.BUTTON_COLORS.get(color, self.BUTTON_COLORS["blue"])
+        self.ui.set("button", lambda: self.toggle_button.config(
+            text=text, bg=bg, activebackground=active, fg=fg))
+    
+    def after(self, ms, callback):
+        """Run callback on the Tk main loop after ms milliseconds; safe from any thread"""
+        self.ui.call(lambda: self.root.after(ms, callback))
+    
+    def mainloop(self):
+        # WebSocket server in the background, Tk on the main thread
+        ws_thread = threading.Thread(target=run_websocket_server, daemon=True)
+        ws_thread.start()
+        self.root.mainloop()
+        self.log.close()
+
 def open_web_frontend():
     """Open the web frontend in default browser"""
     html_file = Path(__file__).parent / "web_frontend.html"
     webbrowser.open(f"file://{html_file.absolute()}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bible AI backend for the web frontend")
+    parser.add_argument("--tk", action="store_true", help="also show a Tk window with status and log")
+    parser.add_argument("--no-browser", action="store_true", help="don't open the web frontend")
+    args = parser.parse_args()
+    
     is_listening = False
     listening_thread = None
+    mic_capture = None
     
-    # Start WebSocket server in background
-    ws_thread = threading.Thread(target=run_websocket_server, daemon=True)
-    ws_thread.start()
-    
-    # Wait a moment for server to start
-    time.sleep(0.5)
-    
-    # Open web frontend
-    open_web_frontend()
+    if args.tk and not TK_AVAILABLE:
+        print("tkinter is not available; running headless")
+    app = BibleAIApp() if args.tk and TK_AVAILABLE else HeadlessApp()
     
-    # Create hidden tkinter app
-    app = BibleAIApp()
+    # Open web frontend; it reconnects until the server is up
+    if not args.no_browser:
+        open_web_frontend()
     
     print("Bible AI Backend running...")
     print("Web UI should open automatically in your browser")